@@ -1,3 +1,30 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import CareerSite, Company, JobFeed, JobPosting
+
+
+@admin.register(Company)
+class CompanyAdmin(admin.ModelAdmin):
+    list_display = ("name", "country", "created_at")
+    search_fields = ("name",)
+
+
+@admin.register(CareerSite)
+class CareerSiteAdmin(admin.ModelAdmin):
+    list_display = ("url", "company", "platform", "last_crawled_at")
+    list_filter = ("platform",)
+    raw_id_fields = ("company",)
+
+
+@admin.register(JobPosting)
+class JobPostingAdmin(admin.ModelAdmin):
+    list_display = ("title", "company", "location", "platform", "posted_at", "duplicate_of")
+    list_filter = ("platform", ("duplicate_of", admin.EmptyFieldListFilter))
+    search_fields = ("title", "canonical_url")
+    raw_id_fields = ("company", "career_site", "duplicate_of")
+
+
+@admin.register(JobFeed)
+class JobFeedAdmin(admin.ModelAdmin):
+    list_display = ("host", "endpoint", "updated_at")
+    search_fields = ("host",)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class DiscoveryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'discovery'
+
+    def ready(self):
+        # Once per process, for both Django and the Celery workers
+        from logging_config import setup_logging
+
+        setup_logging()
@@ -0,0 +1,48 @@
+# scraper/discovery/connectors/__init__.py
+
+"""
+ATS JSON connectors, one module per platform.
+
+    connector = get_connector("lever")
+    async for job in connector.jobs("acme"):
+        ...
+
+``feed`` is the odd one out: it replays a JSON feed captured from a
+careers page (helpers/job_feeds.py), with the site's host as the token.
+"""
+
+from discovery.connectors.ashby import AshbyConnector
+from discovery.connectors.base import (
+    BaseConnector,
+    ConnectorError,
+    JobRecord,
+    NotModified,
+    ValidatorStore,
+)
+from discovery.connectors.feed import FeedConnector, FeedStore
+from discovery.connectors.greenhouse import GreenhouseConnector
+from discovery.connectors.lever import LeverConnector
+from discovery.connectors.smartrecruiters import SmartRecruitersConnector
+
+CONNECTORS: dict[str, type[BaseConnector]] = {
+    c.platform: c
+    for c in (LeverConnector, GreenhouseConnector, AshbyConnector, SmartRecruitersConnector, FeedConnector)
+}
+
+
+def get_connector(platform: str, **kwargs) -> BaseConnector | None:
+    """Connector instance for ``platform`` (as named by helpers/ats.py), or None."""
+    cls = CONNECTORS.get(platform)
+    return cls(**kwargs) if cls else None
+
+
+__all__ = [
+    "BaseConnector",
+    "ConnectorError",
+    "FeedStore",
+    "JobRecord",
+    "NotModified",
+    "ValidatorStore",
+    "CONNECTORS",
+    "get_connector",
+]
@@ -0,0 +1,36 @@
+# scraper/discovery/connectors/ashby.py
+
+from typing import AsyncIterator
+
+from discovery.connectors.base import BaseConnector, ConnectorError, JobRecord, parse_timestamp
+
+API_URL = "https://api.ashbyhq.com/posting-api/job-board/{token}"
+
+
+class AshbyConnector(BaseConnector):
+    """Ashby public posting API; single response per board."""
+
+    platform = "ashby"
+
+    async def jobs(self, token: str) -> AsyncIterator[JobRecord]:
+        payload = await self.get_json(API_URL.format(token=token), conditional=True)
+        if not isinstance(payload, dict) or "jobs" not in payload:
+            raise ConnectorError(f"ashby: unexpected payload for '{token}'")
+
+        for item in payload["jobs"]:
+            if item.get("isListed") is False:
+                continue
+            yield JobRecord(
+                platform=self.platform,
+                board=token,
+                external_id=str(item["id"]),
+                title=item.get("title", "").strip(),
+                url=item.get("jobUrl", ""),
+                location=item.get("location", "") or "",
+                department=item.get("department", "") or item.get("team", "") or "",
+                employment_type=item.get("employmentType", "") or "",
+                remote=item.get("isRemote"),
+                description=item.get("descriptionPlain", "") or "",
+                posted_at=parse_timestamp(item.get("publishedAt")),
+                extra={"apply_url": item.get("applyUrl", "")},
+            )
@@ -0,0 +1,165 @@
+# scraper/discovery/connectors/base.py
+
+"""
+Shared plumbing for ATS JSON connectors.
+
+Every connector turns a board token (from helpers/ats.py) into a stream of
+normalized ``JobRecord``s using the platform's public job-list API over the
+pooled async client.
+
+Conditional requests: a board's request is sent with If-None-Match /
+If-Modified-Since from a validator store, keyed by ``validator_key`` (the
+CareerSite's URL, so two sites on one board don't share them); a 304
+raises ``NotModified`` so callers can skip the board entirely.
+
+• The response's validators are only held in ``fresh_validators``; the
+  caller stores them with ``save_validators()`` once the whole job list
+  has been collected and written. A failure anywhere before that leaves
+  the old validators, and the next run fetches in full.
+• Validators only vouch for the response they came with. Paginated
+  connectors drop them when a board spans more than one page, so such
+  boards are never answered with a 304 that hides later pages.
+• ``conditional=False`` (nothing stored for the site yet) sends no
+  validators at all.
+"""
+
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+import httpx
+from asgiref.sync import sync_to_async
+
+from discovery.helpers.http_client import get_async_client
+
+logger = logging.getLogger("scraper")
+
+
+class ConnectorError(Exception):
+    """The platform API answered with something we can't use."""
+
+
+class NotModified(Exception):
+    """The board's job list hasn't changed since the stored validators."""
+
+
+@dataclass
+class JobRecord:
+    platform: str
+    board: str
+    external_id: str
+    title: str
+    url: str
+    location: str = ""
+    department: str = ""
+    employment_type: str = ""
+    remote: bool | None = None
+    description: str = ""
+    posted_at: datetime | None = None
+    extra: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class ValidatorStore:
+    """
+    In-process ETag / Last-Modified memory, keyed by request URL.
+
+    Stores that hit the database set ``blocking = True`` so connectors call
+    them through ``sync_to_async`` instead of from inside the event loop.
+    """
+
+    blocking = False
+
+    def __init__(self):
+        self._data: dict[str, tuple[str | None, str | None]] = {}
+
+    def get(self, url: str) -> tuple[str | None, str | None]:
+        return self._data.get(url, (None, None))
+
+    def set(self, url: str, etag: str | None, last_modified: str | None) -> None:
+        if etag or last_modified:
+            self._data[url] = (etag, last_modified)
+
+
+_default_validators = ValidatorStore()
+
+
+def parse_timestamp(value) -> datetime | None:
+    """ISO-8601 strings or epoch milliseconds → aware datetime."""
+    if value in (None, ""):
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+class BaseConnector:
+    platform: str = ""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient | None = None,
+        validators: ValidatorStore | None = None,
+        validator_key: str | None = None,
+        conditional: bool = True,
+    ):
+        self._client = client
+        self.validators = validators or _default_validators
+        self.validator_key = validator_key
+        self.conditional = conditional
+        self.fresh_validators: tuple[str, str | None, str | None] | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_async_client()
+
+    async def _call_store(self, fn, *args):
+        if getattr(self.validators, "blocking", False):
+            return await sync_to_async(fn)(*args)
+        return fn(*args)
+
+    async def get_json(self, url: str, params: dict | None = None, conditional: bool = False):
+        """GET ``url`` as JSON; with ``conditional`` send stored validators and hold the new ones."""
+        # httpx drops a URL's own query string when handed params=None
+        request_url = str(httpx.URL(url, params=params) if params else httpx.URL(url))
+        key = self.validator_key or request_url
+        headers = {"Accept": "application/json"}
+        if conditional and self.conditional:
+            etag, last_modified = await self._call_store(self.validators.get, key)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        resp = await self.client.get(request_url, headers=headers)
+        if resp.status_code == 304:
+            raise NotModified(request_url)
+        if resp.status_code >= 400:
+            raise ConnectorError(f"{self.platform}: HTTP {resp.status_code} for {request_url}")
+
+        if conditional:
+            self.fresh_validators = (key, resp.headers.get("etag"), resp.headers.get("last-modified"))
+        try:
+            return resp.json()
+        except ValueError as exc:
+            raise ConnectorError(f"{self.platform}: invalid JSON from {request_url}") from exc
+
+    def more_pages(self) -> None:
+        """A paginated board went past its first page: its validators no longer cover it."""
+        self.fresh_validators = None
+
+    def save_validators(self) -> None:
+        """Store the last collection's validators; call (from sync code) once its jobs are written."""
+        if self.fresh_validators is not None:
+            self.validators.set(*self.fresh_validators)
+
+    def jobs(self, token: str) -> AsyncIterator[JobRecord]:
+        """Yield every job on the board ``token``; raises NotModified on 304."""
+        raise NotImplementedError
@@ -0,0 +1,98 @@
+# scraper/discovery/connectors/feed.py
+
+from typing import AsyncIterator
+
+import httpx
+
+from discovery.connectors.base import BaseConnector, ConnectorError, JobRecord, ValidatorStore, parse_timestamp
+from discovery.helpers.job_feeds import OFFSET, FeedSpec, feed_total, item_fields, items_at
+
+
+class FeedStore:
+    """
+    In-process host → FeedSpec memory. ``DbFeedStore`` (discovery/models.py)
+    is the persistent one; like validator stores it sets ``blocking``.
+    """
+
+    blocking = False
+
+    def __init__(self):
+        self._data: dict[str, FeedSpec] = {}
+
+    def get(self, host: str) -> FeedSpec | None:
+        return self._data.get(host)
+
+    def set(self, spec: FeedSpec) -> None:
+        self._data[spec.host] = spec
+
+    def forget(self, host: str) -> None:
+        self._data.pop(host, None)
+
+
+_default_feeds = FeedStore()
+
+
+class FeedConnector(BaseConnector):
+    """
+    Replays a job feed captured in the browser (helpers/job_feeds.py); the
+    token is the careers site's host. Pages through the captured paging
+    parameter until a page is empty or repeats, the stated total is
+    reached, or ``max_pages``.
+    """
+
+    platform = "feed"
+    max_pages = 100
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient | None = None,
+        validators: ValidatorStore | None = None,
+        feeds: FeedStore | None = None,
+        **kwargs,
+    ):
+        super().__init__(client=client, validators=validators, **kwargs)
+        self.feeds = feeds or _default_feeds
+
+    async def _page(self, spec: FeedSpec, value: int | None, conditional: bool):
+        url, body = spec.request(value)
+        if spec.method == "GET":
+            return await self.get_json(url, conditional=conditional)
+        resp = await self.client.request(
+            spec.method, url, json=body, headers={"Accept": "application/json", **spec.headers}
+        )
+        if resp.status_code >= 400:
+            raise ConnectorError(f"feed: HTTP {resp.status_code} for {url}")
+        try:
+            return resp.json()
+        except ValueError as exc:
+            raise ConnectorError(f"feed: invalid JSON from {url}") from exc
+
+    async def jobs(self, token: str) -> AsyncIterator[JobRecord]:
+        spec = await self._call_store(self.feeds.get, token)
+        if spec is None:
+            raise ConnectorError(f"feed: no captured feed for '{token}'")
+
+        value = spec.page_start if spec.page_key else None
+        seen: set[str] = set()
+        for number in range(self.max_pages):
+            payload = await self._page(spec, value, conditional=number == 0)
+            items = items_at(payload, spec.items_path)
+            if items is None:
+                raise ConnectorError(f"feed: unexpected payload for '{token}'")
+
+            fresh = 0
+            for item in items:
+                fields = item_fields(spec, item) if isinstance(item, dict) else None
+                if fields is None or fields["url"] in seen:
+                    continue
+                seen.add(fields["url"])
+                fresh += 1
+                fields["posted_at"] = parse_timestamp(fields["posted_at"])
+                yield JobRecord(platform=self.platform, board=token, **fields)
+
+            total = feed_total(payload)
+            # A page of repeats means the endpoint ignored the paging value
+            if value is None or not fresh or (total is not None and len(seen) >= total):
+                return
+            self.more_pages()
+            value += len(items) if spec.page_kind == OFFSET else 1
@@ -0,0 +1,46 @@
+# scraper/discovery/connectors/greenhouse.py
+
+import html
+import re
+from typing import AsyncIterator
+
+from discovery.connectors.base import BaseConnector, ConnectorError, JobRecord, parse_timestamp
+
+API_URL = "https://boards-api.greenhouse.io/v1/boards/{token}/jobs"
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _plain(content: str) -> str:
+    # Greenhouse returns entity-escaped HTML in `content`
+    text = _TAG_RE.sub(" ", html.unescape(content or ""))
+    return " ".join(html.unescape(text).split())
+
+
+class GreenhouseConnector(BaseConnector):
+    """Greenhouse Job Board API; the whole board comes back in one response."""
+
+    platform = "greenhouse"
+
+    async def jobs(self, token: str) -> AsyncIterator[JobRecord]:
+        payload = await self.get_json(
+            API_URL.format(token=token), {"content": "true"}, conditional=True
+        )
+        if not isinstance(payload, dict) or "jobs" not in payload:
+            raise ConnectorError(f"greenhouse: unexpected payload for '{token}'")
+
+        for item in payload["jobs"]:
+            departments = item.get("departments") or []
+            location = (item.get("location") or {}).get("name", "") or ""
+            yield JobRecord(
+                platform=self.platform,
+                board=token,
+                external_id=str(item["id"]),
+                title=item.get("title", "").strip(),
+                url=item.get("absolute_url", ""),
+                location=location,
+                department=departments[0].get("name", "") if departments else "",
+                remote=("remote" in location.lower()) or None,
+                description=_plain(item.get("content", "")),
+                posted_at=parse_timestamp(item.get("first_published") or item.get("updated_at")),
+                extra={"requisition_id": item.get("requisition_id")},
+            )
@@ -0,0 +1,50 @@
+# scraper/discovery/connectors/lever.py
+
+from typing import AsyncIterator
+
+from discovery.connectors.base import BaseConnector, ConnectorError, JobRecord, parse_timestamp
+
+API_URL = "https://api.lever.co/v0/postings/{token}"
+
+
+class LeverConnector(BaseConnector):
+    """Lever public postings API; paginated with skip/limit."""
+
+    platform = "lever"
+    page_size = 100
+
+    async def jobs(self, token: str) -> AsyncIterator[JobRecord]:
+        skip = 0
+        while True:
+            params = {"mode": "json", "skip": skip, "limit": self.page_size}
+            page = await self.get_json(
+                API_URL.format(token=token), params, conditional=skip == 0
+            )
+            if not isinstance(page, list):
+                raise ConnectorError(f"lever: unexpected payload for '{token}'")
+
+            for item in page:
+                yield self._record(token, item)
+
+            if len(page) < self.page_size:
+                return
+            self.more_pages()
+            skip += self.page_size
+
+    def _record(self, token: str, item: dict) -> JobRecord:
+        categories = item.get("categories") or {}
+        workplace = (item.get("workplaceType") or "").lower()
+        return JobRecord(
+            platform=self.platform,
+            board=token,
+            external_id=str(item["id"]),
+            title=item.get("text", "").strip(),
+            url=item.get("hostedUrl", ""),
+            location=categories.get("location", "") or "",
+            department=categories.get("department", "") or categories.get("team", "") or "",
+            employment_type=categories.get("commitment", "") or "",
+            remote=(workplace == "remote") if workplace else None,
+            description=item.get("descriptionPlain", "") or "",
+            posted_at=parse_timestamp(item.get("createdAt")),
+            extra={"team": categories.get("team", ""), "apply_url": item.get("applyUrl", "")},
+        )
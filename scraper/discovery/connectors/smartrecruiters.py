@@ -0,0 +1,49 @@
+# scraper/discovery/connectors/smartrecruiters.py
+
+from typing import AsyncIterator
+
+from discovery.connectors.base import BaseConnector, ConnectorError, JobRecord, parse_timestamp
+
+API_URL = "https://api.smartrecruiters.com/v1/companies/{token}/postings"
+POSTING_URL = "https://jobs.smartrecruiters.com/{token}/{id}"
+
+
+class SmartRecruitersConnector(BaseConnector):
+    """SmartRecruiters Posting API; paginated with offset/limit + totalFound."""
+
+    platform = "smartrecruiters"
+    page_size = 100
+
+    async def jobs(self, token: str) -> AsyncIterator[JobRecord]:
+        offset = 0
+        while True:
+            params = {"offset": offset, "limit": self.page_size}
+            payload = await self.get_json(
+                API_URL.format(token=token), params, conditional=offset == 0
+            )
+            if not isinstance(payload, dict) or "content" not in payload:
+                raise ConnectorError(f"smartrecruiters: unexpected payload for '{token}'")
+
+            for item in payload["content"]:
+                yield self._record(token, item)
+
+            offset += len(payload["content"])
+            if not payload["content"] or offset >= payload.get("totalFound", 0):
+                return
+            self.more_pages()
+
+    def _record(self, token: str, item: dict) -> JobRecord:
+        loc = item.get("location") or {}
+        location = ", ".join(p for p in (loc.get("city"), loc.get("region"), loc.get("country")) if p)
+        return JobRecord(
+            platform=self.platform,
+            board=token,
+            external_id=str(item["id"]),
+            title=item.get("name", "").strip(),
+            url=POSTING_URL.format(token=token, id=item["id"]),
+            location=location,
+            department=(item.get("department") or {}).get("label", "") or "",
+            employment_type=(item.get("typeOfEmployment") or {}).get("label", "") or "",
+            remote=loc.get("remote"),
+            posted_at=parse_timestamp(item.get("releasedDate")),
+        )
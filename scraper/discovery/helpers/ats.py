@@ -0,0 +1,198 @@
+# scraper/discovery/helpers/ats.py
+
+"""
+Two-tier ATS (job board platform) detection.
+
+Production replacement for testscripts/helpers/job_board_detector.py, which
+runs ~18 ``re.search`` calls over the URL and the full rendered HTML.
+
+Tier 1 — URL only, no network:
+    The host is matched against a suffix table (walk labels right to left,
+    one dict lookup each), then one precompiled per-platform path pattern
+    pulls out the board token. Platform + token = *confident*: the board
+    can be handled by its platform handler without rendering anything.
+
+Tier 2 — first few KB of HTML:
+    One precompiled alternation finds embedded ATS URLs / embed markers in
+    the head of the document; URLs found there go back through tier 1.
+"""
+
+import re
+from dataclasses import dataclass
+from urllib.parse import parse_qs, urlparse
+
+HTML_SCAN_BYTES = 16 * 1024
+
+# Registrable suffix → platform (tier-1 host table)
+ATS_HOST_SUFFIXES = {
+    "greenhouse.io": "greenhouse",
+    "lever.co": "lever",
+    "myworkdayjobs.com": "workday",
+    "myworkdaysite.com": "workday",
+    "successfactors.com": "successfactors",
+    "successfactors.eu": "successfactors",
+    "smartrecruiters.com": "smartrecruiters",
+    "bamboohr.com": "bamboohr",
+    "jobvite.com": "jobvite",
+    "icims.com": "icims",
+    "ashbyhq.com": "ashby",
+}
+
+# Per platform: (host pattern, path pattern with a <token> group, board URL template)
+_BOARD_RULES = {
+    "greenhouse": (
+        re.compile(r"^(boards|job-boards)(\.eu)?\.greenhouse\.io$"),
+        re.compile(r"^/(?!embed/)(?P<token>[\w-]+)"),
+        "https://boards.greenhouse.io/{token}",
+    ),
+    "lever": (
+        re.compile(r"^jobs(\.eu)?\.lever\.co$"),
+        re.compile(r"^/(?P<token>[\w.-]+)"),
+        "https://jobs.lever.co/{token}",
+    ),
+    "ashby": (
+        re.compile(r"^jobs\.ashbyhq\.com$"),
+        re.compile(r"^/(?P<token>[^/?#]+)"),
+        "https://jobs.ashbyhq.com/{token}",
+    ),
+    "smartrecruiters": (
+        re.compile(r"^(jobs|careers)\.smartrecruiters\.com$"),
+        re.compile(r"^/(?P<token>[\w-]+)"),
+        "https://jobs.smartrecruiters.com/{token}",
+    ),
+    "workday": (
+        re.compile(r"^[\w-]+\.wd\d+\.myworkday(jobs|site)\.com$"),
+        re.compile(r"^/(?:[a-z]{2}-[A-Z]{2}/)?(?P<token>(?!wday/)[\w-]+)"),
+        "https://{host}/{token}",
+    ),
+    "bamboohr": (
+        re.compile(r"^(?P<token>[\w-]+)\.bamboohr\.com$"),
+        None,
+        "https://{token}.bamboohr.com/careers",
+    ),
+    "jobvite": (
+        re.compile(r"^jobs\.jobvite\.com$"),
+        re.compile(r"^/(?P<token>[\w-]+)"),
+        "https://jobs.jobvite.com/{token}",
+    ),
+    "icims": (
+        re.compile(r"^careers-(?P<token>[\w-]+)\.icims\.com$"),
+        None,
+        "https://careers-{token}.icims.com/jobs",
+    ),
+}
+
+# Tier 2: one alternation over the head of the document
+_ATS_URL_RE = re.compile(
+    r"https?://[^\s\"'<>]*?(?:"
+    + "|".join(re.escape(s) for s in ATS_HOST_SUFFIXES)
+    + r")[^\s\"'<>]*",
+    re.IGNORECASE,
+)
+_EMBED_MARKERS_RE = re.compile(
+    r"(?P<greenhouse>grnhse_app|greenhouse\.io/embed)"
+    r"|(?P<lever>lever-jobs-container|lever\.co/v0/postings)"
+    r"|(?P<workday>wd\d+\.myworkday)"
+    r"|(?P<smartrecruiters>smartrecruiters\.com/js)"
+    r"|(?P<ashby>ashby_embed|ashbyhq\.com/embed)",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class Detection:
+    platform: str
+    tier: int
+    url: str
+    token: str | None = None
+    board_url: str | None = None
+
+    @property
+    def confident(self) -> bool:
+        """Platform *and* board are known: safe to skip the browser."""
+        return self.token is not None
+
+
+def platform_for_host(host: str) -> str | None:
+    host = host.lower().rstrip(".")
+    labels = host.split(".")
+    # Shortest registrable suffix first: "boards.greenhouse.io" → "greenhouse.io"
+    for i in range(len(labels) - 2, -1, -1):
+        platform = ATS_HOST_SUFFIXES.get(".".join(labels[i:]))
+        if platform:
+            return platform
+    return None
+
+
+def detect_from_url(url: str) -> Detection | None:
+    """Tier 1: classify from URL/host alone."""
+    p = urlparse(url)
+    host = (p.hostname or "").lower()
+    platform = platform_for_host(host)
+    if platform is None:
+        return None
+
+    rule = _BOARD_RULES.get(platform)
+    token = None
+    if rule is not None:
+        host_re, path_re, template = rule
+        host_match = host_re.match(host)
+        if platform == "greenhouse" and p.path.startswith("/embed/"):
+            # boards.greenhouse.io/embed/job_board[/js]?for=<token>
+            token = (parse_qs(p.query).get("for") or [None])[0]
+        elif host_match:
+            if path_re is None:
+                token = host_match.group("token")
+            else:
+                path_match = path_re.match(p.path or "/")
+                if path_match:
+                    token = path_match.group("token")
+
+    if token is None:
+        return Detection(platform=platform, tier=1, url=url)
+    return Detection(
+        platform=platform,
+        tier=1,
+        url=url,
+        token=token,
+        board_url=template.format(token=token, host=host),
+    )
+
+
+def detect_from_html(html: str, url: str = "", max_bytes: int = HTML_SCAN_BYTES) -> Detection | None:
+    """
+    Tier 2: scan only the first ``max_bytes`` of HTML. Embedded board URLs
+    are re-classified by tier 1 (and stay confident if they carry a token);
+    bare embed markers give a non-confident platform guess.
+    """
+    head = html[:max_bytes]
+    fallback = None
+    for m in _ATS_URL_RE.finditer(head):
+        found = detect_from_url(m.group(0))
+        if found is None:
+            continue
+        found = Detection(found.platform, 2, url or found.url, found.token, found.board_url)
+        if found.confident:
+            return found
+        fallback = fallback or found
+    if fallback:
+        return fallback
+
+    m = _EMBED_MARKERS_RE.search(head)
+    if m:
+        return Detection(platform=m.lastgroup, tier=2, url=url)
+    return None
+
+
+def detect(url: str, html: str | None = None) -> Detection | None:
+    """Tier 1, then tier 2 if HTML is available and tier 1 wasn't confident."""
+    first = detect_from_url(url)
+    if (first is not None and first.confident) or not html:
+        return first
+    return detect_from_html(html, url) or first
+
+
+def detect_job_board(url: str, page_content: str = "") -> str:
+    """Drop-in for the prototype: platform name or 'general'."""
+    found = detect(url, page_content)
+    return found.platform if found else "general"
@@ -0,0 +1,77 @@
+# scraper/discovery/helpers/batches.py
+
+"""
+Aggregate progress for bulk discovery batches.
+
+A batch is one Redis hash (``discovery:batch:<id>``) that every chunk task
+increments as it finishes companies, so polling is a single HGETALL no
+matter how many companies or chunks the batch fans out to.
+"""
+
+import time
+
+from discovery.helpers.redis_client import get_redis
+
+BATCH_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _key(batch_id: str) -> str:
+    return f"discovery:batch:{batch_id}"
+
+
+def normalize_company_key(company: str, country: str) -> tuple[str, str]:
+    """Case/whitespace-insensitive identity used to dedupe bulk input."""
+    return (" ".join(company.split()).casefold(), " ".join(country.split()).casefold())
+
+
+def create_batch(batch_id: str, total: int, chunks: int) -> None:
+    pipe = get_redis().pipeline()
+    pipe.hset(
+        _key(batch_id),
+        mapping={
+            "total": total,
+            "chunks": chunks,
+            "created_at": int(time.time()),
+        },
+    )
+    pipe.expire(_key(batch_id), BATCH_TTL_SECONDS)
+    pipe.execute()
+
+
+def record_company(batch_id: str, ok: bool, urls_found: int = 0) -> None:
+    pipe = get_redis().pipeline()
+    pipe.hincrby(_key(batch_id), "done" if ok else "failed", 1)
+    if urls_found:
+        pipe.hincrby(_key(batch_id), "urls_found", urls_found)
+    pipe.execute()
+
+
+def record_chunk_done(batch_id: str) -> bool:
+    """Count a finished chunk; True if it was the batch's last one."""
+    pipe = get_redis().pipeline()
+    pipe.hincrby(_key(batch_id), "chunks_done", 1)
+    pipe.hget(_key(batch_id), "chunks")
+    chunks_done, chunks = pipe.execute()
+    return chunks is not None and chunks_done >= int(chunks)
+
+
+def get_batch(batch_id: str) -> dict | None:
+    raw = get_redis().hgetall(_key(batch_id))
+    if not raw:
+        return None
+
+    total = int(raw.get("total", 0))
+    done = int(raw.get("done", 0))
+    failed = int(raw.get("failed", 0))
+    return {
+        "batch_id": batch_id,
+        "status": "complete" if done + failed >= total else "running",
+        "total": total,
+        "done": done,
+        "failed": failed,
+        "pending": max(total - done - failed, 0),
+        "chunks": int(raw.get("chunks", 0)),
+        "chunks_done": int(raw.get("chunks_done", 0)),
+        "urls_found": int(raw.get("urls_found", 0)),
+        "created_at": int(raw.get("created_at", 0)),
+    }
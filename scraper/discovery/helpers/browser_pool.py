@@ -0,0 +1,309 @@
+# scraper/discovery/helpers/browser_pool.py
+
+"""
+Per-worker Playwright browser pool.
+
+One Chromium instance is launched per Celery worker process and shared by
+every task that needs a page. Callers borrow an isolated browser context:
+
+    with get_browser_pool().page() as page:
+        page.goto(url)
+
+• Contexts are capped by a semaphore (``BROWSER_POOL_MAX_CONTEXTS``).
+• The browser is recycled after ``BROWSER_POOL_MAX_PAGES`` pages or when the
+  worker's process tree (Python + driver + Chromium) exceeds
+  ``BROWSER_POOL_MAX_RSS_MB``. RSS is sampled every
+  ``BROWSER_POOL_RSS_CHECK_PAGES`` pages or ``BROWSER_POOL_RSS_CHECK_SECONDS``,
+  not on every context close.
+• Every context gets a render profile (helpers/render_profiles.py) that
+  aborts images, fonts, media, CSS and tracker requests by default.
+• ``start_browser_pool`` / ``stop_browser_pool`` are hooked to the Celery
+  worker process signals in ``discovery.tasks``.
+
+The sync Playwright API is bound to the thread that started it, so the pool
+is meant for prefork / solo workers where tasks run on the main thread.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from playwright.sync_api import sync_playwright
+
+from discovery.helpers.metrics import BROWSER_CONTEXTS_IN_FLIGHT, stage
+from discovery.helpers.render_profiles import apply_profile, render_stats
+
+logger = logging.getLogger("scraper")
+
+
+# ── helper: resident memory of this process and its children ───
+def _read_status(pid: int) -> tuple[int | None, int] | None:
+    """(PPid, VmRSS in kB) from /proc/<pid>/status; None if it's gone."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as fh:
+            ppid, rss = None, 0
+            for line in fh:
+                if line.startswith("PPid:"):
+                    ppid = int(line.split()[1])
+                elif line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    return ppid, rss
+
+
+class _ProcessTree:
+    """
+    This process and its descendants. Chromium runs as grandchildren of the
+    worker via the Playwright driver, so their RSS is what actually grows.
+    Finding them means walking all of /proc; that walk is cached for
+    ``rescan_seconds`` (or until a cached pid exits, or ``invalidate()``),
+    and in between only the known pids' status files are read.
+    """
+
+    def __init__(self, rescan_seconds: float = 300.0):
+        self.rescan_seconds = rescan_seconds
+        self._pids: list[int] = []
+        self._root: int | None = None
+        self._scanned_at: float | None = None
+
+    def invalidate(self) -> None:
+        self._scanned_at = None
+
+    def _scan(self) -> None:
+        self._root = os.getpid()
+        self._scanned_at = time.monotonic()
+        self._pids = [self._root]
+        try:
+            pids = [int(d) for d in os.listdir("/proc") if d.isdigit()]
+        except OSError:
+            return
+        children: dict[int, list[int]] = {}
+        for pid in pids:
+            status = _read_status(pid)
+            if status is not None and status[0] is not None:
+                children.setdefault(status[0], []).append(pid)
+        stack = list(children.get(self._root, ()))
+        while stack:
+            pid = stack.pop()
+            self._pids.append(pid)
+            stack.extend(children.get(pid, ()))
+
+    def rss_mb(self) -> float:
+        """Summed VmRSS of the tree; 0.0 where /proc is unavailable."""
+        stale = self._scanned_at is None or time.monotonic() - self._scanned_at >= self.rescan_seconds
+        if stale or self._root != os.getpid():
+            self._scan()
+        total = 0
+        for pid in self._pids:
+            status = _read_status(pid)
+            if status is None:
+                self.invalidate()  # tree changed; rescan next time
+                continue
+            total += status[1]
+        return total / 1024
+
+
+class BrowserPool:
+    """Lazily-launched, recyclable Chromium shared by one worker process."""
+
+    def __init__(
+        self,
+        max_contexts: int = 4,
+        max_pages: int = 200,
+        max_rss_mb: float = 1500,
+        headless: bool = True,
+        rss_check_pages: int = 20,
+        rss_check_seconds: float = 30.0,
+    ):
+        self.max_contexts = max_contexts
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self.rss_check_pages = rss_check_pages
+        self.rss_check_seconds = rss_check_seconds
+
+        self._slots = threading.BoundedSemaphore(max_contexts)
+        self._lock = threading.RLock()
+        self._playwright = None
+        self._browser = None
+        self._pages_served = 0
+        self._active = 0
+        self._recycle_pending = False
+        self._tree = _ProcessTree()
+        self._rss_checked_pages = 0
+        self._rss_checked_at = time.monotonic()
+
+    # ── lifecycle ───────────────────────────────────────────────
+    def start(self) -> None:
+        with self._lock:
+            if self._browser is not None:
+                return
+            if self._playwright is None:
+                self._playwright = sync_playwright().start()
+            with stage("browser_launch"):
+                self._browser = self._playwright.chromium.launch(headless=self.headless)
+            self._pages_served = 0
+            self._rss_checked_pages = 0
+            self._recycle_pending = False
+            self._tree.invalidate()  # new Chromium, new pids
+            logger.info("[browser_pool] Chromium launched (pid=%s)", os.getpid())
+
+    def _close_browser(self) -> None:
+        if self._browser is None:
+            return
+        try:
+            self._browser.close()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("[browser_pool] Error closing browser: %s", exc)
+        self._browser = None
+
+    def stop(self) -> None:
+        with self._lock:
+            self._close_browser()
+            if self._playwright is not None:
+                try:
+                    self._playwright.stop()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("[browser_pool] Error stopping playwright: %s", exc)
+                self._playwright = None
+            logger.info("[browser_pool] Shut down (pid=%s)", os.getpid())
+
+    def _should_recycle(self) -> bool:
+        if self.max_pages and self._pages_served >= self.max_pages:
+            logger.info(
+                "[browser_pool] Recycling after %d pages", self._pages_served
+            )
+            return True
+        if self.max_rss_mb and self._rss_due():
+            rss = self._tree.rss_mb()
+            if rss > self.max_rss_mb:
+                logger.info(
+                    "[browser_pool] Recycling at %.0f MB RSS (limit %.0f MB)",
+                    rss,
+                    self.max_rss_mb,
+                )
+                return True
+        return False
+
+    def _rss_due(self) -> bool:
+        now = time.monotonic()
+        if (
+            self._pages_served - self._rss_checked_pages < self.rss_check_pages
+            and now - self._rss_checked_at < self.rss_check_seconds
+        ):
+            return False
+        self._rss_checked_pages = self._pages_served
+        self._rss_checked_at = now
+        return True
+
+    def _maybe_recycle(self) -> None:
+        # Only restart Chromium once no context is borrowed from it.
+        if self._recycle_pending and self._active == 0:
+            self._close_browser()
+            self.start()
+
+    # ── borrowing ───────────────────────────────────────────────
+    @contextmanager
+    def context(self, profile: str | None = None, **context_kwargs):
+        """
+        Yield a fresh, isolated BrowserContext; closed on exit. ``profile``
+        picks its render profile (helpers/render_profiles.py); default
+        ``RENDER_PROFILE_DEFAULT``.
+        """
+        self._slots.acquire()
+        try:
+            with self._lock:
+                self._maybe_recycle()
+                if self._browser is None or not self._browser.is_connected():
+                    self._browser = None
+                    self.start()
+                ctx = self._browser.new_context(**context_kwargs)
+                self._active += 1
+            try:
+                apply_profile(ctx, profile)
+            except Exception:
+                ctx.close()
+                with self._lock:
+                    self._active -= 1
+                raise
+            try:
+                with BROWSER_CONTEXTS_IN_FLIGHT.track_inprogress():
+                    yield ctx
+            finally:
+                opened = len(ctx.pages) or 1
+                try:
+                    ctx.close()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("[browser_pool] Error closing context: %s", exc)
+                with self._lock:
+                    self._active -= 1
+                    self._pages_served += opened
+                    if not self._recycle_pending and self._should_recycle():
+                        self._recycle_pending = True
+                    self._maybe_recycle()
+                render_stats.flush()
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def page(self, profile: str | None = None, **context_kwargs):
+        """Shortcut: a single page inside its own fresh context."""
+        with self.context(profile, **context_kwargs) as ctx:
+            yield ctx.new_page()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._browser is not None,
+            "pages_served": self._pages_served,
+            "active_contexts": self._active,
+            "max_contexts": self.max_contexts,
+        }
+
+
+# ── per-process singleton ───────────────────────────────────────
+_pool: BrowserPool | None = None
+_pool_pid: int | None = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Return this process's pool, creating it on first use. A pool inherited
+    across fork is discarded: Playwright connections don't survive fork.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = BrowserPool(
+            max_contexts=getattr(settings, "BROWSER_POOL_MAX_CONTEXTS", 4),
+            max_pages=getattr(settings, "BROWSER_POOL_MAX_PAGES", 200),
+            max_rss_mb=getattr(settings, "BROWSER_POOL_MAX_RSS_MB", 1500),
+            headless=getattr(settings, "BROWSER_POOL_HEADLESS", True),
+            rss_check_pages=getattr(settings, "BROWSER_POOL_RSS_CHECK_PAGES", 20),
+            rss_check_seconds=getattr(settings, "BROWSER_POOL_RSS_CHECK_SECONDS", 30.0),
+        )
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def start_browser_pool(**_kwargs) -> None:
+    """Celery ``worker_process_init`` hook: launch Chromium up front."""
+    try:
+        get_browser_pool().start()
+    except Exception as exc:  # noqa: BLE001
+        # Don't kill the worker; the pool retries lazily on first use.
+        logger.error("[browser_pool] Eager launch failed: %s", exc)
+
+
+def stop_browser_pool(**_kwargs) -> None:
+    """Celery ``worker_process_shutdown`` hook (also registered atexit)."""
+    global _pool
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.stop()
+        _pool = None
+
+
+atexit.register(stop_browser_pool)
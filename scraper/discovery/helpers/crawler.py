@@ -0,0 +1,279 @@
+# scraper/discovery/helpers/crawler.py
+
+"""
+Stage-2 career-page crawler (production version of the crawl4ai prototype
+in testscripts/test_crawl4ai.py).
+
+• Async BFS frontier, depth-bounded, page-budgeted (max_depth=3,
+  max_pages=50 like the prototype).
+• Visited set keyed by ``normalize_url`` so www/slash/query/fragment
+  variants are fetched once; a redirect's final URL is marked visited too.
+• A fetch never raises: any failure comes back as a page with ``error``
+  set, so one bad URL can't take a worker down.
+• Global and per-host concurrency limits, plus politeness
+  (helpers/politeness.py): per-host token buckets, robots.txt / Crawl-delay
+  and 429/503 backoff. The frontier is kept per host and workers always
+  pick a host that is ready *now*, so a throttled host never stalls the
+  others.
+• Results are streamed: ``crawl()`` is an async generator yielding each
+  page as soon as it is fetched, and nothing is retained after it is
+  yielded.
+• Early stop: once a page is confirmed as a listings page, no new fetches
+  are started (``stop_on_listings``).
+"""
+
+import asyncio
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable
+from urllib.parse import urljoin, urldefrag
+
+import httpx
+from lxml import etree, html as lxml_html
+
+from discovery.helpers.ats import Detection, detect, platform_for_host
+from discovery.helpers.http_client import get_async_client
+from discovery.helpers.politeness import (
+    BACKOFF_STATUSES,
+    PolitenessScheduler,
+    get_politeness_scheduler,
+)
+from discovery.helpers.urls import canonical_job_url, normalize_url, url_host
+
+logger = logging.getLogger("scraper")
+
+# Same intent as the prototype's URLPatternFilter
+CAREER_PATH_RE = re.compile(
+    r"career|jobs?\b|vacanc|opening|position|search-results|join-us|work-with-us",
+    re.IGNORECASE,
+)
+# Links that point at an individual posting
+JOB_LINK_RE = re.compile(
+    r"/(jobs?|positions?|openings?|postings?|vacanc(y|ies)|requisitions?)/[^/?#]+"
+    r"|/job/|[?&](gh_jid|jobid|job_id|jid)=",
+    re.IGNORECASE,
+)
+LISTINGS_MIN_JOB_LINKS = 5
+
+
+@dataclass
+class CrawledPage:
+    url: str
+    depth: int
+    status: int
+    html: str = ""
+    job_links: int = 0
+    is_listings: bool = False
+    error: str | None = None
+    ats: Detection | None = None
+    links: list[str] = field(default_factory=list)
+
+
+def extract_links(base_url: str, body: str) -> list[str]:
+    """Absolute, fragment-free http(s) hrefs in document order."""
+    try:
+        tree = lxml_html.fromstring(body)
+    except (ValueError, etree.ParserError):
+        return []
+    out = []
+    for href in tree.xpath("//a/@href"):
+        href = href.strip()
+        if not href or href.startswith(("#", "mailto:", "tel:", "javascript:")):
+            continue
+        absolute, _ = urldefrag(urljoin(base_url, href))
+        if absolute.startswith(("http://", "https://")):
+            out.append(absolute)
+    return out
+
+
+def count_job_links(links: Iterable[str]) -> int:
+    """Distinct postings linked; ``?gh_jid=1`` and ``?gh_jid=2`` on one path are two."""
+    return len({canonical_job_url(u) for u in links if JOB_LINK_RE.search(u)})
+
+
+class CareerCrawler:
+    def __init__(
+        self,
+        max_depth: int = 3,
+        max_pages: int = 50,
+        max_concurrency: int = 8,
+        per_host_concurrency: int = 2,
+        max_retries: int = 1,
+        stop_on_listings: bool = True,
+        client: httpx.AsyncClient | None = None,
+        scheduler: PolitenessScheduler | None = None,
+    ):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.max_retries = max_retries
+        self.stop_on_listings = stop_on_listings
+        self._client = client
+        self.scheduler = scheduler or get_politeness_scheduler()
+
+    # ── frontier policy ─────────────────────────────────────────
+    def _should_follow(self, url: str, allowed_hosts: set[str]) -> bool:
+        host = url_host(url)
+        if host in allowed_hosts:
+            return bool(CAREER_PATH_RE.search(url))
+        # Hand-offs to a hosted ATS board are always worth one hop
+        return platform_for_host(host) is not None
+
+    # ── fetch ───────────────────────────────────────────────────
+    async def _fetch(self, url: str, depth: int) -> CrawledPage:
+        try:
+            return await self._fetch_page(url, depth)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("[crawler] %s failed: %s", url, exc)
+            return CrawledPage(url=url, depth=depth, status=0, error=str(exc) or type(exc).__name__)
+
+    async def _fetch_page(self, url: str, depth: int) -> CrawledPage:
+        client = self._client or get_async_client()
+        if not await self.scheduler.allowed(url):
+            return CrawledPage(url=url, depth=depth, status=0, error="robots.txt")
+        try:
+            resp = await client.get(url)
+        except httpx.HTTPError as exc:
+            return CrawledPage(url=url, depth=depth, status=0, error=str(exc))
+        self.scheduler.record_response(
+            url, resp.status_code, resp.headers.get("retry-after")
+        )
+
+        ctype = resp.headers.get("content-type", "")
+        if resp.status_code >= 400 or "html" not in ctype:
+            return CrawledPage(url=str(resp.url), depth=depth, status=resp.status_code)
+
+        body = resp.text
+        final_url = str(resp.url)
+        links = extract_links(final_url, body)
+        job_links = count_job_links(links)
+        # A hosted or embedded ATS board is a listings page by definition
+        ats = detect(final_url, body)
+        return CrawledPage(
+            url=final_url,
+            depth=depth,
+            status=resp.status_code,
+            html=body,
+            job_links=job_links,
+            is_listings=job_links >= LISTINGS_MIN_JOB_LINKS or bool(ats and ats.confident),
+            ats=ats,
+            links=links,
+        )
+
+    # ── BFS ─────────────────────────────────────────────────────
+    async def crawl(self, start_urls: Iterable[str]) -> AsyncIterator[CrawledPage]:
+        """
+        Yield pages as they are fetched. Breaking out of the ``async for``
+        cancels all in-flight fetches.
+        """
+        pending: dict[str, deque] = {}  # host → FIFO of (url, depth, attempt)
+        in_flight: dict[str, int] = {}  # host → fetches running
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrency)
+        changed = asyncio.Condition()
+        visited: set[str] = set()
+        allowed_hosts: set[str] = set()
+        state = {"scheduled": 0, "running": 0, "stop": False}
+
+        def enqueue(url: str, depth: int) -> None:
+            key = normalize_url(url)
+            if key in visited or state["scheduled"] >= self.max_pages:
+                return
+            visited.add(key)
+            state["scheduled"] += 1
+            pending.setdefault(url_host(url), deque()).append((url, depth, 0))
+
+        def pick():
+            """Oldest URL of a host that is ready now, else seconds to wait."""
+            wait = None
+            for host, queue in pending.items():
+                if not queue or in_flight.get(host, 0) >= self.per_host_concurrency:
+                    continue
+                delay = self.scheduler.ready_in(host)
+                if delay <= 0:
+                    return queue.popleft(), None
+                wait = delay if wait is None else min(wait, delay)
+            return None, wait
+
+        for u in start_urls:
+            allowed_hosts.add(url_host(u))
+            enqueue(u, 0)
+
+        async def worker() -> None:
+            while True:
+                async with changed:
+                    while True:
+                        drained = not any(pending.values()) and state["running"] == 0
+                        if state["stop"] or drained:
+                            changed.notify_all()
+                            return
+                        item, wait = pick()
+                        if item is not None:
+                            break
+                        try:
+                            await asyncio.wait_for(changed.wait(), timeout=wait)
+                        except asyncio.TimeoutError:
+                            pass
+                    url, depth, attempt = item
+                    host = url_host(url)
+                    self.scheduler.reserve(url)
+                    in_flight[host] = in_flight.get(host, 0) + 1
+                    state["running"] += 1
+
+                page = None
+                try:
+                    page = await self._fetch(url, depth)
+                finally:
+                    # Release the slot and grow the frontier atomically, so no
+                    # worker sees an empty frontier in between and quits early.
+                    async with changed:
+                        in_flight[host] -= 1
+                        state["running"] -= 1
+                        retry = (
+                            page is not None
+                            and page.status in BACKOFF_STATUSES
+                            and attempt < self.max_retries
+                        )
+                        if retry:
+                            # Host asked us to slow down: requeue behind its backoff
+                            pending[host].append((url, depth, attempt + 1))
+                        elif page is not None:
+                            # Redirect target: don't fetch it again under its own URL
+                            visited.add(normalize_url(page.url))
+                            if page.is_listings and self.stop_on_listings:
+                                state["stop"] = True
+                            if not state["stop"] and depth < self.max_depth:
+                                for link in page.links:
+                                    if self._should_follow(link, allowed_hosts):
+                                        enqueue(link, depth + 1)
+                        changed.notify_all()
+                if not retry:
+                    await results.put(page)
+
+        async def closer() -> None:
+            for outcome in await asyncio.gather(*workers, return_exceptions=True):
+                if isinstance(outcome, Exception):
+                    logger.warning("[crawler] Worker failed: %s", outcome)
+            await results.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.max_concurrency)]
+        tasks = workers + [asyncio.create_task(closer())]
+        try:
+            while True:
+                page = await results.get()
+                if page is None:
+                    break
+                logger.debug(
+                    "[crawler] depth=%d status=%s job_links=%d %s",
+                    page.depth,
+                    page.status,
+                    page.job_links,
+                    page.url,
+                )
+                yield page
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,222 @@
+# scraper/discovery/helpers/dom_chunker.py
+
+"""
+DOM-aware chunking of careers pages for the embedding and LLM stages.
+
+``chunk_text(visible_text(html))`` wraps every character a page shows:
+nav bars, cookie banners and footers become model input, and fixed-width
+cuts split job cards in half. ``iter_dom_chunks`` works on the parsed
+tree instead:
+
+• Boilerplate regions are dropped before any text is read: nav, aside,
+  dialogs, form controls, hidden elements, landmark roles (navigation,
+  banner, contentinfo, dialog), page-level header/footer, and class/id
+  names like "cookie", "consent", "newsletter", "navbar". Headers and
+  class matches inside an article, section or card (``card-header``
+  holding a job title) are content and stay; so do <main>/<article> and
+  anything containing them. Forms stay too: some frameworks wrap the whole
+  page in one.
+• The rest is cut into units along block elements. When an element has
+  three or more children of the same shape (tag + classes, e.g. a list of
+  ``li.job-card`` or table rows), each child is one unit, so a job card
+  is never split. Units are packed into chunks of up to ``max_chars``; only
+  a unit longer than that is wrapped.
+• With a ``TemplateMemory``, units already seen on ``min_pages`` earlier
+  pages of the same host (site-wide promos, "Life at Acme" blurbs the
+  region rules miss) are skipped, so a crawl doesn't embed the site's
+  template once per page.
+
+Chunks are yielded lazily; ``islice(iter_dom_chunks(...), n)`` stops
+parsing work as soon as n chunks exist.
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Iterator
+
+from lxml import etree, html as lxml_html
+
+from discovery.helpers.fingerprints import chunk_text
+from discovery.helpers.urls import url_host
+
+MIN_REPEAT = 3
+_WS_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w")
+_DROP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "iframe", "canvas",
+    "nav", "aside", "dialog", "button", "select", "textarea",
+}
+# Only landmarks (banner/contentinfo) when not inside sectioning content
+_LANDMARK_TAGS = {"header", "footer"}
+_SECTIONING = {"article", "aside", "main", "nav", "section"}
+# Class/id matches inside these are part of the content (card-header, job-share)
+_CONTENT_ANCESTORS = {"article", "li", "tr", "td"}
+_DROP_ROLES = {"navigation", "banner", "contentinfo", "dialog", "alertdialog", "menu", "menubar"}
+_BOILERPLATE_RE = re.compile(
+    r"cookie|consent|gdpr|onetrust|newsletter|subscribe|breadcrumb|skip-?(link|nav)|"
+    r"social|share|(^|[-_ ])(nav|navbar|menu|footer|header|masthead|sidebar|modal|popup|banner)([-_ ]|$)",
+    re.I,
+)
+_KEEP_TAGS = {"html", "body", "main", "article"}
+_BLOCK_TAGS = {
+    "address", "article", "blockquote", "body", "dd", "details", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li",
+    "main", "ol", "p", "pre", "section", "summary", "table", "tbody", "td", "tfoot", "th",
+    "thead", "tr", "ul",
+}
+_HIDDEN_STYLE_RE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.I)
+
+
+def _collapse(text: str) -> str:
+    return _WS_RE.sub(" ", text).strip()
+
+
+def _text(el) -> str:
+    return _collapse(" ".join(el.itertext()))
+
+
+def _is_boilerplate(el) -> bool:
+    if el.tag in _KEEP_TAGS:
+        return False
+    if el.tag in _DROP_TAGS:
+        return True
+    if el.tag in _LANDMARK_TAGS:
+        return not any(a.tag in _SECTIONING for a in el.iterancestors())
+    attrs = el.attrib
+    if "hidden" in attrs or attrs.get("aria-hidden") == "true":
+        return True
+    if attrs.get("role", "").lower() in _DROP_ROLES:
+        return True
+    if _HIDDEN_STYLE_RE.search(attrs.get("style", "")):
+        return True
+    names = f"{attrs.get('class', '')} {attrs.get('id', '')}"
+    if names.strip() and _BOILERPLATE_RE.search(names):
+        if any(a.tag in _CONTENT_ANCESTORS for a in el.iterancestors()):
+            return False
+        # A wrapper called "page-header-layout" can hold the whole page
+        return el.find(".//main") is None and el.find(".//article") is None
+    return False
+
+
+def _strip_boilerplate(tree) -> None:
+    doomed = [el for el in tree.iter() if isinstance(el.tag, str) and _is_boilerplate(el)]
+    for el in doomed:
+        if el.getparent() is not None:
+            el.drop_tree()  # keeps the element's tail text
+
+
+def _shape(el) -> tuple:
+    classes = tuple(sorted(c for c in el.get("class", "").split() if not any(ch.isdigit() for ch in c)))
+    return el.tag, classes
+
+
+def _is_block(el) -> bool:
+    return el.tag in _BLOCK_TAGS or any(isinstance(c.tag, str) and c.tag in _BLOCK_TAGS for c in el)
+
+
+def _units(el) -> Iterator[str]:
+    """Text units under ``el`` in document order; repeated-shape children are one unit each."""
+    children = [c for c in el if isinstance(c.tag, str)]
+    counts: dict[tuple, int] = {}
+    for child in children:
+        counts[_shape(child)] = counts.get(_shape(child), 0) + 1
+    repeated = {shape for shape, n in counts.items() if n >= MIN_REPEAT}
+
+    inline = [el.text or ""]
+    for child in children:
+        if _shape(child) in repeated or _is_block(child):
+            text = _collapse(" ".join(inline))
+            if text:
+                yield text
+            inline = []
+            if _shape(child) in repeated:
+                yield _text(child)
+            else:
+                yield from _units(child)
+        else:
+            inline.append(_text(child))
+        inline.append(child.tail or "")
+    text = _collapse(" ".join(inline))
+    if text:
+        yield text
+
+
+class TemplateMemory:
+    """
+    Per-host record of unit fingerprints across a crawl's pages. A unit
+    that appeared on ``min_pages`` earlier pages of the same host is
+    treated as template. Bounded: ``max_hosts`` hosts (LRU), at most
+    ``max_units`` fingerprints each.
+    """
+
+    def __init__(self, min_pages: int = 2, max_hosts: int = 256, max_units: int = 20_000):
+        self.min_pages = min_pages
+        self.max_hosts = max_hosts
+        self.max_units = max_units
+        self._hosts: OrderedDict[str, dict[bytes, int]] = OrderedDict()
+        self.skipped = 0
+
+    def host(self, url: str) -> dict[bytes, int]:
+        key = url_host(url)
+        counts = self._hosts.pop(key, None)
+        if counts is None:
+            counts = {}
+            if len(self._hosts) >= self.max_hosts:
+                self._hosts.popitem(last=False)
+        self._hosts[key] = counts
+        return counts
+
+    def seen_before(self, counts: dict[bytes, int], unit: str) -> bool:
+        """Count ``unit`` for this page; True if it's template (seen on enough earlier pages)."""
+        digest = hashlib.blake2b(unit.casefold().encode("utf-8"), digest_size=12).digest()
+        pages = counts.get(digest, 0)
+        if pages >= self.min_pages:
+            self.skipped += 1
+            return True
+        if pages or len(counts) < self.max_units:
+            counts[digest] = pages + 1
+        return False
+
+
+def iter_dom_chunks(
+    body: str,
+    max_chars: int = 2000,
+    url: str | None = None,
+    templates: TemplateMemory | None = None,
+) -> Iterator[str]:
+    """
+    Lazily yield boilerplate-free chunks of at most ``max_chars`` (units
+    joined by newlines) from an HTML page. ``url`` + ``templates`` enable
+    cross-page template dedupe for that URL's host.
+    """
+    try:
+        tree = lxml_html.fromstring(body)
+    except (ValueError, etree.ParserError):
+        yield from chunk_text(_collapse(body), max_chars)
+        return
+    _strip_boilerplate(tree)
+    counts = templates.host(url) if templates is not None and url else None
+
+    buf: list[str] = []
+    size = 0
+    page_units: set[str] = set()
+    for unit in _units(tree):
+        if not _WORD_RE.search(unit) or unit in page_units:
+            continue
+        page_units.add(unit)
+        if counts is not None and templates.seen_before(counts, unit):
+            continue
+        if len(unit) > max_chars:
+            if buf:
+                yield "\n".join(buf)
+                buf, size = [], 0
+            yield from chunk_text(unit, max_chars)
+            continue
+        if buf and size + 1 + len(unit) > max_chars:
+            yield "\n".join(buf)
+            buf, size = [], 0
+        buf.append(unit)
+        size += len(unit) + (1 if size else 0)
+    if buf:
+        yield "\n".join(buf)
@@ -0,0 +1,238 @@
+# scraper/discovery/helpers/embeddings.py
+
+"""
+Long-lived embedding service for career-page ranking (production version of
+``buildEmbeddingIndex`` / ``queryChunks`` in testscripts/test_crawl4ai.py).
+
+• The SentenceTransformer model is loaded once per worker process (lazily,
+  or eagerly on ``worker_process_init`` when ``EMBEDDING_PRELOAD`` is set).
+• Vectors are cached on disk in SQLite, keyed by model + SHA-256 of the
+  chunk text, so a chunk seen for any company is never encoded twice —
+  across tasks, restarts and worker processes.
+• ``rank_many`` takes ranking jobs for several companies at once: every
+  uncached chunk of every job goes through one batched ``encode`` call.
+• Embeddings are L2-normalized float32, so cosine similarity is one
+  matrix-vector product and top-k is ``argpartition`` (no torch tensors).
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger("scraper")
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+# Bound parameters per SELECT … IN (…) (SQLite default limit is 999)
+LOOKUP_CHUNK = 900
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ── on-disk vector cache ────────────────────────────────────────
+class EmbeddingCache:
+    """
+    SQLite table (model, key) → float32 vector bytes. WAL mode so several
+    worker processes can read while one writes; one connection per process.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, key TEXT NOT NULL, dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL, PRIMARY KEY (model, key))"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get_many(self, model: str, keys: list[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(keys), LOOKUP_CHUNK):
+                part = keys[i:i + LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN "
+                    f"({','.join('?' * len(part))})",
+                    [model, *part],
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, items: dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, key, dim, vector) VALUES (?, ?, ?, ?)",
+                    [
+                        (model, key, vec.shape[0], np.asarray(vec, dtype=np.float32).tobytes())
+                        for key, vec in items.items()
+                    ],
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+@dataclass
+class RankJob:
+    """One ranking request: which of ``texts`` best match ``query``."""
+
+    query: str
+    texts: list[str]
+    k: int = 10
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        batch_size: int = 64,
+        cache: EmbeddingCache | None = None,
+        model=None,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache = cache
+        self._model = model
+        self._model_lock = threading.Lock()
+        self.stats = {"requested": 0, "cache_hits": 0, "encoded": 0}
+
+    # ── model ───────────────────────────────────────────────────
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    logger.info("[embeddings] Loading model %s (pid %d)", self.model_name, os.getpid())
+                    self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def _encode_uncached(self, texts: list[str]) -> np.ndarray:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+    # ── encoding ────────────────────────────────────────────────
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """
+        (len(texts), dim) matrix of normalized embeddings. Duplicate texts
+        are encoded once; cached ones are not encoded at all.
+        """
+        keys = [text_key(t) for t in texts]
+        unique: dict[str, str] = dict(zip(keys, texts))
+        self.stats["requested"] += len(unique)
+
+        vectors = self.cache.get_many(self.model_name, list(unique)) if self.cache else {}
+        self.stats["cache_hits"] += len(vectors)
+
+        missing = [k for k in unique if k not in vectors]
+        if missing:
+            encoded = self._encode_uncached([unique[k] for k in missing])
+            fresh = dict(zip(missing, encoded))
+            if self.cache is not None:
+                self.cache.put_many(self.model_name, fresh)
+            vectors.update(fresh)
+            self.stats["encoded"] += len(missing)
+            logger.debug(
+                "[embeddings] Encoded %d new chunk(s), %d from cache",
+                len(missing),
+                len(unique) - len(missing),
+            )
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[k] for k in keys])
+
+    # ── ranking ─────────────────────────────────────────────────
+    @staticmethod
+    def top_k(query_vec: np.ndarray, matrix: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Indices and cosine scores of the ``k`` best rows, best first."""
+        if matrix.shape[0] == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = matrix @ query_vec
+        k = min(k, scores.shape[0])
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx])]
+        return idx, scores[idx]
+
+    def encode_jobs(self, jobs: list[RankJob]) -> list[tuple[np.ndarray, np.ndarray]]:
+        """(query vector, text matrix) per job, from one batched encode."""
+        matrix = self.encode([q for job in jobs for q in (job.query, *job.texts)])
+        out = []
+        offset = 0
+        for job in jobs:
+            out.append((matrix[offset], matrix[offset + 1: offset + 1 + len(job.texts)]))
+            offset += 1 + len(job.texts)
+        return out
+
+    def rank_many(self, jobs: list[RankJob]) -> list[list[tuple[int, float]]]:
+        """
+        Rank several jobs with one batched encode over all of their texts
+        and queries. Returns, per job, [(text index, score), …] best first.
+        """
+        out = []
+        for job, (query_vec, rows) in zip(jobs, self.encode_jobs(jobs)):
+            idx, scores = self.top_k(query_vec, rows, job.k)
+            out.append([(int(i), float(s)) for i, s in zip(idx, scores)])
+        return out
+
+    def rank(self, query: str, texts: list[str], k: int = 10) -> list[tuple[int, float]]:
+        return self.rank_many([RankJob(query, texts, k)])[0]
+
+
+# ── per-process singleton ───────────────────────────────────────
+_service: EmbeddingService | None = None
+_service_pid: int | None = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    global _service, _service_pid
+    if _service is None or _service_pid != os.getpid():
+        cache_path = getattr(settings, "EMBEDDING_CACHE_PATH", None)
+        _service = EmbeddingService(
+            model_name=getattr(settings, "EMBEDDING_MODEL", DEFAULT_MODEL),
+            batch_size=getattr(settings, "EMBEDDING_BATCH_SIZE", 64),
+            cache=EmbeddingCache(cache_path) if cache_path else None,
+        )
+        _service_pid = os.getpid()
+    return _service
+
+
+def preload_embedding_service(**_kwargs) -> None:
+    """worker_process_init hook: pay the model load before the first task."""
+    if getattr(settings, "EMBEDDING_PRELOAD", False):
+        get_embedding_service().model
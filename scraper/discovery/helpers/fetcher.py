@@ -0,0 +1,434 @@
+# scraper/discovery/helpers/fetcher.py
+
+"""
+Tiered page fetcher: plain HTTP first, headless Chromium only when needed.
+
+• Tier ``"http"`` — GET on the pooled async client (helpers/http_client.py),
+  rate-limited per host by the politeness scheduler. The body is kept only
+  if it has meaningful content (``looks_rendered``: job links, or enough
+  non-empty anchors and visible text, and no "enable JavaScript" shell);
+  callers can pass their own ``accept`` check instead. Only pages that fail
+  that check, or bot walls (403/429/503), go on to the browser; 404s, DNS
+  failures and the like come back as HTTP errors.
+• Tier ``"browser"`` — the shared Playwright pool (helpers/browser_pool.py)
+  with the host's render profile, for JS-dependent pages only. With
+  ``capture_feeds`` the tab also records the page's JSON XHR/fetch
+  responses and pages through "load more" (helpers/job_feeds.py); they
+  land in ``FetchResult.feeds``.
+• Per-domain memory: the tier that worked for a host is remembered in Redis
+  for ``FETCH_TIER_TTL_SECONDS``, so JS-only hosts go straight to the
+  browser and server-rendered ones never open a tab. When the TTL runs out
+  the host gets one more HTTP try. Falls back to a per-process dict when
+  Redis is unreachable.
+
+Like the browser paths it replaces, the fetcher does not consult
+robots.txt; the crawler (helpers/crawler.py) does.
+
+Redis layout:
+    discovery:fetch:tier:<host>   "http" | "browser", SETEX'd with the TTL
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+import httpx
+import redis
+from django.conf import settings
+from lxml import etree, html as lxml_html
+
+from discovery.helpers.browser_pool import get_browser_pool
+from discovery.helpers.crawler import count_job_links, extract_links
+from discovery.helpers.http_client import get_async_client, run_async
+from discovery.helpers.job_feeds import finish_capture, load_more, start_capture
+from discovery.helpers.metrics import FETCHES, stage
+from discovery.helpers.politeness import PolitenessScheduler, get_politeness_scheduler
+from discovery.helpers.redis_client import get_redis
+from discovery.helpers.render_profiles import profile_for_url
+from discovery.helpers.urls import url_host
+
+logger = logging.getLogger("scraper")
+
+HTTP, BROWSER = "http", "browser"
+HOST_BUSY = "host backing off"  # FetchResult.error when politeness skipped the URL
+ESCALATE_STATUSES = (403, 429, 503)  # HTTP errors a real browser may get past
+_TIER_PREFIX = "discovery:fetch:tier:"
+_REDIS_RETRY_SECONDS = 30
+BROWSER_GOTO_TIMEOUT_MS = 30_000
+BROWSER_SELECTOR_TIMEOUT_MS = 10_000
+
+_JS_SHELL_RE = re.compile(
+    r"(enable|requires?|turn on|need to enable)\s+javascript|javascript\s+(is\s+)?(required|disabled)",
+    re.IGNORECASE,
+)
+_APP_ROOT_IDS = {"root", "app", "__next", "__nuxt", "main-app"}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    final_url: str = ""
+    status: int = 0
+    html: str = ""
+    tier: str = ""
+    error: str | None = None
+    data: Any = None  # what ``in_page`` returned, browser tier only
+    feeds: list = field(default_factory=list)  # CapturedResponses, browser tier with capture_feeds
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and (bool(self.html) or self.data is not None)
+
+
+# ── content check ───────────────────────────────────────────────
+def looks_rendered(url: str, body: str, min_anchors: int = 5, min_text_chars: int = 400) -> bool:
+    """
+    True when a server response already carries the page's content: at
+    least one job link, or ``min_anchors`` anchors with text and a real
+    href plus ``min_text_chars`` of visible text. Pages whose only text is
+    a "please enable JavaScript" notice, or an empty app root, are shells.
+    """
+    try:
+        tree = lxml_html.fromstring(body)
+    except (ValueError, etree.ParserError):
+        return False
+
+    if count_job_links(extract_links(url, body)):
+        return True
+
+    for bad in tree.xpath("//script|//style|//noscript|//template"):
+        bad.drop_tree()
+    text = " ".join(tree.text_content().split())
+    if len(text) < min_text_chars:
+        if _JS_SHELL_RE.search(text):
+            return False
+        if any(not " ".join(el.itertext()).strip() for el in tree.iter("div") if el.get("id") in _APP_ROOT_IDS):
+            return False
+
+    anchors = 0
+    for a in tree.iter("a"):
+        href = (a.get("href") or "").strip()
+        if href and not href.startswith(("#", "javascript:")) and a.text_content().strip():
+            anchors += 1
+    return anchors >= min_anchors and len(text) >= min_text_chars
+
+
+# ── per-domain tier memory ──────────────────────────────────────
+class TierMemory:
+    def __init__(self, ttl: int, backend: str = "redis"):
+        self.ttl = ttl
+        self.backend = backend
+        self._local: dict[str, tuple[float, str]] = {}
+        self._redis_down_until = 0.0
+
+    def _use_redis(self) -> bool:
+        return self.backend == "redis" and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, exc: Exception) -> None:
+        logger.warning("[fetcher] Redis unavailable, tier memory is local: %s", exc)
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+    def get_many(self, hosts: Iterable[str]) -> dict[str, str | None]:
+        hosts = list(dict.fromkeys(hosts))
+        if self._use_redis() and hosts:
+            try:
+                return dict(zip(hosts, get_redis().mget([_TIER_PREFIX + h for h in hosts])))
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+        now = time.monotonic()
+        out = {}
+        for host in hosts:
+            expires, tier = self._local.get(host, (0.0, None))
+            out[host] = tier if expires > now else None
+        return out
+
+    def set_many(self, tiers: dict[str, str]) -> None:
+        if not tiers:
+            return
+        expires = time.monotonic() + self.ttl
+        for host, tier in tiers.items():
+            self._local[host] = (expires, tier)
+        if self._use_redis():
+            try:
+                pipe = get_redis().pipeline()
+                for host, tier in tiers.items():
+                    pipe.set(_TIER_PREFIX + host, tier, ex=self.ttl)
+                pipe.execute()
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+
+
+# ── fetcher ─────────────────────────────────────────────────────
+class TieredFetcher:
+    def __init__(
+        self,
+        memory: TierMemory | None = None,
+        min_anchors: int = 5,
+        min_text_chars: int = 400,
+        client: httpx.AsyncClient | None = None,
+        scheduler: PolitenessScheduler | None = None,
+        browser_fetch: Callable[..., dict[str, FetchResult]] | None = None,
+        max_host_wait: float = 30.0,
+    ):
+        self.memory = memory or TierMemory(ttl=7 * 24 * 3600)
+        self.min_anchors = min_anchors
+        self.min_text_chars = min_text_chars
+        self._client = client
+        self.scheduler = scheduler or get_politeness_scheduler()
+        self._browser_fetch = browser_fetch or browser_fetch_many
+        self.max_host_wait = max_host_wait
+
+    @classmethod
+    def from_settings(cls, **kwargs) -> "TieredFetcher":
+        options = {
+            "memory": TierMemory(
+                ttl=getattr(settings, "FETCH_TIER_TTL_SECONDS", 7 * 24 * 3600),
+                backend=getattr(settings, "FETCH_TIER_BACKEND", "redis"),
+            ),
+            "min_anchors": getattr(settings, "FETCH_MIN_ANCHORS", 5),
+            "min_text_chars": getattr(settings, "FETCH_MIN_TEXT_CHARS", 400),
+            "max_host_wait": getattr(settings, "CRAWLER_MAX_HOST_WAIT_SECONDS", 30.0),
+        }
+        options.update(kwargs)
+        return cls(**options)
+
+    def accepts(self, result: FetchResult) -> bool:
+        return looks_rendered(result.final_url, result.html, self.min_anchors, self.min_text_chars)
+
+    @staticmethod
+    def needs_browser(result: FetchResult) -> bool:
+        """An HTML page that failed the content check, or a likely bot wall."""
+        return result.error is None or result.status in ESCALATE_STATUSES
+
+    async def _fetch_http(self, url: str) -> FetchResult:
+        if not await self.scheduler.acquire(url, max_wait=self.max_host_wait):
+            return FetchResult(url=url, tier=HTTP, error=HOST_BUSY)
+        try:
+            with stage("http_fetch"):
+                resp = await (self._client or get_async_client()).get(url)
+        except httpx.HTTPError as exc:
+            return FetchResult(url=url, tier=HTTP, error=str(exc) or type(exc).__name__)
+        self.scheduler.record_response(url, resp.status_code, resp.headers.get("retry-after"))
+        result = FetchResult(url=url, final_url=str(resp.url), status=resp.status_code, tier=HTTP)
+        if resp.status_code >= 400:
+            result.error = f"HTTP {resp.status_code}"
+        elif "html" not in resp.headers.get("content-type", ""):
+            result.error = "not HTML"
+        else:
+            result.html = resp.text
+        return result
+
+    async def _fetch_http_many(self, urls: list[str]) -> list[FetchResult]:
+        return await asyncio.gather(*(self._fetch_http(u) for u in urls))
+
+    def fetch_many(
+        self,
+        urls: Iterable[str],
+        accept: Callable[[FetchResult], bool] | None = None,
+        wait_for: str | None = None,
+        in_page: Callable | None = None,
+        concurrent: bool = True,
+        capture_feeds: bool = False,
+    ) -> dict[str, FetchResult]:
+        """
+        Fetch every URL at the cheapest tier that yields content; url →
+        FetchResult. HTTP GETs run concurrently; whatever they can't serve
+        is loaded in one pooled browser context. ``wait_for`` is a CSS
+        selector the browser tier waits on; ``in_page(page)`` runs on each
+        browser-loaded page and its return value lands in ``.data``;
+        ``capture_feeds`` records browser-loaded pages' JSON responses.
+        Call from sync code only (Playwright's sync API and ``run_async``).
+        """
+        accept = accept or self.accepts
+        urls = list(dict.fromkeys(urls))
+        remembered = self.memory.get_many(url_host(u) for u in urls)
+        http_urls = [u for u in urls if remembered.get(url_host(u)) != BROWSER]
+        results: dict[str, FetchResult] = {}
+        learned: dict[str, str] = {}
+
+        if http_urls:
+            for res in run_async(self._fetch_http_many(http_urls)):
+                if res.error is None and accept(res):
+                    results[res.url] = res
+                    learned[url_host(res.url)] = HTTP
+                    FETCHES.inc(tier=HTTP, outcome="ok")
+                elif res.error == HOST_BUSY:
+                    # The browser would hit the same backed-off host; try next run
+                    results[res.url] = res
+                    FETCHES.inc(tier=HTTP, outcome="deferred")
+                elif self.needs_browser(res):
+                    FETCHES.inc(tier=HTTP, outcome="escalated")
+                    logger.debug("[fetcher] %s needs the browser (%s)", res.url, res.error or "no content")
+                else:
+                    # 404, DNS failure, not HTML…: a browser would get the same
+                    results[res.url] = res
+                    FETCHES.inc(tier=HTTP, outcome="error")
+
+        escalated = [u for u in urls if u not in results]
+        if escalated:
+            fetched = self._browser_fetch(
+                escalated, wait_for=wait_for, in_page=in_page, concurrent=concurrent, capture_feeds=capture_feeds
+            )
+            for url, res in fetched.items():
+                results[url] = res
+                if res.ok and (in_page is not None or accept(res)):
+                    learned[url_host(url)] = BROWSER
+                    FETCHES.inc(tier=BROWSER, outcome="ok")
+                else:
+                    FETCHES.inc(tier=BROWSER, outcome="error" if res.error else "empty")
+
+        # An HTTP hit on a host seen as JS-only re-proves the cheap tier
+        self.memory.set_many({h: t for h, t in learned.items() if remembered.get(h) != t})
+        logger.info(
+            "[fetcher] %d URL(s): %d over HTTP, %d in the browser",
+            len(urls),
+            len(urls) - len(escalated),
+            len(escalated),
+        )
+        return results
+
+    def fetch(self, url: str, **kwargs) -> FetchResult:
+        return self.fetch_many([url], **kwargs)[url]
+
+
+# ── browser tier ────────────────────────────────────────────────
+def _settle(page, deadline: float, wait_for: str | None) -> None:
+    if wait_for:
+        remaining_ms = max(0.0, deadline - time.monotonic()) * 1000
+        try:
+            with stage("selector_wait"):
+                page.wait_for_selector(wait_for, timeout=max(remaining_ms, 1))
+        except Exception as exc:  # noqa: BLE001
+            # Let the caller's content check decide what a miss means
+            logger.debug("[fetcher] %s never showed %r: %s", page.url, wait_for, exc)
+
+
+def _track_status(page) -> dict:
+    """Status of the tab's latest main-frame navigation response, under "status"."""
+    seen = {}
+
+    def on_response(response):
+        request = response.request
+        if request.is_navigation_request() and request.frame == page.main_frame:
+            seen["status"] = response.status
+
+    page.on("response", on_response)
+    return seen
+
+
+def _page_result(
+    url: str, page, in_page: Callable | None, captured: list | None = None, status: int = 0
+) -> FetchResult:
+    result = FetchResult(url=url, final_url=page.url, status=status, tier=BROWSER)
+    if status >= 400:
+        result.error = f"HTTP {status}"
+        return result
+    if captured is not None:
+        with stage("feed_capture"):
+            load_more(page, rounds=getattr(settings, "FEED_LOAD_MORE_ROUNDS", 2))
+            result.feeds = finish_capture(captured)
+    if in_page is not None:
+        result.data = in_page(page)
+    else:
+        result.html = page.content()
+    return result
+
+
+def browser_fetch_many(
+    urls: list[str],
+    wait_for: str | None = None,
+    in_page: Callable | None = None,
+    concurrent: bool = True,
+    capture_feeds: bool = False,
+) -> dict[str, FetchResult]:
+    """
+    Load ``urls`` in pooled contexts, one per render profile. With
+    ``concurrent`` each URL gets its own tab and the navigations are fired
+    from JS at once (the sync API blocks on ``goto``), each keeping its own
+    goto + selector budget; at most ``BROWSER_MAX_TABS`` tabs are open at a
+    time, each slice in a fresh context. Otherwise one tab loads them in
+    turn. With ``capture_feeds`` each tab records JSON responses from
+    before it navigates.
+    """
+    by_profile: dict[str, list[str]] = {}
+    for url in urls:
+        by_profile.setdefault(profile_for_url(url), []).append(url)
+    max_tabs = max(1, getattr(settings, "BROWSER_MAX_TABS", 4))
+
+    results: dict[str, FetchResult] = {}
+    for profile, group in by_profile.items():
+        if not concurrent:
+            with get_browser_pool().context(profile=profile) as ctx:
+                results.update(_load_in_turn(ctx, group, wait_for, in_page, capture_feeds))
+            continue
+        # Closing each slice's context frees its tabs and their captured JSON
+        for i in range(0, len(group), max_tabs):
+            with get_browser_pool().context(profile=profile) as ctx:
+                results.update(_load_in_tabs(ctx, group[i:i + max_tabs], wait_for, in_page, capture_feeds))
+    return results
+
+
+def _load_in_turn(ctx, urls, wait_for, in_page, capture_feeds) -> dict[str, FetchResult]:
+    results = {}
+    page = ctx.new_page()
+    captured = start_capture(page) if capture_feeds else None
+    for url in urls:
+        try:
+            if captured is not None:
+                captured.clear()  # one page's responses at a time
+            with stage("navigation"):
+                response = page.goto(url, wait_until="load", timeout=BROWSER_GOTO_TIMEOUT_MS)
+            _settle(page, time.monotonic() + BROWSER_SELECTOR_TIMEOUT_MS / 1000, wait_for)
+            status = response.status if response is not None else 0
+            results[url] = _page_result(url, page, in_page, captured, status)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("[fetcher] Browser failed on %s: %s", url, exc)
+            results[url] = FetchResult(url=url, tier=BROWSER, error=str(exc))
+    return results
+
+
+def _load_in_tabs(ctx, urls, wait_for, in_page, capture_feeds) -> dict[str, FetchResult]:
+    results = {}
+    budget_s = (BROWSER_GOTO_TIMEOUT_MS + BROWSER_SELECTOR_TIMEOUT_MS) / 1000
+    tabs = []
+    for url in urls:
+        page = ctx.new_page()
+        captured = start_capture(page) if capture_feeds else None
+        # Navigations fired from JS have no goto() response to read
+        seen = _track_status(page)
+        try:
+            page.evaluate("url => { window.location.href = url; }", url)
+            tabs.append((url, page, captured, seen, time.monotonic() + budget_s))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("[fetcher] Browser failed on %s: %s", url, exc)
+            results[url] = FetchResult(url=url, tier=BROWSER, error=str(exc))
+
+    for url, page, captured, seen, deadline in tabs:
+        remaining_ms = max(0.0, deadline - time.monotonic()) * 1000
+        try:
+            # Tabs load in parallel: time from here is this tab's wait, not its load
+            with stage("navigation"):
+                page.wait_for_function(
+                    "() => location.href !== 'about:blank' && document.readyState === 'complete'",
+                    timeout=max(remaining_ms, 1),
+                )
+            _settle(page, deadline, wait_for)
+            results[url] = _page_result(url, page, in_page, captured, seen.get("status", 0))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("[fetcher] Browser failed on %s: %s", url, exc)
+            results[url] = FetchResult(url=url, tier=BROWSER, error=str(exc))
+    return results
+
+
+# ── per-process singleton ───────────────────────────────────────
+_fetcher: TieredFetcher | None = None
+
+
+def get_fetcher() -> TieredFetcher:
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = TieredFetcher.from_settings()
+    return _fetcher
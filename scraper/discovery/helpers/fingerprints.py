@@ -0,0 +1,51 @@
+# scraper/discovery/helpers/fingerprints.py
+
+import hashlib
+import re
+import textwrap
+
+from lxml import etree, html as lxml_html
+
+_WS_RE = re.compile(r"\s+")
+_VOLATILE_TAGS = ("script", "style", "noscript", "template", "svg")
+
+
+def _parse(body: str):
+    try:
+        tree = lxml_html.fromstring(body)
+    except (ValueError, etree.ParserError):
+        return None
+    etree.strip_elements(tree, *_VOLATILE_TAGS, with_tail=False)
+    return tree
+
+
+def visible_text(body: str) -> str:
+    """Whitespace-collapsed text a reader would see (scripts/styles dropped)."""
+    tree = _parse(body)
+    if tree is None:
+        return _WS_RE.sub(" ", body).strip()
+    return _WS_RE.sub(" ", " ".join(tree.itertext())).strip()
+
+
+def chunk_text(text: str, max_chars: int = 2000) -> list[str]:
+    """Split plain text into ~max_chars pieces on word boundaries."""
+    return textwrap.wrap(text, max_chars, break_long_words=False)
+
+
+def content_fingerprint(body: str) -> str:
+    """
+    Hash of what a careers page *says*, not how it was served: visible text
+    plus link targets, whitespace-collapsed. Inline scripts, CSRF tokens,
+    cache-busting asset URLs etc. don't change it.
+    """
+    tree = _parse(body)
+    if tree is None:
+        return hashlib.sha256(_WS_RE.sub(" ", body).strip().encode("utf-8")).hexdigest()
+
+    text = _WS_RE.sub(" ", " ".join(tree.itertext())).strip()
+    hrefs = sorted({h.strip() for h in tree.xpath("//a/@href") if h.strip()})
+
+    h = hashlib.sha256(text.encode("utf-8"))
+    for href in hrefs:
+        h.update(b"\x1f" + href.encode("utf-8"))
+    return h.hexdigest()
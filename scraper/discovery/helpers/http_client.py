@@ -0,0 +1,55 @@
+# scraper/discovery/helpers/http_client.py
+
+"""
+Pooled async HTTP client shared by the crawler, connectors and verifiers.
+
+Celery tasks are sync, so async work runs through ``run_async``, which
+drives one event loop per call. httpx clients are bound to the loop that
+created them, so the pool is kept per loop and closed when that loop's
+work is done — connections are reused across every request the task makes.
+"""
+
+import asyncio
+import importlib.util
+
+import httpx
+
+USER_AGENT = "Mozilla/5.0 (compatible; JobOSBot/1.0; +https://jobos.tech)"
+# HTTP/2 multiplexing when the ``h2`` extra is installed (httpx[http2])
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+_clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            follow_redirects=True,
+            http2=HTTP2,
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            headers={"User-Agent": USER_AGENT},
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_async_client() -> None:
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def run_async(coro):
+    """Run ``coro`` to completion from sync code, then release its pool."""
+
+    async def _runner():
+        try:
+            return await coro
+        finally:
+            await close_async_client()
+
+    return asyncio.run(_runner())
@@ -0,0 +1,354 @@
+# scraper/discovery/helpers/job_feeds.py
+
+"""
+Job feeds: the JSON endpoints JS-heavy careers pages (Workday, iCIMS,
+custom SPAs) load their listings from, captured once in the browser and
+then replayed over plain HTTP.
+
+• Capture (browser tier, ``fetch_many(..., capture_feeds=True)``): every
+  XHR/fetch response with a JSON body is recorded while the page loads;
+  then the page is scrolled and its "load more" / "show more jobs" button
+  clicked a few times, so the endpoint is usually seen twice with
+  different paging values.
+• ``find_job_list`` looks for a list of job-like objects anywhere in a
+  payload (a title key plus a URL, id or location key on most items);
+  facet lists and config blobs don't qualify.
+• ``spec_from_captures`` turns the best capture into a ``FeedSpec``:
+  endpoint, method, JSON body, where the items are, and which query or
+  body parameter pages (offset vs page number). With two captures of the
+  same endpoint the parameter is the one numeric value that changed;
+  otherwise a well-known name (offset, start, page, …) is used, and a
+  feed without one is replayed as a single page.
+• Replay is the ``feed`` connector (discovery/connectors/feed.py), so a
+  captured site is refreshed like any ATS board. Specs are remembered per
+  host in the JobFeed table (discovery/models.py) and the browser is only
+  needed again when a replay stops working.
+"""
+
+import copy
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from discovery.helpers.urls import url_host
+
+logger = logging.getLogger("scraper")
+
+OFFSET, PAGE = "offset", "page"
+QUERY, BODY = "query", "body"
+MIN_ITEMS = 2
+MAX_CAPTURE_BYTES = 5 * 2**20
+_MAX_DEPTH = 4
+
+STRONG_TITLE_KEYS = ("title", "jobTitle", "job_title", "postingTitle", "positionTitle", "jobName")
+WEAK_TITLE_KEYS = ("name", "text")
+URL_KEYS = (
+    "url", "absolute_url", "absoluteUrl", "applyUrl", "hostedUrl", "jobUrl", "job_url",
+    "externalUrl", "externalPath", "canonicalPositionUrl", "link", "href", "path",
+)
+ID_KEYS = ("id", "jobId", "job_id", "requisitionId", "reqId", "jobReqId", "externalId", "uuid")
+LOCATION_KEYS = ("location", "locationsText", "locationName", "jobLocation", "locations", "city")
+DEPARTMENT_KEYS = ("department", "team", "category", "jobFamily", "function")
+TYPE_KEYS = ("employmentType", "employment_type", "jobType", "timeType", "commitment")
+DATE_KEYS = ("postedOn", "postedDate", "datePosted", "posted_at", "publishedAt", "publishDate",
+             "createdAt", "created_at", "releasedDate")
+DESCRIPTION_KEYS = ("description", "descriptionPlain", "jobDescription", "summary")
+TOTAL_KEYS = ("total", "totalCount", "totalFound", "totalResults", "total_count", "totalHits", "numFound")
+OFFSET_KEYS = ("offset", "start", "from", "skip", "startIndex", "startRow", "first")
+PAGE_KEYS = ("page", "pageNumber", "page_number", "pageIndex", "pageNo", "currentPage", "p")
+# Request headers worth replaying; cookies and auth stay behind with the browser
+REPLAY_HEADERS = ("content-type", "accept", "accept-language", "x-requested-with")
+
+
+# ── schema detection ────────────────────────────────────────────
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _first(item: dict, keys) -> Any:
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def _looks_like_job(item) -> bool:
+    if not isinstance(item, dict):
+        return False
+    title = _first(item, STRONG_TITLE_KEYS)
+    if isinstance(title, str):
+        return True
+    # "name"/"text" alone is every facet and menu entry; want a URL or location too
+    return isinstance(_first(item, WEAK_TITLE_KEYS), str) and (
+        _first(item, URL_KEYS) is not None or _first(item, LOCATION_KEYS) is not None
+    )
+
+
+def find_job_list(payload, max_depth: int = _MAX_DEPTH) -> tuple[list[str], list] | None:
+    """
+    (key path, items) of the largest list of job-like objects in a JSON
+    payload, searching dict keys up to ``max_depth`` deep; None if none.
+    """
+    best = None
+    stack = [([], payload)]
+    while stack:
+        path, node = stack.pop()
+        if isinstance(node, list):
+            jobs = sum(1 for item in node if _looks_like_job(item))
+            if jobs >= MIN_ITEMS and jobs * 10 >= len(node) * 6 and (best is None or jobs > len(best[1])):
+                best = (path, node)
+        elif isinstance(node, dict) and len(path) < max_depth:
+            stack.extend((path + [key], value) for key, value in node.items() if isinstance(value, (dict, list)))
+    return best
+
+
+def items_at(payload, path: list[str]) -> list | None:
+    for key in path:
+        if not isinstance(payload, dict):
+            return None
+        payload = payload.get(key)
+    return payload if isinstance(payload, list) else None
+
+
+def feed_total(payload) -> int | None:
+    """Total result count if the payload states one (top level or one object down)."""
+    if not isinstance(payload, dict):
+        return None
+    for scope in [payload, *(v for v in payload.values() if isinstance(v, dict))]:
+        value = _first(scope, TOTAL_KEYS)
+        if _is_int(value):
+            return value
+    return None
+
+
+# ── captures → spec ─────────────────────────────────────────────
+@dataclass
+class CapturedResponse:
+    url: str
+    method: str = "GET"
+    post_data: str | None = None
+    headers: dict = field(default_factory=dict)
+    payload: Any = None
+
+
+@dataclass
+class FeedSpec:
+    page_url: str  # the careers page it was captured on; relative job links resolve against it
+    url: str
+    method: str = "GET"
+    body: dict | None = None
+    headers: dict = field(default_factory=dict)
+    items_path: list[str] = field(default_factory=list)
+    page_key: str | None = None  # query param, or dotted path into the JSON body
+    page_in: str = QUERY
+    page_kind: str = OFFSET
+    page_start: int = 0
+
+    @property
+    def host(self) -> str:
+        return url_host(self.page_url)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeedSpec":
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+    def request(self, value: int | None = None) -> tuple[str, dict | None]:
+        """(url, JSON body) for the page whose paging parameter is ``value``."""
+        url, body = self.url, self.body
+        if self.page_key is None or value is None:
+            return url, body
+        if self.page_in == BODY:
+            body = copy.deepcopy(body)
+            *parents, leaf = self.page_key.split(".")
+            target = body
+            for key in parents:
+                target = target[key]
+            target[leaf] = value
+            return url, body
+        parts = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != self.page_key]
+        query.append((self.page_key, str(value)))
+        return urlunsplit(parts._replace(query=urlencode(query))), body
+
+
+def _numeric_params(capture: CapturedResponse, body: dict | None) -> dict[tuple[str, str], int]:
+    """(where, key) → int for every integer query param and body value (two levels deep)."""
+    out = {(QUERY, k): int(v) for k, v in parse_qsl(urlsplit(capture.url).query) if v.isdigit()}
+    for key, value in (body or {}).items():
+        if isinstance(value, dict):
+            out.update({(BODY, f"{key}.{sub}"): inner for sub, inner in value.items() if _is_int(inner)})
+        elif _is_int(value):
+            out[(BODY, key)] = value
+    return out
+
+
+def _set_paging(spec: FeedSpec, where: str, key: str, kind: str, seen: int) -> FeedSpec:
+    spec.page_in, spec.page_key, spec.page_kind = where, key, kind
+    # Replay from the first page even if the capture came from a later one
+    spec.page_start = 0 if kind == OFFSET else min(seen, 1)
+    return spec
+
+
+def _json_body(capture: CapturedResponse) -> dict | None:
+    if not capture.post_data:
+        return None
+    try:
+        body = json.loads(capture.post_data)
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+def _endpoint(capture: CapturedResponse) -> tuple[str, str]:
+    parts = urlsplit(capture.url)
+    return capture.method, f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def spec_from_captures(page_url: str, captures: list[CapturedResponse]) -> FeedSpec | None:
+    """The replayable job feed among ``captures``, or None when no response lists jobs."""
+    found = []
+    for capture in captures:
+        hit = find_job_list(capture.payload)
+        if hit is None:
+            continue
+        if capture.method != "GET" and _json_body(capture) is None:
+            continue  # form-encoded POSTs aren't replayed
+        found.append((capture, hit))
+    if not found:
+        return None
+
+    capture, (path, _) = max(found, key=lambda f: len(f[1][1]))
+    body = _json_body(capture)
+    spec = FeedSpec(
+        page_url=page_url,
+        url=capture.url,
+        method=capture.method,
+        body=body,
+        headers={k: v for k, v in capture.headers.items() if k.lower() in REPLAY_HEADERS},
+        items_path=path,
+    )
+    params = _numeric_params(capture, body)
+
+    # Best evidence: the same endpoint seen again (load more / scroll) with one value moved
+    for other, _ in found:
+        if other is capture or _endpoint(other) != _endpoint(capture):
+            continue
+        moved = [
+            (where, key, params[(where, key)], value)
+            for (where, key), value in _numeric_params(other, _json_body(other)).items()
+            if (where, key) in params and value != params[(where, key)]
+        ]
+        if len(moved) == 1:
+            where, key, mine, theirs = moved[0]
+            # Page numbers move by one; offsets by a page of items (always more than one)
+            kind = PAGE if abs(theirs - mine) == 1 else OFFSET
+            return _set_paging(spec, where, key, kind, min(mine, theirs))
+
+    for kind, names in ((OFFSET, OFFSET_KEYS), (PAGE, PAGE_KEYS)):
+        for (where, key), value in params.items():
+            if key.rsplit(".", 1)[-1] in names:
+                return _set_paging(spec, where, key, kind, value)
+    return spec
+
+
+# ── items → records ─────────────────────────────────────────────
+def _text(value) -> str:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return _text(_first(value, ("name", "label", "text", "title", "city", "descriptor")))
+    if isinstance(value, list):
+        return ", ".join(filter(None, (_text(v) for v in value[:5])))
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return ""
+
+
+def item_fields(spec: FeedSpec, item: dict) -> dict | None:
+    """Normalized posting fields for one feed item; None without a title or a URL/id."""
+    title = _text(_first(item, STRONG_TITLE_KEYS) or _first(item, WEAK_TITLE_KEYS))
+    link = _first(item, URL_KEYS)
+    job_id = _first(item, ID_KEYS)
+    if job_id is None and isinstance(item.get("bulletFields"), list) and item["bulletFields"]:
+        job_id = item["bulletFields"][-1]  # Workday puts the requisition id last
+    if not title or (not isinstance(link, str) and job_id is None):
+        return None
+    if isinstance(link, str):
+        url = urljoin(spec.page_url, link)
+    else:
+        url = f"{spec.page_url}{'&' if '?' in spec.page_url else '?'}job_id={job_id}"
+    return {
+        "external_id": str(job_id if job_id is not None else link),
+        "title": title,
+        "url": url,
+        "location": _text(_first(item, LOCATION_KEYS)),
+        "department": _text(_first(item, DEPARTMENT_KEYS)),
+        "employment_type": _text(_first(item, TYPE_KEYS)),
+        "description": _text(_first(item, DESCRIPTION_KEYS)),
+        "posted_at": _first(item, DATE_KEYS),
+    }
+
+
+# ── browser side ────────────────────────────────────────────────
+LOAD_MORE_SELECTOR = (
+    "button:has-text('Load more'), button:has-text('Show more'), button:has-text('More jobs'), "
+    "a:has-text('Load more'), a:has-text('Show more'), [data-automation-id='loadMoreButton']"
+)
+
+
+def start_capture(page) -> list:
+    """Hook ``page`` before navigation; returns the list JSON XHR/fetch responses are added to."""
+    responses: list = []
+
+    def on_response(response):
+        request = response.request
+        if request.resource_type in ("xhr", "fetch") and "json" in response.headers.get("content-type", ""):
+            responses.append(response)
+
+    page.on("response", on_response)
+    return responses
+
+
+def load_more(page, rounds: int = 2, wait_ms: int = 1500) -> None:
+    """Scroll to the bottom and click a "load more" button, ``rounds`` times, so paging requests fire."""
+    for _ in range(rounds):
+        try:
+            page.mouse.wheel(0, 20_000)
+            button = page.locator(LOAD_MORE_SELECTOR).first
+            if button.count() and button.is_visible():
+                button.click(timeout=2000)
+            page.wait_for_timeout(wait_ms)
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("[job_feeds] load more failed on %s: %s", page.url, exc)
+            return
+
+
+def finish_capture(responses: list) -> list[CapturedResponse]:
+    """Read the recorded responses' bodies (after load, never inside the event handler)."""
+    captures = []
+    for response in responses:
+        try:
+            if response.status >= 400:
+                continue
+            raw = response.body()
+            if len(raw) > MAX_CAPTURE_BYTES:
+                continue
+            request = response.request
+            captures.append(
+                CapturedResponse(
+                    url=response.url,
+                    method=request.method,
+                    post_data=request.post_data,
+                    headers=dict(request.headers),
+                    payload=json.loads(raw),
+                )
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("[job_feeds] unreadable response %s: %s", response.url, exc)
+    return captures
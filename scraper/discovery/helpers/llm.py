@@ -0,0 +1,215 @@
+# scraper/discovery/helpers/llm.py
+
+"""
+Ollama client for the "is this a job listings page?" question
+(production version of ``isJobListingsPage`` in testscripts/test_crawl4ai.py).
+
+• Chunks are sent in batches: one /api/generate call carries up to
+  ``batch_size`` numbered chunks and the model answers one line per chunk.
+• ``any_positive`` walks a page's chunks batch by batch and stops at the
+  first YES, so a listings page usually costs a single call.
+• Calls share the pooled async client and a concurrency cap, since the
+  local model serves one generation at a time anyway.
+• Verdicts are cached per chunk (helpers/llm_cache.py), and identical
+  chunks already in flight wait for that call instead of issuing their own,
+  so only never-seen chunks reach the model.
+• A chunk the model skipped or garbled is asked about once more on its
+  own; if it still has no answer it stays undecided (None) and is
+  neither cached nor handed to coalesced waiters as a verdict.
+"""
+
+import asyncio
+import logging
+import re
+import time
+
+import httpx
+from django.conf import settings
+
+from discovery.helpers.http_client import get_async_client
+from discovery.helpers.llm_cache import VerdictCache, get_llm_cache, verdict_key
+
+logger = logging.getLogger("scraper")
+
+# Part of every cache key: bump whenever build_prompt's wording changes
+PROMPT_VERSION = "listings-v1"
+
+_ANSWER_RE = re.compile(r"^\s*(\d+)\s*[:.)\-]\s*(YES|NO)\b", re.IGNORECASE | re.MULTILINE)
+
+
+class LLMError(Exception):
+    """The model could not be reached or gave no usable answer."""
+
+
+class _Unanswered(LLMError):
+    """The owning call got no answer for this chunk; waiters stay undecided."""
+
+
+def build_prompt(chunks: list[str]) -> str:
+    parts = [
+        "You are a classifier. For each numbered chunk of a web page, answer "
+        "YES if it shows multiple job postings (cards/titles/locations), "
+        "otherwise NO. Reply with exactly one line per chunk, e.g. '1: YES'.",
+    ]
+    for i, chunk in enumerate(chunks, 1):
+        parts.append(f"--- chunk {i} ---\n{chunk}")
+    return "\n\n".join(parts)
+
+
+def parse_answers(text: str, n: int) -> list[bool | None]:
+    """Map '1: YES' style lines back to chunks; unanswered chunks are None."""
+    verdicts: list[bool | None] = [None] * n
+    answered = 0
+    for m in _ANSWER_RE.finditer(text):
+        i = int(m.group(1)) - 1
+        if 0 <= i < n:
+            verdicts[i] = m.group(2).upper() == "YES"
+            answered += 1
+    if not answered and n == 1:
+        # Single-chunk prompts sometimes come back as a bare YES/NO
+        word = text.strip().upper()
+        if word.startswith(("YES", "NO")):
+            verdicts[0] = word.startswith("YES")
+    return verdicts
+
+
+class OllamaClassifier:
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "mistral",
+        timeout: float = 20.0,
+        batch_size: int = 4,
+        max_concurrency: int = 2,
+        client: httpx.AsyncClient | None = None,
+        cache: VerdictCache | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self._client = client
+        self.cache = cache
+        self._semaphore: asyncio.Semaphore | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.calls = 0
+
+    @classmethod
+    def from_settings(cls, **kwargs) -> "OllamaClassifier":
+        options = {
+            "base_url": getattr(settings, "OLLAMA_BASE_URL", "http://localhost:11434"),
+            "model": getattr(settings, "OLLAMA_MODEL", "mistral"),
+            "timeout": getattr(settings, "OLLAMA_TIMEOUT_SECONDS", 20.0),
+            "batch_size": getattr(settings, "OLLAMA_BATCH_SIZE", 4),
+            "max_concurrency": getattr(settings, "OLLAMA_MAX_CONCURRENCY", 2),
+            "cache": get_llm_cache(),
+        }
+        options.update(kwargs)
+        return cls(**options)
+
+    async def _generate(self, chunks: list[str], retry: bool = True) -> list[bool | None]:
+        """
+        One model call for up to ``batch_size`` chunks, plus one more for
+        any it left unanswered when ``retry``.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        payload = {
+            "model": self.model,
+            "prompt": build_prompt(chunks),
+            "stream": False,
+            "options": {"temperature": 0.0, "num_predict": 8 * len(chunks)},
+        }
+        client = self._client or get_async_client()
+        async with self._semaphore:
+            self.calls += 1
+            started = time.monotonic()
+            try:
+                resp = await client.post(
+                    f"{self.base_url}/api/generate", json=payload, timeout=self.timeout
+                )
+                resp.raise_for_status()
+                answer = resp.json().get("response", "")
+            except (httpx.HTTPError, ValueError) as exc:
+                raise LLMError(str(exc)) from exc
+            finally:
+                if self.cache is not None:
+                    self.cache.record_call(time.monotonic() - started)
+        logger.debug("[llm] %d chunk(s) → %r", len(chunks), answer[:80])
+        verdicts = parse_answers(answer, len(chunks))
+        missing = [i for i, v in enumerate(verdicts) if v is None]
+        if missing and retry:
+            logger.debug("[llm] %d chunk(s) unanswered; asking again", len(missing))
+            for i, verdict in zip(missing, await self._generate([chunks[i] for i in missing], retry=False)):
+                verdicts[i] = verdict
+        return verdicts
+
+    async def classify(self, chunks: list[str]) -> list[bool | None]:
+        """
+        Verdict per chunk (None: the model gave no answer). Cached chunks
+        cost nothing, chunks another coroutine is already asking about are
+        awaited, and the rest go to the model in one call.
+        """
+        if self.cache is None:
+            return await self._generate(chunks)
+
+        verdicts: list[bool | None] = [None] * len(chunks)
+        waiting: dict[int, asyncio.Future] = {}
+        owned: dict[str, asyncio.Future] = {}
+        to_send: list[int] = []
+        keys = [verdict_key(self.model, PROMPT_VERSION, c) for c in chunks]
+        loop = asyncio.get_running_loop()
+
+        for i, key in enumerate(keys):
+            pending = self._inflight.get(key)
+            if pending is not None:
+                waiting[i] = pending
+                self.cache.record_coalesced()
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                verdicts[i] = cached
+                continue
+            fut = loop.create_future()
+            # Nobody may await an owner's failure; don't warn about it
+            fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = owned[key] = fut
+            to_send.append(i)
+
+        if to_send:
+            started = time.monotonic()
+            try:
+                answers = await self._generate([chunks[i] for i in to_send])
+            except BaseException as exc:
+                for key in owned:
+                    self._inflight.pop(key, None)
+                    if not owned[key].done():
+                        owned[key].set_exception(
+                            exc if isinstance(exc, LLMError) else LLMError("call aborted")
+                        )
+                raise
+            cost = (time.monotonic() - started) / len(to_send)
+            for i, verdict in zip(to_send, answers):
+                verdicts[i] = verdict
+                self._inflight.pop(keys[i], None)
+                if verdict is None:
+                    owned[keys[i]].set_exception(_Unanswered(keys[i]))
+                    continue
+                self.cache.set(keys[i], verdict, cost)
+                owned[keys[i]].set_result((verdict, cost))
+
+        for i, fut in waiting.items():
+            try:
+                verdicts[i], cost = await fut
+            except _Unanswered:
+                continue
+            self.cache.record_saved(cost)
+        return verdicts
+
+    async def any_positive(self, chunks: list[str]) -> bool:
+        """True at the first chunk the model calls a listings page (undecided isn't)."""
+        for i in range(0, len(chunks), self.batch_size):
+            if any(await self.classify(chunks[i:i + self.batch_size])):
+                return True
+        return False
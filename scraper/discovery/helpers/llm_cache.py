@@ -0,0 +1,212 @@
+# scraper/discovery/helpers/llm_cache.py
+
+"""
+Verdict cache for LLM chunk classification (helpers/llm.py).
+
+Listings pages built on the same ATS template produce near-identical
+chunks across companies, so the model keeps being asked the same question.
+
+• Key: model + prompt version + SHA-256 of the normalized chunk
+  (case-folded, whitespace-collapsed, digits masked — job counts, IDs and
+  dates don't change the answer).
+• Per-process LRU in front of a SQLite table on disk, so verdicts survive
+  restarts and are shared by every worker process on the host.
+• Each entry keeps what producing it cost (seconds of model time per
+  chunk), so hits can report the model calls and seconds they saved.
+  Counters are flushed to a Redis hash and aggregated across workers.
+
+Redis layout:
+    discovery:llm:stats     HASH of hits / misses / coalesced / saved seconds
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import redis
+from django.conf import settings
+
+from discovery.helpers.redis_client import get_redis
+
+logger = logging.getLogger("scraper")
+
+_STATS_KEY = "discovery:llm:stats"
+_DIGITS_RE = re.compile(r"\d+")
+_COUNTERS = ("memory_hits", "disk_hits", "misses", "coalesced", "model_calls")
+_TIMERS = ("seconds_saved", "model_seconds")
+
+
+def normalize_chunk(chunk: str) -> str:
+    return _DIGITS_RE.sub("0", " ".join(chunk.split()).casefold())
+
+
+def verdict_key(model: str, prompt_version: str, chunk: str) -> str:
+    digest = hashlib.sha256(normalize_chunk(chunk).encode("utf-8")).hexdigest()
+    return f"{model}|{prompt_version}|{digest}"
+
+
+class VerdictCache:
+    def __init__(self, path: str | os.PathLike | None = None, max_entries: int = 50_000):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self._lru: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._counts = dict.fromkeys(_COUNTERS + _TIMERS, 0)
+        self._unflushed = dict(self._counts)
+
+    # ── disk ────────────────────────────────────────────────────
+    def _db(self) -> sqlite3.Connection | None:
+        if self.path is None:
+            return None
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                " key TEXT PRIMARY KEY, verdict INTEGER NOT NULL,"
+                " cost REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    # ── lookups ─────────────────────────────────────────────────
+    def _remember(self, key: str, value: tuple[bool, float]) -> None:
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str) -> bool | None:
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+                self._count("memory_hits", saved=value[1])
+                return value[0]
+
+            db = self._db()
+            row = None
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT verdict, cost FROM verdicts WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as exc:
+                    logger.warning("[llm_cache] Disk lookup failed: %s", exc)
+            if row is None:
+                self._count("misses")
+                return None
+            value = (bool(row[0]), float(row[1]))
+            self._remember(key, value)
+            self._count("disk_hits", saved=value[1])
+            return value[0]
+
+    def set(self, key: str, verdict: bool, cost: float) -> None:
+        with self._lock:
+            self._remember(key, (verdict, cost))
+            db = self._db()
+            if db is None:
+                return
+            try:
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO verdicts (key, verdict, cost, created_at)"
+                        " VALUES (?, ?, ?, ?)",
+                        (key, int(verdict), cost, time.time()),
+                    )
+            except sqlite3.Error as exc:
+                logger.warning("[llm_cache] Disk write failed: %s", exc)
+
+    # ── accounting ──────────────────────────────────────────────
+    def _count(self, name: str, n: int = 1, saved: float = 0.0) -> None:
+        for counts in (self._counts, self._unflushed):
+            counts[name] += n
+            counts["seconds_saved"] += saved
+
+    def record_coalesced(self, n: int = 1) -> None:
+        with self._lock:
+            self._count("coalesced", n)
+
+    def record_call(self, seconds: float) -> None:
+        with self._lock:
+            for counts in (self._counts, self._unflushed):
+                counts["model_calls"] += 1
+                counts["model_seconds"] += seconds
+
+    def record_saved(self, seconds: float) -> None:
+        """Model time avoided by a coalesced wait (known once the call ends)."""
+        with self._lock:
+            for counts in (self._counts, self._unflushed):
+                counts["seconds_saved"] += seconds
+
+    def flush_stats(self) -> None:
+        """Push this process's counters into the shared Redis hash."""
+        with self._lock:
+            pending, self._unflushed = self._unflushed, dict.fromkeys(self._unflushed, 0)
+        if not any(pending.values()):
+            return
+        try:
+            pipe = get_redis().pipeline()
+            for name in _COUNTERS:
+                if pending[name]:
+                    pipe.hincrby(_STATS_KEY, name, pending[name])
+            for name in _TIMERS:
+                if pending[name]:
+                    pipe.hincrbyfloat(_STATS_KEY, name, round(pending[name], 3))
+            pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("[llm_cache] Redis unavailable for stats: %s", exc)
+
+    def stats(self, shared: bool = True) -> dict:
+        """
+        Counters since start (this process), or aggregated over all workers
+        when ``shared`` and Redis is reachable. ``calls_saved`` counts chunk
+        classifications answered without the model.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+            entries = len(self._lru)
+        if shared:
+            try:
+                stored = get_redis().hgetall(_STATS_KEY)
+                counts = {
+                    name: float(stored.get(name, 0)) if name in _TIMERS else int(stored.get(name, 0))
+                    for name in _COUNTERS + _TIMERS
+                }
+            except redis.RedisError as exc:
+                logger.warning("[llm_cache] Redis unavailable for stats: %s", exc)
+
+        hits = counts["memory_hits"] + counts["disk_hits"]
+        lookups = hits + counts["misses"]
+        return {
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in counts.items()},
+            "calls_saved": hits + counts["coalesced"],
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "entries_in_memory": entries,
+        }
+
+
+# ── per-process singleton ───────────────────────────────────────
+_cache: VerdictCache | None = None
+
+
+def get_llm_cache() -> VerdictCache | None:
+    """The configured cache, or None when LLM_CACHE_ENABLED is off."""
+    global _cache
+    if not getattr(settings, "LLM_CACHE_ENABLED", True):
+        return None
+    if _cache is None:
+        _cache = VerdictCache(
+            path=getattr(settings, "LLM_CACHE_PATH", None),
+            max_entries=getattr(settings, "LLM_CACHE_MAX_ENTRIES", 50_000),
+        )
+    return _cache
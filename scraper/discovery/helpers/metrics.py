@@ -0,0 +1,307 @@
+# scraper/discovery/helpers/metrics.py
+
+"""
+Pipeline metrics: per-stage latency histograms, counters and in-flight
+gauges, exposed in the Prometheus text format at ``/metrics``.
+
+• Recording is in-process and lock-cheap: a dict update per sample, never
+  a Redis call. The samples are flushed as deltas (HINCRBYFLOAT) into one
+  Redis hash shared by every worker and the web process. This happens
+  when a Celery task starts and ends, and every ``_FLUSH_INTERVAL_SECONDS``
+  from a daemon thread started in each worker process
+  (``worker_process_init``), so a long crawl's stages and in-flight gauges
+  show up while it runs. ``/metrics`` shows the whole fleet without a push
+  gateway or multiprocess dir.
+• Histograms are stored cumulatively (``_bucket{le=…}``, ``_sum``,
+  ``_count``), so each Redis field is already a Prometheus sample.
+• In-flight gauges are flushed as +/- deltas too; a worker killed mid-task
+  can leave its contribution behind until Redis is cleared.
+• When Redis is unreachable, ``/metrics`` shows this process's totals.
+
+Redis layout:
+    discovery:metrics       HASH of '<sample>{<labels>}' → value
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import redis
+
+from discovery.helpers.redis_client import get_redis
+
+logger = logging.getLogger("scraper")
+
+_METRICS_KEY = "discovery:metrics"
+_FLUSH_INTERVAL_SECONDS = 5
+_REDIS_RETRY_SECONDS = 30
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _series(sample: str, labels: dict) -> str:
+    if not labels:
+        return sample
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items()))
+    return f"{sample}{{{inner}}}"
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: dict[str, float] = defaultdict(float)
+        self._pending: dict[str, float] = defaultdict(float)
+        self._flushed_at = time.monotonic()
+        self._redis_down_until = 0.0
+        self._flusher_pid: int | None = None
+        self._flusher_stop = threading.Event()
+        self.metrics: dict[str, "_Metric"] = {}
+
+    def _add(self, deltas: list[tuple[str, float]]) -> None:
+        with self._lock:
+            for field, delta in deltas:
+                self._totals[field] += delta
+                self._pending[field] += delta
+
+    # ── background flushing ─────────────────────────────────────
+    def start_flusher(self) -> None:
+        """Flush every ``_FLUSH_INTERVAL_SECONDS`` from a daemon thread (once per process)."""
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            # A thread doesn't survive fork; a child starts its own
+            self._flusher_pid = os.getpid()
+            self._flusher_stop = threading.Event()
+            stop = self._flusher_stop
+        threading.Thread(target=self._flush_loop, args=(stop,), name="metrics-flusher", daemon=True).start()
+
+    def stop_flusher(self) -> None:
+        with self._lock:
+            self._flusher_pid = None
+            self._flusher_stop.set()
+
+    def _flush_loop(self, stop: threading.Event) -> None:
+        while not stop.wait(_FLUSH_INTERVAL_SECONDS):
+            try:
+                self.flush()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("[metrics] Background flush failed: %s", exc)
+
+    def register(self, metric: "_Metric") -> "_Metric":
+        self.metrics[metric.name] = metric
+        return metric
+
+    def flush(self, force: bool = False) -> None:
+        """Push deltas recorded since the last flush into the shared hash."""
+        with self._lock:
+            if not self._pending:
+                return
+            now = time.monotonic()
+            if not force and now - self._flushed_at < _FLUSH_INTERVAL_SECONDS:
+                return
+            # After a failure, don't pay a connect timeout on every task
+            if now < self._redis_down_until:
+                return
+            pending, self._pending = self._pending, defaultdict(float)
+            self._flushed_at = time.monotonic()
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for field, delta in pending.items():
+                if delta:
+                    pipe.hincrbyfloat(_METRICS_KEY, field, delta)
+            pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("[metrics] Redis unavailable, keeping samples local: %s", exc)
+            with self._lock:
+                self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+                for field, delta in pending.items():
+                    self._pending[field] += delta
+
+    def values(self, shared: bool = True) -> dict[str, float]:
+        if shared:
+            try:
+                return {k: float(v) for k, v in get_redis().hgetall(_METRICS_KEY).items()}
+            except redis.RedisError as exc:
+                logger.warning("[metrics] Redis unavailable for exposition: %s", exc)
+        with self._lock:
+            return dict(self._totals)
+
+    def render(self, shared: bool = True) -> str:
+        """Prometheus text exposition (format 0.0.4)."""
+        values = self.values(shared)
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            samples = [(field, v) for field, v in values.items() if metric.owns(field)]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for field, value in sorted(samples, key=lambda item: metric.sort_key(item[0])):
+                lines.append(f"{field} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class _Metric:
+    kind = "untyped"
+    suffixes = ("",)
+
+    def __init__(self, registry: Registry, name: str, help: str):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        registry.register(self)
+
+    def owns(self, field: str) -> bool:
+        sample = field.split("{", 1)[0]
+        return any(sample == self.name + s for s in self.suffixes)
+
+    def sort_key(self, field: str):
+        return field
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self.registry._add([(_series(self.name, labels), amount)])
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self.registry._add([(_series(self.name, labels), amount)])
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+    suffixes = ("_bucket", "_sum", "_count")
+
+    def __init__(self, registry: Registry, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        deltas = [
+            (_series(f"{self.name}_bucket", {**labels, "le": _fmt(le)}), 1)
+            for le in self.buckets
+            if value <= le
+        ]
+        deltas.append((_series(f"{self.name}_sum", labels), value))
+        deltas.append((_series(f"{self.name}_count", labels), 1))
+        self.registry._add(deltas)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def sort_key(self, field: str):
+        # Group by labels (le aside), buckets in ascending order, then _sum/_count
+        sample, _, rest = field.partition("{")
+        labels = [p for p in rest.rstrip("}").split(",") if p and not p.startswith("le=")]
+        le = next((p[4:-1] for p in rest.rstrip("}").split(",") if p.startswith("le=")), None)
+        order = self.suffixes.index(sample[len(self.name):])
+        return (labels, order, float("inf") if le == "+Inf" else float(le or 0))
+
+
+# ── the pipeline's metrics ──────────────────────────────────────
+registry = Registry()
+
+STAGE_SECONDS = Histogram(
+    registry,
+    "jobos_stage_seconds",
+    "Wall time per pipeline stage (serp_fetch, browser_launch, navigation, "
+    "selector_wait, feed_capture, feed_replay, http_fetch, parse, dedupe, crawl, rank, verify, extract).",
+)
+STAGE_ERRORS = Counter(registry, "jobos_stage_errors_total", "Failures per pipeline stage.")
+TASK_RUNTIME = Histogram(registry, "jobos_task_runtime_seconds", "Celery task runtime.")
+TASK_QUEUE_WAIT = Histogram(
+    registry, "jobos_task_queue_wait_seconds", "Time from publish to a worker starting the task."
+)
+TASKS = Counter(registry, "jobos_tasks_total", "Finished Celery tasks by state.")
+TASKS_IN_FLIGHT = Gauge(registry, "jobos_tasks_in_flight", "Celery tasks currently running.")
+BROWSER_CONTEXTS_IN_FLIGHT = Gauge(
+    registry, "jobos_browser_contexts_in_flight", "Open pooled browser contexts."
+)
+FETCHES = Counter(registry, "jobos_fetches_total", "Tiered fetcher results by tier and outcome.")
+SERP_QUERIES = Counter(registry, "jobos_serp_queries_total", "SERP queries by result (cache_hit, fetched, failed).")
+PAGES_SCRAPED = Counter(registry, "jobos_pages_scraped_total", "scrape_page_structured calls by mode and outcome.")
+NEAR_DUPLICATES = Counter(
+    registry, "jobos_near_duplicates_total", "Near-duplicate postings and crawl candidates, by kind."
+)
+JOB_FEEDS = Counter(
+    registry, "jobos_job_feeds_total", "Captured JSON job feeds by outcome (captured, missed, replayed, stale)."
+)
+
+
+@contextmanager
+def stage(name: str):
+    """``with stage("crawl"): …`` (or ``@stage("rank")``) — time a pipeline stage, count its failures."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+
+
+# ── Celery hooks (connected in scraperproject/celery.py) ────────
+_task_started: dict[str, float] = {}
+
+
+def on_worker_process_init(**kwargs) -> None:
+    registry.start_flusher()
+
+
+def on_task_publish(headers=None, **kwargs) -> None:
+    if headers is not None:
+        headers.setdefault("jobos_sent_at", time.time())
+
+
+def on_task_prerun(task_id=None, task=None, **kwargs) -> None:
+    name = getattr(task, "name", "unknown")
+    _task_started[task_id] = time.perf_counter()
+    TASKS_IN_FLIGHT.inc(task=name)
+    sent_at = getattr(getattr(task, "request", None), "jobos_sent_at", None)
+    if sent_at:
+        TASK_QUEUE_WAIT.observe(max(0.0, time.time() - float(sent_at)), task=name)
+    # Publish the +1 now; held until postrun it would cancel out with the -1
+    registry.flush(force=True)
+
+
+def on_task_postrun(task_id=None, task=None, state=None, **kwargs) -> None:
+    name = getattr(task, "name", "unknown")
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_RUNTIME.observe(time.perf_counter() - started, task=name)
+        TASKS_IN_FLIGHT.dec(task=name)
+    TASKS.inc(task=name, state=(state or "unknown").lower())
+    registry.flush(force=True)
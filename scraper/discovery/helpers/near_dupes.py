@@ -0,0 +1,120 @@
+# scraper/discovery/helpers/near_dupes.py
+
+"""
+Near-duplicate detection for postings and crawled pages: MinHash
+signatures over word shingles, clustered through an LSH band index.
+
+The same job turns up under several URLs — the ATS page, the company's
+own careers mirror, tracking-param variants from separate SERP queries —
+with text that differs only in boilerplate. Exact hashes (content_hash,
+the URL-set dedupe in stage 1) can't see that; MinHash can: the share of
+equal signature slots estimates the Jaccard similarity of the two texts'
+shingle sets.
+
+• ``minhash(text)`` hashes word 3-shingles of the case-folded tokens and
+  keeps the minimum under ``NUM_PERM`` multiply-shift hash functions
+  (numpy; one pass per text).
+• Signatures are cut into ``BANDS`` bands of ``ROWS`` slots. Texts with
+  Jaccard similarity s share at least one whole band with probability
+  1 - (1 - s^ROWS)^BANDS (≈0.9998 at s=0.8, ≈0.64 at s=0.5), so looking
+  up a signature's band keys finds its near-duplicates without comparing
+  against the rest of the index; candidates are then checked against the
+  similarity threshold. SimHash is cheaper to store but too noisy on
+  posting-length texts: one changed word moves it 2–9 bits.
+• ``NearDuplicateIndex`` is the in-memory form (one crawl's pages); the
+  ``PostingBand`` table (discovery/models.py) is the persistent one, with
+  the same ``band_keys``.
+"""
+
+import hashlib
+import re
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+DEFAULT_THRESHOLD = 0.8
+
+_TOKEN_RE = re.compile(r"\w+")
+# Fixed seed: signatures are persisted, so the hash family must never change
+_rng = np.random.default_rng(0x5EED)
+_MULTIPLIERS = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_OFFSETS = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+
+
+def _shingles(tokens: list[str]) -> set[str]:
+    if len(tokens) <= SHINGLE_WORDS:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + SHINGLE_WORDS]) for i in range(len(tokens) - SHINGLE_WORDS + 1)}
+
+
+def minhash(text: str) -> np.ndarray | None:
+    """``NUM_PERM`` uint32 MinHash slots for ``text``; None for text without words."""
+    shingles = _shingles(_TOKEN_RE.findall(text.casefold()))
+    if not shingles:
+        return None
+    digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+    hashes = np.frombuffer(digests, dtype="<u8")
+    # Multiply-shift hashing: (a·x + b) mod 2^64, top 32 bits (uint64 wraps)
+    permuted = (hashes[:, None] * _MULTIPLIERS + _OFFSETS) >> np.uint64(32)
+    return permuted.min(axis=0).astype("<u4")
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def band_keys(signature: np.ndarray) -> list[int]:
+    """One signed 64-bit lookup key per band; the band number is hashed in so bands don't collide."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(rows, digest_size=8, person=band.to_bytes(2, "little")).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def to_bytes(signature: np.ndarray) -> bytes:
+    return np.asarray(signature, dtype="<u4").tobytes()
+
+
+def from_bytes(raw) -> np.ndarray:
+    return np.frombuffer(bytes(raw), dtype="<u4")
+
+
+class NearDuplicateIndex:
+    """
+    In-memory LSH index: ``find`` the indexed item most similar to a
+    signature (at least ``threshold``), in time proportional to the band
+    bucket sizes rather than the number of items.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._buckets: dict[int, list] = {}
+        self._signatures: dict = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, key, signature: np.ndarray) -> None:
+        self._signatures[key] = signature
+        for band_key in band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def find(self, signature: np.ndarray):
+        """Key of the most similar indexed item at or above ``threshold``, or None."""
+        candidates = {key for band_key in band_keys(signature) for key in self._buckets.get(band_key, ())}
+        scored = [(similarity(signature, self._signatures[key]), key) for key in candidates]
+        best = max(scored, key=lambda item: item[0], default=None)
+        return best[1] if best is not None and best[0] >= self.threshold else None
+
+    def add_unique(self, key, signature: np.ndarray):
+        """Index ``key`` unless it near-duplicates an item already here; returns that item's key."""
+        match = self.find(signature)
+        if match is None:
+            self.add(key, signature)
+        return match
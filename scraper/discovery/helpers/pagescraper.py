@@ -1,22 +1,150 @@
-# scraper/discovery/utils/page_scraper.py
+# scraper/discovery/helpers/pagescraper.py
+
+"""
+Structured page extraction: title, headings, paragraphs, links, buttons.
+
+Modes (``PAGESCRAPER_MODE`` or the ``mode`` argument):
+
+• ``"evaluate"`` — one ``page.evaluate`` call walks the live DOM in the
+  browser and returns only the extracted fields; the DOM is never
+  serialized or re-parsed in Python.
+• ``"lxml"`` — ``page.content()`` parsed once by lxml and walked in a
+  single document-order pass for every field.
+• ``"soup"`` — the original BeautifulSoup implementation (five
+  ``find_all`` passes), kept for comparison.
+
+Pages are fetched through the tiered fetcher (helpers/fetcher.py): a
+server-rendered page is parsed straight from the HTTP response with lxml
+(whatever the mode), and only JS-dependent pages open a browser tab, where
+the mode applies.
+
+All modes return the same dict shape and the same strings as
+BeautifulSoup's ``get_text(strip=True)``. ``limits`` caps how many items
+each list field keeps (e.g. ``{"links": 500}``); collection for a field
+stops once its cap is reached.
+"""
 
-from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
+from django.conf import settings
+from lxml import etree, html as lxml_html
+
+from discovery.helpers.fetcher import get_fetcher
+from discovery.helpers.metrics import PAGES_SCRAPED, stage
+
+LIST_FIELDS = ("headings", "paragraphs", "links", "buttons")
+_HEADINGS = {"h1", "h2", "h3"}
+# Text under these never shows up in get_text()
+_NO_TEXT = {"script", "style", "template"}
+
+# In-page twin of _extract_lxml: one TreeWalker pass over the live DOM
+_EVALUATE_JS = """
+(limits) => {
+  const cap = (name) => (limits && limits[name] != null ? limits[name] : Infinity);
+  const out = {headings: [], paragraphs: [], links: [], buttons: []};
+  const NO_TEXT = new Set(["SCRIPT", "STYLE", "TEMPLATE"]);
+  const text = (el) => {
+    const parts = [];
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT, {
+      acceptNode: (n) => {
+        for (let p = n.parentElement; p && p !== el.parentElement; p = p.parentElement) {
+          if (NO_TEXT.has(p.tagName)) return NodeFilter.FILTER_REJECT;
+        }
+        return NodeFilter.FILTER_ACCEPT;
+      },
+    });
+    for (let n = walker.nextNode(); n; n = walker.nextNode()) {
+      const t = n.nodeValue.trim();
+      if (t) parts.push(t);
+    }
+    return parts.join("");
+  };
+  const push = (name, value) => {
+    if (out[name].length < cap(name)) out[name].push(value);
+  };
+  const walker = document.createTreeWalker(document.documentElement, NodeFilter.SHOW_ELEMENT);
+  for (let el = walker.currentNode; el; el = walker.nextNode()) {
+    const tag = el.tagName;
+    if (tag === "H1" || tag === "H2" || tag === "H3") push("headings", text(el));
+    else if (tag === "P") push("paragraphs", text(el));
+    else if (tag === "A" && el.hasAttribute("href")) {
+      if (out.links.length < cap("links")) out.links.push({text: text(el), href: el.getAttribute("href")});
+    } else if (tag === "BUTTON") push("buttons", text(el));
+  }
+  const title = document.querySelector("title");
+  out.title = title ? title.textContent : "";
+  return out;
+}
+"""
+
+
+def _text(el) -> str:
+    """``get_text(strip=True)`` for an lxml element."""
+    parts = []
+    stack = [el]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            stripped = node.strip()
+            if stripped:
+                parts.append(stripped)
+            continue
+        # Children are pushed in reverse so text comes out in document order
+        if isinstance(node.tag, str) and node.tag not in _NO_TEXT:
+            for child in reversed(node):
+                if child.tail:
+                    stack.append(child.tail)
+                stack.append(child)
+            if node.text:
+                stack.append(node.text)
+    return "".join(parts)
 
 
-def scrape_page_structured(url: str) -> dict:
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        try:
-            page.goto(url, timeout=30000, wait_until='load')
-        except Exception as e:
-            browser.close()
-            return {"error": f"Failed to load page: {str(e)}"}
+def _result(url: str, title: str, fields: dict) -> dict:
+    return {
+        "url": url,
+        "title": title,
+        "headings": fields["headings"],
+        "paragraphs": fields["paragraphs"],
+        "links": fields["links"],
+        "buttons": fields["buttons"],
+    }
 
-        html = page.content()
-        browser.close()
 
+def _extract_lxml(html: str, url: str, limits: dict | None = None) -> dict:
+    limits = limits or {}
+    fields = {name: [] for name in LIST_FIELDS}
+    caps = {name: limits.get(name) for name in LIST_FIELDS}
+
+    def room(name: str) -> bool:
+        return caps[name] is None or len(fields[name]) < caps[name]
+
+    try:
+        tree = lxml_html.fromstring(html)
+    except (ValueError, etree.ParserError):
+        return _result(url, "", fields)
+
+    title = ""
+    for el in tree.iter("title", "h1", "h2", "h3", "p", "a", "button"):
+        tag = el.tag
+        if tag in _HEADINGS:
+            if room("headings"):
+                fields["headings"].append(_text(el))
+        elif tag == "p":
+            if room("paragraphs"):
+                fields["paragraphs"].append(_text(el))
+        elif tag == "a":
+            href = el.get("href")
+            if href is not None and room("links"):
+                fields["links"].append({"text": _text(el), "href": href})
+        elif tag == "button":
+            if room("buttons"):
+                fields["buttons"].append(_text(el))
+        elif tag == "title" and not title:
+            title = el.text or ""
+    return _result(url, title, fields)
+
+
+def _extract_soup(html: str, url: str, limits: dict | None = None) -> dict:
     soup = BeautifulSoup(html, "html.parser")
 
     # Extract main elements
@@ -29,11 +157,33 @@ def scrape_page_structured(url: str) -> dict:
     ]
     buttons = [btn.get_text(strip=True) for btn in soup.find_all('button')]
 
-    return {
-        "url": url,
-        "title": page_title,
-        "headings": headings,
-        "paragraphs": paragraphs,
-        "links": links,
-        "buttons": buttons
-    }
+    fields = {"headings": headings, "paragraphs": paragraphs, "links": links, "buttons": buttons}
+    for name, cap in (limits or {}).items():
+        if name in fields and cap is not None:
+            fields[name] = fields[name][:cap]
+    return _result(url, page_title, fields)
+
+
+def extract_structured(html: str, url: str, limits: dict | None = None, mode: str = "lxml") -> dict:
+    """Extract from already-fetched HTML (``"lxml"`` or ``"soup"``)."""
+    if mode == "soup":
+        return _extract_soup(html, url, limits)
+    return _extract_lxml(html, url, limits)
+
+
+def scrape_page_structured(url: str, limits: dict | None = None, mode: str | None = None) -> dict:
+    mode = mode or getattr(settings, "PAGESCRAPER_MODE", "evaluate")
+    if limits is None:
+        limits = getattr(settings, "PAGESCRAPER_FIELD_LIMITS", None)
+
+    # Only runs if the page needs the browser tier
+    in_page = (lambda page: page.evaluate(_EVALUATE_JS, limits or {})) if mode == "evaluate" else None
+    res = get_fetcher().fetch(url, in_page=in_page)
+    if not res.ok:
+        PAGES_SCRAPED.inc(mode=mode, outcome="error")
+        return {"error": f"Failed to load page: {res.error or 'no content'}"}
+    PAGES_SCRAPED.inc(mode=mode, outcome=res.tier)
+    if res.data is not None:
+        return _result(url, res.data["title"], res.data)
+    with stage("extract"):
+        return extract_structured(res.html, url, limits, "soup" if mode == "soup" else "lxml")
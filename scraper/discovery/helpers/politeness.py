@@ -0,0 +1,258 @@
+# scraper/discovery/helpers/politeness.py
+
+"""
+Domain-aware politeness for the crawler path.
+
+• One token bucket per host (requests/second + burst).
+• robots.txt fetched once per origin and cached with a TTL; its
+  Crawl-delay, when present, caps that host's bucket rate.
+• 429/503 responses put the host into backoff (Retry-After if given,
+  otherwise exponential) and halve its rate; successes recover it.
+
+Everything is non-blocking per host: the scheduler only answers "how long
+until this host may be hit again", so the crawler can keep fetching other
+hosts while one is throttled. Callers that do wait (``acquire``) pass a
+``max_wait`` and skip the host when its backoff runs longer than that.
+"""
+
+import asyncio
+import logging
+import time
+import urllib.robotparser
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import httpx
+from django.conf import settings
+
+from discovery.helpers.http_client import USER_AGENT, get_async_client
+from discovery.helpers.urls import url_host
+
+logger = logging.getLogger("scraper")
+
+BACKOFF_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """Classic token bucket; ``rate`` tokens/second, up to ``burst`` saved."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_in(self, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+
+@dataclass
+class _HostState:
+    bucket: TokenBucket
+    base_rate: float
+    backoff_until: float = 0.0
+    backoff_s: float = 0.0
+    crawl_delay: float | None = None
+    throttled: int = 0
+
+
+@dataclass
+class _RobotsEntry:
+    parser: urllib.robotparser.RobotFileParser
+    expires: float
+
+
+def _retry_after_seconds(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class PolitenessScheduler:
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 2.0,
+        robots_ttl: float = 3600,
+        min_backoff: float = 5.0,
+        max_backoff: float = 300.0,
+        user_agent: str = USER_AGENT,
+        client: httpx.AsyncClient | None = None,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.robots_ttl = robots_ttl
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.user_agent = user_agent
+        self._client = client
+        self._hosts: dict[str, _HostState] = {}
+        self._robots: dict[str, _RobotsEntry] = {}
+        self._robots_inflight: dict[str, asyncio.Future] = {}
+
+    # ── per-host rate ───────────────────────────────────────────
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(
+                bucket=TokenBucket(self.rate, self.burst), base_rate=self.rate
+            )
+        return state
+
+    def ready_in(self, url_or_host: str) -> float:
+        """Seconds until ``host`` may be requested again (0 = now)."""
+        host = url_host(url_or_host) if "://" in url_or_host else url_or_host
+        state = self._state(host)
+        now = time.monotonic()
+        return max(state.backoff_until - now, state.bucket.ready_in(now), 0.0)
+
+    def reserve(self, url: str) -> None:
+        """Consume one token for ``url``'s host. Call once ``ready_in`` is 0."""
+        self._state(url_host(url)).bucket.take()
+
+    async def acquire(self, url: str, max_wait: float | None = None) -> bool:
+        """
+        Wait until ``url``'s host is ready, then reserve a token. False,
+        without waiting or reserving, if that would take over ``max_wait``
+        seconds in total.
+        """
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while (delay := self.ready_in(url)) > 0:
+            if deadline is not None and time.monotonic() + delay > deadline:
+                logger.info("[politeness] %s not ready for %.1fs; skipped", url_host(url), delay)
+                return False
+            await asyncio.sleep(delay)
+        self.reserve(url)
+        return True
+
+    def record_response(self, url: str, status: int, retry_after: str | None = None) -> None:
+        """Adapt the host's pace to how it responded."""
+        state = self._state(url_host(url))
+        bucket = state.bucket
+        if status in BACKOFF_STATUSES:
+            state.throttled += 1
+            state.backoff_s = min(
+                self.max_backoff, max(self.min_backoff, state.backoff_s * 2)
+            )
+            wait = _retry_after_seconds(retry_after)
+            wait = state.backoff_s if wait is None else min(wait, self.max_backoff)
+            state.backoff_until = time.monotonic() + wait
+            bucket.rate = max(bucket.rate / 2, 0.05)
+            logger.info(
+                "[politeness] %s answered %d; backing off %.1fs (rate %.2f/s)",
+                url_host(url),
+                status,
+                wait,
+                bucket.rate,
+            )
+        elif status and status < 400:
+            # Additive recovery towards the configured (or Crawl-delay) rate
+            state.backoff_s = state.backoff_s / 2 if state.backoff_s > 1 else 0.0
+            ceiling = state.base_rate
+            if state.crawl_delay:
+                ceiling = min(ceiling, 1 / state.crawl_delay)
+            bucket.rate = min(ceiling, bucket.rate + 0.1 * ceiling)
+
+    # ── robots.txt ──────────────────────────────────────────────
+    async def _load_robots(self, origin: str) -> urllib.robotparser.RobotFileParser:
+        parser = urllib.robotparser.RobotFileParser(origin + "/robots.txt")
+        client = self._client or get_async_client()
+        try:
+            resp = await client.get(origin + "/robots.txt")
+            if resp.status_code in (401, 403):
+                # Like urllib.robotparser: a protected robots.txt means keep out
+                parser.disallow_all = True
+            elif resp.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(resp.text.splitlines())
+        except httpx.HTTPError as exc:
+            # Unreachable robots.txt: don't block the host on a network blip
+            logger.debug("[politeness] robots.txt fetch failed for %s: %s", origin, exc)
+            parser.allow_all = True
+        return parser
+
+    async def _robots_for(self, url: str) -> urllib.robotparser.RobotFileParser:
+        p = urlparse(url)
+        origin = f"{p.scheme}://{p.netloc}"
+        entry = self._robots.get(origin)
+        if entry is not None and entry.expires > time.monotonic():
+            return entry.parser
+
+        # Coalesce concurrent first fetches for the same origin
+        pending = self._robots_inflight.get(origin)
+        if pending is not None:
+            return await pending
+
+        fut = asyncio.get_running_loop().create_future()
+        self._robots_inflight[origin] = fut
+        try:
+            parser = await self._load_robots(origin)
+            self._robots[origin] = _RobotsEntry(parser, time.monotonic() + self.robots_ttl)
+
+            delay = parser.crawl_delay(self.user_agent)
+            state = self._state(url_host(url))
+            if delay:
+                state.crawl_delay = float(delay)
+                state.bucket.rate = min(state.bucket.rate, 1 / state.crawl_delay)
+                state.bucket.burst = 1
+            fut.set_result(parser)
+            return parser
+        except BaseException:
+            # Waiters fall back to allow-all rather than inheriting our error
+            fallback = urllib.robotparser.RobotFileParser()
+            fallback.allow_all = True
+            fut.set_result(fallback)
+            raise
+        finally:
+            self._robots_inflight.pop(origin, None)
+
+    async def allowed(self, url: str) -> bool:
+        parser = await self._robots_for(url)
+        return parser.can_fetch(self.user_agent, url)
+
+    def stats(self) -> dict:
+        return {
+            host: {
+                "rate": round(s.bucket.rate, 3),
+                "crawl_delay": s.crawl_delay,
+                "throttled": s.throttled,
+            }
+            for host, s in self._hosts.items()
+        }
+
+
+# ── per-process singleton ───────────────────────────────────────
+# Host state and robots.txt outlive a single crawl so back-to-back tasks in
+# the same worker stay polite to the same host.
+_scheduler: PolitenessScheduler | None = None
+
+
+def get_politeness_scheduler() -> PolitenessScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PolitenessScheduler(
+            rate=getattr(settings, "CRAWLER_HOST_RATE", 1.0),
+            burst=getattr(settings, "CRAWLER_HOST_BURST", 2.0),
+            robots_ttl=getattr(settings, "CRAWLER_ROBOTS_TTL_SECONDS", 3600),
+            max_backoff=getattr(settings, "CRAWLER_MAX_BACKOFF_SECONDS", 300),
+        )
+    return _scheduler
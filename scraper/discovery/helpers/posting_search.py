@@ -0,0 +1,223 @@
+# scraper/discovery/helpers/posting_search.py
+
+"""
+Full-text search over discovered postings, with keyset pagination.
+
+• Matching runs in the database's own full-text index: an FTS5 table
+  (``discovery_jobposting_fts``, porter-stemmed) on SQLite, a stored
+  ``search_vector`` tsvector column with a GIN index on Postgres. Both are
+  created in migration 0004 and kept current by the database itself
+  (FTS5 triggers / a generated column) as the pipeline upserts postings,
+  so there is no reindex job.
+• Title matches weigh more than description matches: bm25 column weights
+  on SQLite, setweight A/B on Postgres.
+• Pages are keyset-paginated: the cursor carries the last row's sort key
+  (score or first-seen time, plus id), and the next page starts strictly
+  after it. Page N costs the same as page 1, unlike OFFSET, and rows
+  written between requests don't shift pages.
+• Only searchable postings are indexed: removed ones and near-duplicates
+  (``duplicate_of``) drop out of the FTS5 table (partial GIN index on
+  Postgres). A plain query is then a scan of the full-text index alone;
+  the postings/company tables are joined only for the filters in use.
+
+Without ``q`` results are newest-discovered first.
+"""
+
+import base64
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from discovery.helpers.batches import normalize_company_key
+
+FTS_TABLE = "discovery_jobposting_fts"
+TITLE_WEIGHT = 5.0
+MAX_LIMIT = 100
+_TERM_RE = re.compile(r"\w+")
+
+
+class SearchError(ValueError):
+    """Bad search parameters (unparseable cursor or date, empty query terms)."""
+
+
+@dataclass
+class SearchQuery:
+    q: str = ""
+    company: str = ""
+    country: str = ""
+    platform: str = ""
+    posted_after: datetime | None = None
+    posted_before: datetime | None = None
+    limit: int = 20
+    cursor: str | None = None
+
+    @classmethod
+    def from_params(cls, params) -> "SearchQuery":
+        """Build from request GET params; raises SearchError on bad values."""
+
+        def when(name):
+            raw = params.get(name)
+            if not raw:
+                return None
+            try:
+                value = parse_datetime(raw) or parse_datetime(f"{raw}T00:00:00")
+            except ValueError:
+                value = None
+            if value is None:
+                raise SearchError(f"'{name}' must be an ISO date or datetime")
+            if settings.USE_TZ and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            return value
+
+        try:
+            limit = int(params.get("limit", 20))
+        except ValueError:
+            raise SearchError("'limit' must be an integer") from None
+        return cls(
+            q=params.get("q", "").strip(),
+            company=params.get("company", "").strip(),
+            country=params.get("country", "").strip(),
+            platform=params.get("platform", "").strip(),
+            posted_after=when("posted_after"),
+            posted_before=when("posted_before"),
+            limit=max(1, min(limit, MAX_LIMIT)),
+            cursor=params.get("cursor") or None,
+        )
+
+
+@dataclass
+class SearchPage:
+    ids: list[int] = field(default_factory=list)
+    scores: dict[int, float] = field(default_factory=dict)
+    next_cursor: str | None = None
+
+
+def encode_cursor(key, pk: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([key, pk]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        key, pk = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return key, int(pk)
+    except (ValueError, TypeError) as exc:
+        raise SearchError("invalid cursor") from exc
+
+
+def _terms(q: str) -> list[str]:
+    return _TERM_RE.findall(q.casefold())
+
+
+def _filters(query: SearchQuery, indexed: bool = False) -> tuple[list[str], list[str], list]:
+    """
+    (joins, where clauses, params) for ``query``'s filters against ``p``
+    (postings) and ``c`` (companies). ``indexed``: the rows come from the
+    full-text index, which already holds only searchable postings.
+    """
+    joins, where, params = [], [], []
+    if not indexed:
+        where += ["p.removed_at IS NULL", "p.duplicate_of_id IS NULL"]
+    if query.company or query.country:
+        joins.append("JOIN discovery_company c ON c.id = p.company_id")
+        name_key, country_key = normalize_company_key(query.company, query.country)
+        if query.company:
+            where.append("c.name_key = %s")
+            params.append(name_key)
+        if query.country:
+            where.append("c.country_key = %s")
+            params.append(country_key)
+    if query.platform:
+        where.append("p.platform = %s")
+        params.append(query.platform)
+    if query.posted_after:
+        where.append("p.posted_at >= %s")
+        params.append(connection.ops.adapt_datetimefield_value(query.posted_after))
+    if query.posted_before:
+        where.append("p.posted_at < %s")
+        params.append(connection.ops.adapt_datetimefield_value(query.posted_before))
+    return joins, where, params
+
+
+def _ranked_sql(query: SearchQuery, terms: list[str]) -> tuple[str, list]:
+    """Matching ids with a score where lower is better (so both backends sort ascending)."""
+    if connection.vendor == "postgresql":
+        # The partial GIN index only matches with the searchable predicate spelled out
+        joins, where, params = _filters(query)
+        text = " ".join(terms)
+        sql = (
+            "SELECT p.id, -ts_rank(p.search_vector, plainto_tsquery('english', %s)) AS score "
+            f"FROM discovery_jobposting p {' '.join(joins)} "
+            "WHERE p.search_vector @@ plainto_tsquery('english', %s)"
+        )
+        return " AND ".join([sql, *where]), [text, text, *params]
+
+    joins, where, params = _filters(query, indexed=True)
+    if where:
+        joins.insert(0, f"JOIN discovery_jobposting p ON p.id = {FTS_TABLE}.rowid")
+    # FTS5: quote every term so user input can't inject query syntax; terms are ANDed
+    match = " ".join(f'"{t}"' for t in terms)
+    sql = (
+        f"SELECT {FTS_TABLE}.rowid AS id, bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1.0) AS score "
+        f"FROM {FTS_TABLE} {' '.join(joins)} WHERE {FTS_TABLE} MATCH %s"
+    )
+    return " AND ".join([sql, *where]), [match, *params]
+
+
+def search_postings(query: SearchQuery) -> SearchPage:
+    """One page of posting ids for ``query`` (best match / newest first) and the next cursor."""
+    after = decode_cursor(query.cursor) if query.cursor else None
+    terms = _terms(query.q)
+    if query.q and not terms:
+        raise SearchError("'q' has no searchable terms")
+
+    if terms:
+        inner, params = _ranked_sql(query, terms)
+        sql = f"SELECT id, score FROM ({inner}) ranked"
+        if after is not None:
+            sql += " WHERE (score > %s OR (score = %s AND id > %s))"
+            params += [float(after[0]), float(after[0]), after[1]]
+        sql += " ORDER BY score, id LIMIT %s"
+    else:
+        joins, where, params = _filters(query)
+        if after is not None:
+            where.append("(p.first_seen_at < %s OR (p.first_seen_at = %s AND p.id < %s))")
+            try:
+                seen = parse_datetime(after[0])
+            except (TypeError, ValueError):
+                seen = None
+            if seen is None:
+                raise SearchError("invalid cursor")
+            if settings.USE_TZ and timezone.is_naive(seen):
+                seen = timezone.make_aware(seen, dt_timezone.utc)
+            seen = connection.ops.adapt_datetimefield_value(seen)
+            params += [seen, seen, after[1]]
+        sql = (
+            f"SELECT p.id, p.first_seen_at FROM discovery_jobposting p {' '.join(joins)} "
+            f"WHERE {' AND '.join(where)} ORDER BY p.first_seen_at DESC, p.id DESC LIMIT %s"
+        )
+    params.append(query.limit + 1)  # one extra row says whether there's a next page
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    page = SearchPage()
+    for pk, key in rows[:query.limit]:
+        page.ids.append(pk)
+        if terms:
+            page.scores[pk] = float(key)
+    if len(rows) > query.limit:
+        pk, key = rows[query.limit - 1]
+        page.next_cursor = encode_cursor(float(key) if terms else _isoformat(key), pk)
+    return page
+
+
+def _isoformat(value) -> str:
+    # Raw SQLite cursors may hand back the stored text rather than a datetime
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
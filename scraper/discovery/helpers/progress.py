@@ -0,0 +1,139 @@
+# scraper/discovery/helpers/progress.py
+
+"""
+Live progress for discovery jobs, pushed over Redis pub/sub and served as
+Server-Sent Events.
+
+• Tasks call ``publish(job_id, event, **data)``: the event gets the next
+  sequence number, is appended to a capped replay list and PUBLISHed on
+  the job's channel, all in one Lua script so concurrent publishers can't
+  interleave. Publishing never raises into the task.
+• ``stream(job_id)`` (async) subscribes first, then replays the list, then
+  follows the channel until a terminal event ("done" / "failed"), so a
+  client that connects late — or reconnects with ``Last-Event-ID`` — misses
+  nothing and sees nothing twice. Idle streams get keep-alive comments.
+
+Redis layout:
+    discovery:progress:<id>         pub/sub channel
+    discovery:progress:<id>:log     LIST of JSON events (capped, with TTL)
+    discovery:progress:<id>:seq     event sequence counter
+"""
+
+import json
+import logging
+import time
+from typing import AsyncIterator
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+from discovery.helpers.redis_client import get_redis
+
+logger = logging.getLogger("scraper")
+
+_PREFIX = "discovery:progress:"
+PROGRESS_TTL_SECONDS = 24 * 3600
+PROGRESS_MAX_EVENTS = 500
+KEEPALIVE_SECONDS = 15
+TERMINAL_EVENTS = {"done", "failed"}
+
+
+def _channel(job_id: str) -> str:
+    return _PREFIX + job_id
+
+
+# Numbering, logging and broadcasting in one script, so ids reach the
+# channel in order: KEYS seq, log, channel; ARGV event JSON without its id,
+# max events, TTL. The id is spliced in as the first field.
+_PUBLISH_LUA = """
+local seq = redis.call("INCR", KEYS[1])
+local payload = '{"id": ' .. seq .. ', ' .. string.sub(ARGV[1], 2)
+redis.call("RPUSH", KEYS[2], payload)
+redis.call("LTRIM", KEYS[2], -tonumber(ARGV[2]), -1)
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+redis.call("EXPIRE", KEYS[2], ARGV[3])
+redis.call("PUBLISH", KEYS[3], payload)
+return seq
+"""
+
+
+def publish(job_id: str | None, event: str, **data) -> None:
+    """Record and broadcast one progress event; a no-op without a job id."""
+    if not job_id:
+        return
+    try:
+        body = json.dumps({"event": event, "ts": time.time(), **data}, default=str)
+        get_redis().register_script(_PUBLISH_LUA)(
+            keys=[f"{_PREFIX}{job_id}:seq", f"{_PREFIX}{job_id}:log", _channel(job_id)],
+            args=[body, PROGRESS_MAX_EVENTS, PROGRESS_TTL_SECONDS],
+        )
+    except redis.RedisError as exc:
+        logger.warning("[progress] Could not publish %s for %s: %s", event, job_id, exc)
+
+
+def sse_frame(payload: dict) -> str:
+    return f"id: {payload['id']}\nevent: {payload['event']}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+async def stream(job_id: str, last_event_id: int = 0, timeout: float | None = None) -> AsyncIterator[str]:
+    """
+    SSE frames for ``job_id``: history after ``last_event_id``, then live
+    events until a terminal one or ``timeout`` seconds (PROGRESS_STREAM_TIMEOUT).
+    """
+    timeout = timeout or getattr(settings, "PROGRESS_STREAM_TIMEOUT", 15 * 60)
+    deadline = time.monotonic() + timeout
+    client = aioredis.Redis.from_url(settings.CELERY_BROKER_URL, decode_responses=True)
+    pubsub = client.pubsub()
+    seen = last_event_id
+    try:
+        await pubsub.subscribe(_channel(job_id))
+        for raw in await client.lrange(f"{_PREFIX}{job_id}:log", 0, -1):
+            payload = json.loads(raw)
+            if payload["id"] > seen:
+                seen = payload["id"]
+                yield sse_frame(payload)
+                if payload["event"] in TERMINAL_EVENTS:
+                    return
+
+        yield ": connected\n\n"
+        idle_since = time.monotonic()
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None:
+                if time.monotonic() - idle_since >= KEEPALIVE_SECONDS:
+                    idle_since = time.monotonic()
+                    yield ": keep-alive\n\n"
+                continue
+            payload = json.loads(message["data"])
+            if payload["id"] <= seen:
+                continue  # already replayed from the log
+            seen = payload["id"]
+            idle_since = time.monotonic()
+            yield sse_frame(payload)
+            if payload["event"] in TERMINAL_EVENTS:
+                return
+        yield sse_frame({"id": seen, "event": "timeout", "job_id": job_id})
+    except redis.RedisError as exc:
+        logger.warning("[progress] Stream for %s failed: %s", job_id, exc)
+        yield sse_frame({"id": seen, "event": "error", "error": "progress stream unavailable"})
+    finally:
+        # Also runs when the client disconnects (the generator is closed)
+        try:
+            await pubsub.aclose()
+            await client.aclose()
+        except redis.RedisError:
+            pass
+
+
+# ── Celery hook (connected in scraperproject/celery.py) ─────────
+def on_task_failure(sender=None, exception=None, kwargs=None, **extra) -> None:
+    """
+    A failed task ends its job's stream instead of leaving it hanging.
+    Tasks name the stream ``job_id``, or ``batch_id`` for bulk chunks; both
+    must be passed as keyword arguments to be seen here.
+    """
+    kwargs = kwargs or {}
+    job_id = kwargs.get("job_id") or kwargs.get("batch_id")
+    if job_id:
+        publish(job_id, "failed", task=getattr(sender, "name", None), error=str(exception))
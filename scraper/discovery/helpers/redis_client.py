@@ -0,0 +1,23 @@
+# scraper/discovery/helpers/redis_client.py
+
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis() -> redis.Redis:
+    """
+    Shared client for the Redis instance Celery already uses as its broker.
+    redis-py's connection pool is fork-aware, so one module-level client is
+    safe for both the web process and prefork workers.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.CELERY_BROKER_URL,
+            decode_responses=True,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+        )
+    return _client
@@ -0,0 +1,215 @@
+# scraper/discovery/helpers/render_profiles.py
+
+"""
+Render profiles for headless fetches: which requests a BrowserContext may
+make at all.
+
+• ``"text-only"`` (default) — aborts images, media, fonts and stylesheets,
+  plus anything going to analytics / ad / tag-manager / session-replay
+  hosts. DOM, first-party scripts and XHR still load, which is all SERP
+  parsing and listings discovery need.
+• ``"full"`` — no blocking; opt-in per host through
+  ``RENDER_FULL_PROFILE_HOSTS`` for sites that break under blocking.
+
+Blocking is done with ``context.route`` so it applies to every page of the
+context. Aborted requests are counted per resource type; since they never
+transfer, bytes saved are estimated from typical transfer sizes per type.
+Counters are flushed to a Redis hash shared by all workers.
+
+Redis layout:
+    discovery:render:stats  HASH of allowed / blocked[:<type>] / bytes_saved /
+                            contexts:<profile>
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+import redis
+from django.conf import settings
+
+from discovery.helpers.redis_client import get_redis
+from discovery.helpers.urls import url_host
+
+logger = logging.getLogger("scraper")
+
+_STATS_KEY = "discovery:render:stats"
+_FLUSH_INTERVAL_SECONDS = 10
+
+# Median transfer sizes (bytes) per resource type, for the saved estimate
+TYPICAL_BYTES = {
+    "image": 45_000,
+    "media": 400_000,
+    "font": 35_000,
+    "stylesheet": 25_000,
+    "script": 30_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "other": 10_000,
+}
+
+BLOCKED_HOST_SUFFIXES = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "connect.facebook.net",
+    "facebook.net",
+    "hotjar.com",
+    "fullstory.com",
+    "clarity.ms",
+    "segment.com",
+    "segment.io",
+    "mixpanel.com",
+    "amplitude.com",
+    "optimizely.com",
+    "newrelic.com",
+    "nr-data.net",
+    "bat.bing.com",
+    "snap.licdn.com",
+    "ads.linkedin.com",
+    "quantserve.com",
+    "scorecardresearch.com",
+    "taboola.com",
+    "outbrain.com",
+    "criteo.com",
+    "adroll.com",
+    "intercom.io",
+    "intercomcdn.com",
+    "onetrust.com",
+    "cookielaw.org",
+)
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str
+    blocked_types: frozenset = frozenset()
+    blocked_hosts: tuple = ()
+
+    def blocks(self, resource_type: str, host: str) -> bool:
+        if resource_type in self.blocked_types:
+            return True
+        # Walk the host's suffixes: "www.google-analytics.com" → "google-analytics.com" → …
+        labels = host.split(".")
+        return any(".".join(labels[i:]) in self.blocked_hosts for i in range(len(labels) - 1))
+
+
+PROFILES = {
+    "text-only": RenderProfile(
+        name="text-only",
+        blocked_types=frozenset({"image", "media", "font", "stylesheet"}),
+        blocked_hosts=BLOCKED_HOST_SUFFIXES,
+    ),
+    "full": RenderProfile(name="full"),
+}
+
+
+class RenderStats:
+    """Per-process request counters, flushed to Redis every few seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Counter = Counter()
+        self._pending: Counter = Counter()
+        self._flushed_at = time.monotonic()
+
+    def record(self, resource_type: str, blocked: bool) -> None:
+        with self._lock:
+            for counts in (self.totals, self._pending):
+                if blocked:
+                    counts[f"blocked:{resource_type}"] += 1
+                    counts["blocked"] += 1
+                    counts["bytes_saved"] += TYPICAL_BYTES.get(resource_type, TYPICAL_BYTES["other"])
+                else:
+                    counts["allowed"] += 1
+
+    def opened(self, profile: str) -> None:
+        with self._lock:
+            for counts in (self.totals, self._pending):
+                counts[f"contexts:{profile}"] += 1
+
+    def flush(self, force: bool = False) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            if not force and time.monotonic() - self._flushed_at < _FLUSH_INTERVAL_SECONDS:
+                return
+            pending, self._pending = self._pending, Counter()
+            self._flushed_at = time.monotonic()
+        try:
+            pipe = get_redis().pipeline()
+            for name, value in pending.items():
+                pipe.hincrby(_STATS_KEY, name, value)
+            pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("[render_profiles] Redis unavailable for stats: %s", exc)
+
+    def snapshot(self, shared: bool = True) -> dict:
+        with self._lock:
+            counts = dict(self.totals)
+        if shared:
+            try:
+                counts = {k: int(v) for k, v in get_redis().hgetall(_STATS_KEY).items()}
+            except redis.RedisError as exc:
+                logger.warning("[render_profiles] Redis unavailable for stats: %s", exc)
+        total = counts.get("allowed", 0) + counts.get("blocked", 0)
+        return {
+            "requests_allowed": counts.get("allowed", 0),
+            "requests_blocked": counts.get("blocked", 0),
+            "blocked_ratio": round(counts.get("blocked", 0) / total, 4) if total else 0.0,
+            "bytes_saved_estimate": counts.get("bytes_saved", 0),
+            "blocked_by_type": {
+                k.split(":", 1)[1]: v for k, v in counts.items() if k.startswith("blocked:")
+            },
+            "contexts_by_profile": {
+                k.split(":", 1)[1]: v for k, v in counts.items() if k.startswith("contexts:")
+            },
+        }
+
+
+render_stats = RenderStats()
+
+
+def get_profile(name: str | None = None) -> RenderProfile:
+    name = name or getattr(settings, "RENDER_PROFILE_DEFAULT", "text-only")
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown render profile {name!r}; expected one of {sorted(PROFILES)}")
+
+
+def profile_for_url(url: str) -> str:
+    """"full" for hosts opted out of blocking, else the default profile."""
+    host = url_host(url)
+    for suffix in getattr(settings, "RENDER_FULL_PROFILE_HOSTS", ()):
+        if host == suffix or host.endswith("." + suffix):
+            return "full"
+    return getattr(settings, "RENDER_PROFILE_DEFAULT", "text-only")
+
+
+def apply_profile(ctx, name: str | None = None) -> RenderProfile:
+    """Install ``name``'s request routing on a BrowserContext."""
+    profile = get_profile(name)
+
+    def handle(route):
+        request = route.request
+        blocked = profile.blocks(request.resource_type, url_host(request.url))
+        render_stats.record(request.resource_type, blocked)
+        try:
+            if blocked:
+                route.abort("blockedbyclient")
+            else:
+                route.continue_()
+        except Exception as exc:  # noqa: BLE001
+            # Page/context closed while the request was in flight
+            logger.debug("[render_profiles] route for %s failed: %s", request.url, exc)
+
+    render_stats.opened(profile.name)
+    if profile.blocked_types or profile.blocked_hosts:
+        ctx.route("**/*", handle)
+    return profile
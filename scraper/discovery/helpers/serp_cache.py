@@ -0,0 +1,184 @@
+# scraper/discovery/helpers/serp_cache.py
+
+"""
+TTL + LRU cache for stage-1 SERP results.
+
+Keyed by the normalized (company, country, query) tuple. Lives in the Redis
+instance already configured as ``CELERY_BROKER_URL`` so every worker shares
+it; falls back to a per-process LRU when Redis is unreachable.
+
+Redis layout:
+    discovery:serp:<sha1>   JSON list of URLs, SETEX'd with the TTL
+    discovery:serp:lru      ZSET of cache keys scored by last access, trimmed
+                            to SERP_CACHE_MAX_ENTRIES (oldest evicted first)
+    discovery:serp:stats    HASH of hits / misses across all workers
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+
+from discovery.helpers.redis_client import get_redis
+
+logger = logging.getLogger("scraper")
+
+_PREFIX = "discovery:serp:"
+_LRU_KEY = _PREFIX + "lru"
+_STATS_KEY = _PREFIX + "stats"
+_REDIS_RETRY_SECONDS = 30
+
+
+def _norm(value: str) -> str:
+    return " ".join(value.split()).casefold()
+
+
+def cache_key(company: str, country: str, query: str) -> str:
+    raw = "\x1f".join((_norm(company), _norm(country), _norm(query)))
+    return _PREFIX + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _LocalLRU:
+    """In-process fallback: OrderedDict LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, list]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                self._data.pop(key, None)
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: list, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class SerpCache:
+    def __init__(self, ttl: int, max_entries: int, backend: str = "redis"):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.backend = backend
+        self._local = _LocalLRU(max_entries)
+        self._redis_down_until = 0.0
+
+    def _use_redis(self) -> bool:
+        # After a failure, stay on the local LRU for a while instead of
+        # paying a connect timeout on every lookup.
+        return self.backend == "redis" and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, exc: Exception) -> None:
+        logger.warning("[serp_cache] Redis unavailable, using local: %s", exc)
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+    # ── redis path ──────────────────────────────────────────────
+    def _redis_get(self, key: str):
+        r = get_redis()
+        raw = r.get(key)
+        pipe = r.pipeline()
+        if raw is None:
+            pipe.zrem(_LRU_KEY, key)
+            pipe.hincrby(_STATS_KEY, "misses", 1)
+        else:
+            pipe.zadd(_LRU_KEY, {key: time.time()})
+            pipe.hincrby(_STATS_KEY, "hits", 1)
+        pipe.execute()
+        return None if raw is None else json.loads(raw)
+
+    def _redis_set(self, key: str, value: list) -> None:
+        r = get_redis()
+        pipe = r.pipeline()
+        pipe.set(key, json.dumps(value), ex=self.ttl)
+        pipe.zadd(_LRU_KEY, {key: time.time()})
+        pipe.zcard(_LRU_KEY)
+        *_, size = pipe.execute()
+
+        overflow = size - self.max_entries
+        if overflow > 0:
+            evicted = [k for k, _ in r.zpopmin(_LRU_KEY, overflow)]
+            if evicted:
+                r.delete(*evicted)
+
+    # ── public API ──────────────────────────────────────────────
+    def get(self, company: str, country: str, query: str) -> list | None:
+        if self.backend == "off":
+            return None
+        key = cache_key(company, country, query)
+        if self._use_redis():
+            try:
+                return self._redis_get(key)
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+
+        value = self._local.get(key)
+        if value is None:
+            self._local.misses += 1
+        else:
+            self._local.hits += 1
+        return value
+
+    def set(self, company: str, country: str, query: str, urls: list) -> None:
+        if self.backend == "off":
+            return
+        key = cache_key(company, country, query)
+        if self._use_redis():
+            try:
+                self._redis_set(key, urls)
+                return
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+        self._local.set(key, urls, self.ttl)
+
+    def stats(self) -> dict:
+        hits, misses = self._local.hits, self._local.misses
+        entries = len(self._local._data)
+        if self._use_redis():
+            try:
+                r = get_redis()
+                shared = r.hgetall(_STATS_KEY)
+                hits += int(shared.get("hits", 0))
+                misses += int(shared.get("misses", 0))
+                entries += r.zcard(_LRU_KEY)
+            except redis.RedisError as exc:
+                logger.warning("[serp_cache] Redis unavailable for stats: %s", exc)
+
+        lookups = hits + misses
+        return {
+            "backend": self.backend,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+        }
+
+
+_cache: SerpCache | None = None
+
+
+def get_serp_cache() -> SerpCache:
+    global _cache
+    if _cache is None:
+        _cache = SerpCache(
+            ttl=getattr(settings, "SERP_CACHE_TTL_SECONDS", 24 * 3600),
+            max_entries=getattr(settings, "SERP_CACHE_MAX_ENTRIES", 10_000),
+            backend=getattr(settings, "SERP_CACHE_BACKEND", "redis"),
+        )
+    return _cache
@@ -0,0 +1,256 @@
+# scraper/discovery/helpers/snapshots.py
+
+"""
+Optional debug snapshots of fetched pages (replaces the ``debug_*.html``
+files stage 1 used to write into the worker's working directory).
+
+• Content-addressed: a body is stored once under the SHA-256 of its bytes,
+  zstd-compressed, at ``<root>/objects/<2 hex>/<sha256>.html.zst``; every
+  capture of it adds a row (kind, url, label, time) to a small SQLite index
+  next to the objects.
+• Off the hot path: ``capture`` only samples and enqueues; hashing,
+  compression and disk I/O happen on a background thread. When the queue
+  is full the snapshot is dropped, never waited for.
+• Sampling per kind (``SNAPSHOT_SAMPLE_RATES``, e.g. ``{"serp": 0.01}``);
+  failures (a SERP with no results) use ``SNAPSHOT_FAILURE_SAMPLE_RATE``.
+• Bounded: objects older than ``SNAPSHOT_MAX_AGE_SECONDS`` are evicted, then
+  the oldest ones until the store is under ``SNAPSHOT_MAX_BYTES``.
+
+Needs the ``zstandard`` package; without it snapshots are disabled.
+"""
+
+import atexit
+import hashlib
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger("scraper")
+
+_SUFFIX = ".html.zst"
+_EVICT_EVERY = 50  # writes between age sweeps
+
+
+class SnapshotStore:
+    def __init__(
+        self,
+        root: str | os.PathLike,
+        sample_rates: dict[str, float] | None = None,
+        failure_sample_rate: float = 1.0,
+        max_bytes: int = 256 * 2**20,
+        max_age_seconds: int = 7 * 24 * 3600,
+        level: int = 6,
+        queue_size: int = 256,
+    ):
+        import zstandard
+
+        self.root = Path(root)
+        self.sample_rates = sample_rates or {}
+        self.failure_sample_rate = failure_sample_rate
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._bytes: int | None = None  # on-disk total, scanned on first write
+        self._writes = 0
+        self.counts = dict.fromkeys(("sampled_out", "queued", "dropped", "written", "deduped", "evicted"), 0)
+
+    # ── producer side ───────────────────────────────────────────
+    def capture(self, kind: str, url: str, body: str, label: str = "", failed: bool = False) -> bool:
+        """Queue ``body`` for storage if sampled in; never blocks."""
+        rate = self.failure_sample_rate if failed else self.sample_rates.get(kind, 0.0)
+        if rate <= 0 or random.random() >= rate:
+            self.counts["sampled_out"] += 1
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((kind, url, label, body, time.time()))
+        except queue.Full:
+            self.counts["dropped"] += 1
+            return False
+        self.counts["queued"] += 1
+        return True
+
+    def _ensure_worker(self) -> None:
+        # Threads don't survive fork: start one per process
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._conn, self._bytes = None, None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out what's queued, then stop the writer thread."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+        self._thread = None
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until everything queued so far is on disk (tests, shutdown)."""
+        if self._thread is not None:
+            deadline = time.monotonic() + timeout
+            while self._queue.unfinished_tasks and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+    # ── writer thread ───────────────────────────────────────────
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("[snapshots] Write failed: %s", exc)
+            finally:
+                self._queue.task_done()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.root / "index.sqlite3", timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " key TEXT NOT NULL, kind TEXT NOT NULL, url TEXT NOT NULL,"
+                " label TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS snapshots_url ON snapshots (url, created_at)")
+            self._conn = conn
+        return self._conn
+
+    def _path(self, key: str) -> Path:
+        return self.root / "objects" / key[:2] / f"{key}{_SUFFIX}"
+
+    def _objects(self) -> list[tuple[float, int, Path]]:
+        out = []
+        for path in (self.root / "objects").glob(f"*/*{_SUFFIX}"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+        return out
+
+    def _write(self, kind: str, url: str, label: str, body: str, created_at: float) -> None:
+        raw = body.encode("utf-8")
+        key = hashlib.sha256(raw).hexdigest()
+        path = self._path(key)
+        if self._bytes is None:
+            self._bytes = sum(size for _, size, _ in self._objects())
+
+        if path.exists():
+            # Same content again: refresh its age instead of storing a copy
+            os.utime(path)
+            self.counts["deduped"] += 1
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(self._compressor.compress(raw))
+            tmp.replace(path)
+            self._bytes += path.stat().st_size
+            self.counts["written"] += 1
+
+        db = self._db()
+        with db:
+            db.execute(
+                "INSERT INTO snapshots (key, kind, url, label, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, url, label, created_at),
+            )
+
+        self._writes += 1
+        if self._bytes > self.max_bytes or self._writes % _EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop aged-out objects, then the oldest until under ``max_bytes``."""
+        objects = sorted(self._objects())
+        cutoff = time.time() - self.max_age_seconds
+        total = sum(size for _, size, _ in objects)
+        removed = []
+        for mtime, size, path in objects:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed.append(path.name[: -len(_SUFFIX)])
+        self._bytes = total
+        if removed:
+            db = self._db()
+            with db:
+                db.executemany("DELETE FROM snapshots WHERE key = ?", [(k,) for k in removed])
+                db.execute("DELETE FROM snapshots WHERE created_at < ?", (cutoff,))
+            self.counts["evicted"] += len(removed)
+            logger.info("[snapshots] Evicted %d object(s), %d bytes kept", len(removed), total)
+        return len(removed)
+
+    # ── reading ─────────────────────────────────────────────────
+    def find(self, url: str | None = None, kind: str | None = None, limit: int = 20) -> list[dict]:
+        """Newest captures first, optionally filtered by exact url / kind."""
+        sql, args = "SELECT key, kind, url, label, created_at FROM snapshots WHERE 1=1", []
+        if url:
+            sql, args = sql + " AND url = ?", args + [url]
+        if kind:
+            sql, args = sql + " AND kind = ?", args + [kind]
+        conn = sqlite3.connect(self.root / "index.sqlite3", timeout=10)
+        try:
+            rows = conn.execute(sql + " ORDER BY created_at DESC LIMIT ?", args + [limit]).fetchall()
+        finally:
+            conn.close()
+        return [dict(zip(("key", "kind", "url", "label", "created_at"), row)) for row in rows]
+
+    def read(self, key: str) -> str | None:
+        try:
+            data = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        return self._decompressor.decompress(data).decode("utf-8")
+
+
+# ── per-process singleton ───────────────────────────────────────
+_store: SnapshotStore | None = None
+_store_failed = False
+
+
+def get_snapshot_store() -> SnapshotStore | None:
+    """The configured store, or None when SNAPSHOT_DIR is unset / zstandard is missing."""
+    global _store, _store_failed
+    root = getattr(settings, "SNAPSHOT_DIR", None)
+    if root is None or _store_failed:
+        return None
+    if _store is None:
+        try:
+            _store = SnapshotStore(
+                root,
+                sample_rates=getattr(settings, "SNAPSHOT_SAMPLE_RATES", None),
+                failure_sample_rate=getattr(settings, "SNAPSHOT_FAILURE_SAMPLE_RATE", 1.0),
+                max_bytes=getattr(settings, "SNAPSHOT_MAX_BYTES", 256 * 2**20),
+                max_age_seconds=getattr(settings, "SNAPSHOT_MAX_AGE_SECONDS", 7 * 24 * 3600),
+            )
+        except ImportError as exc:
+            logger.warning("[snapshots] Disabled: %s", exc)
+            _store_failed = True
+            return None
+    return _store
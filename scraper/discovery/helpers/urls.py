@@ -0,0 +1,60 @@
+# scraper/discovery/helpers/urls.py
+
+import logging
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+logger = logging.getLogger("scraper")
+
+
+# ── helper: canonicalize host/path ───────────────────────────
+def normalize_url(u: str) -> str:
+    """
+    Canonical form used for dedupe everywhere in discovery: drops "www.",
+    query, fragment and trailing slash. Scheme is kept.
+    """
+    try:
+        p = urlparse(u)
+        host = p.netloc.replace("www.", "")
+        path = p.path.rstrip("/")
+        return urlunparse((p.scheme, host, path, "", "", ""))
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("[normalize_url] Failed (%s): %s", exc, u)
+        return u
+
+
+def url_host(u: str) -> str:
+    """Lower-cased host without port or leading "www."."""
+    host = (urlparse(u).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = frozenset({
+    "gclid", "fbclid", "mc_cid", "mc_eid", "ref", "referrer", "source",
+    "src", "gh_src", "lever-source", "lever-origin", "trk", "trackingid",
+})
+
+
+def canonical_job_url(u: str) -> str:
+    """
+    Identity of a single posting. Unlike ``normalize_url`` this keeps
+    meaningful query params (``?gh_jid=123`` *is* the job) and only strips
+    tracking ones, sorting the rest so order doesn't matter.
+    """
+    try:
+        p = urlparse(u)
+        host = (p.hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        if p.port:
+            host = f"{host}:{p.port}"
+        query = sorted(
+            (k, v)
+            for k, v in parse_qsl(p.query, keep_blank_values=True)
+            if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_")
+        )
+        path = p.path.rstrip("/") or "/"
+        return urlunparse(((p.scheme or "https").lower(), host, path, "", urlencode(query), ""))
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("[canonical_job_url] Failed (%s): %s", exc, u)
+        return u
@@ -0,0 +1,297 @@
+# scraper/discovery/helpers/vector_index.py
+
+"""
+Persistent, memory-mapped index of crawled-page chunk embeddings.
+
+Replaces the throwaway tensor ``findJobListingsPageRAG`` builds per run:
+once a domain has been crawled and embedded, ranking its pages again is a
+scan over a few mmapped arrays instead of a re-crawl + re-encode.
+
+Layout of ``VECTOR_INDEX_DIR``:
+
+    manifest.json          segment list, dim, dtype (replaced atomically)
+    <seg>.vec.npy          (rows, dim) float16, or int8 …
+    <seg>.scale.npy        … with a float32 per-row scale
+    <seg>.rows.npy         (rows,) host hash, owner hash, url slot, generation
+    <seg>.urls.json        url table the ``url`` slots point into
+
+• ``add`` writes one new immutable segment (append-only); rows for a URL
+  already in the index supersede the older ones by generation.
+• ``compact`` merges every segment into one and drops superseded rows; it
+  runs automatically once more than ``compact_after`` segments exist.
+• Writers serialize on an flock. Readers never lock: segments are only
+  ever created or unlinked, and an unlinked file stays readable through
+  an existing mmap.
+• Only the row table is scanned; vectors are read for matching rows only,
+  so resident memory stays proportional to the hit set, not the index.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from discovery.helpers.urls import url_host
+
+logger = logging.getLogger("scraper")
+
+ROW_DTYPE = np.dtype([("host", "<u8"), ("owner", "<u8"), ("url", "<u4"), ("gen", "<u8")])
+DTYPES = ("float16", "int8")
+
+
+def key_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """float32 rows → stored form. int8 is symmetric with one scale per row."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scale = np.abs(vectors).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    return np.round(vectors / scale[:, None]).astype(np.int8), scale.astype(np.float32)
+
+
+class _Segment:
+    def __init__(self, root: Path, name: str):
+        self.name = name
+        self.vec = np.load(root / f"{name}.vec.npy", mmap_mode="r")
+        scale_path = root / f"{name}.scale.npy"
+        self.scale = np.load(scale_path, mmap_mode="r") if scale_path.exists() else None
+        self.rows = np.load(root / f"{name}.rows.npy", mmap_mode="r")
+        self.urls = json.loads((root / f"{name}.urls.json").read_text(encoding="utf-8"))
+
+    def scores(self, idx: np.ndarray, query_vec: np.ndarray) -> np.ndarray:
+        out = np.asarray(self.vec[idx], dtype=np.float32) @ query_vec
+        if self.scale is not None:
+            out *= self.scale[idx]
+        return out
+
+
+class VectorIndex:
+    def __init__(self, root: str | os.PathLike, dtype: str = "int8", compact_after: int = 32):
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}")
+        self.root = Path(root)
+        self.dtype = dtype
+        self.compact_after = compact_after
+        self._manifest: dict | None = None
+        self._manifest_mtime: int | None = None
+        self._segments: dict[str, _Segment] = {}
+
+    # ── manifest / segments ─────────────────────────────────────
+    @property
+    def _manifest_path(self) -> Path:
+        return self.root / "manifest.json"
+
+    def _load_manifest(self) -> dict:
+        try:
+            mtime = self._manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {"dim": None, "dtype": self.dtype, "segments": [], "next_gen": 1}
+        if self._manifest is None or mtime != self._manifest_mtime:
+            self._manifest = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            self._manifest_mtime = mtime
+            live = set(self._manifest["segments"])
+            self._segments = {n: s for n, s in self._segments.items() if n in live}
+        return self._manifest
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp = self.root / f"manifest.{uuid.uuid4().hex}.tmp"
+        tmp.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp, self._manifest_path)
+
+    def _segment(self, name: str) -> _Segment:
+        seg = self._segments.get(name)
+        if seg is None:
+            seg = self._segments[name] = _Segment(self.root, name)
+        return seg
+
+    @contextmanager
+    def _writer(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._manifest_mtime = None  # re-read under the lock
+                yield self._load_manifest()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write_segment(self, vectors: np.ndarray, rows: np.ndarray, urls: list[str]) -> str:
+        name = f"seg-{uuid.uuid4().hex[:12]}"
+        vec, scale = quantize(vectors, self.dtype)
+        np.save(self.root / f"{name}.vec.npy", vec)
+        if scale is not None:
+            np.save(self.root / f"{name}.scale.npy", scale)
+        np.save(self.root / f"{name}.rows.npy", rows)
+        (self.root / f"{name}.urls.json").write_text(json.dumps(urls), encoding="utf-8")
+        return name
+
+    def _unlink_segment(self, name: str) -> None:
+        for suffix in (".vec.npy", ".scale.npy", ".rows.npy", ".urls.json"):
+            (self.root / f"{name}{suffix}").unlink(missing_ok=True)
+
+    # ── write path ──────────────────────────────────────────────
+    def add(self, owner: str, urls: list[str], vectors: np.ndarray) -> None:
+        """
+        Index one crawl: ``urls[i]`` is the page chunk ``vectors[i]`` came
+        from. Every page in ``urls`` replaces what was indexed for it before.
+        """
+        if len(urls) == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        table = list(dict.fromkeys(urls))
+        slot = {u: i for i, u in enumerate(table)}
+
+        with self._writer() as manifest:
+            if manifest["dim"] is None:
+                manifest["dim"] = int(vectors.shape[1])
+            elif manifest["dim"] != vectors.shape[1]:
+                raise ValueError(
+                    f"vector dim {vectors.shape[1]} != index dim {manifest['dim']}"
+                )
+            gen = manifest["next_gen"]
+            rows = np.empty(len(urls), dtype=ROW_DTYPE)
+            rows["host"] = [key_hash(url_host(u)) for u in urls]
+            rows["owner"] = key_hash(owner)
+            rows["url"] = [slot[u] for u in urls]
+            rows["gen"] = gen
+
+            name = self._write_segment(vectors, rows, table)
+            manifest = {**manifest, "segments": [*manifest["segments"], name], "next_gen": gen + 1}
+            self._write_manifest(manifest)
+            needs_compaction = len(manifest["segments"]) > self.compact_after
+
+        if needs_compaction:
+            self.compact()
+
+    def compact(self) -> None:
+        """Merge all segments into one, keeping only the newest rows per URL."""
+        with self._writer() as manifest:
+            names = list(manifest["segments"])
+            if len(names) <= 1:
+                return
+            segments = [self._segment(n) for n in names]
+
+            newest: dict[tuple[int, str], int] = {}
+            for seg in segments:
+                for row in seg.rows:
+                    key = (int(row["owner"]), seg.urls[row["url"]])
+                    newest[key] = max(newest.get(key, 0), int(row["gen"]))
+
+            vectors, rows, urls, slot = [], [], [], {}
+            for seg in segments:
+                keep = [
+                    i
+                    for i, row in enumerate(seg.rows)
+                    if newest[(int(row["owner"]), seg.urls[row["url"]])] == int(row["gen"])
+                ]
+                if not keep:
+                    continue
+                keep = np.asarray(keep)
+                vec = np.asarray(seg.vec[keep], dtype=np.float32)
+                if seg.scale is not None:
+                    vec *= np.asarray(seg.scale[keep])[:, None]
+                part = np.array(seg.rows[keep])
+                for j, old in enumerate(part["url"]):
+                    url = seg.urls[old]
+                    if url not in slot:
+                        slot[url] = len(urls)
+                        urls.append(url)
+                    part["url"][j] = slot[url]
+                vectors.append(vec)
+                rows.append(part)
+
+            merged = []
+            if rows:
+                merged = [self._write_segment(np.concatenate(vectors), np.concatenate(rows), urls)]
+            self._write_manifest({**manifest, "segments": merged})
+
+        for name in names:
+            self._segments.pop(name, None)
+            self._unlink_segment(name)
+        logger.info(
+            "[vector_index] Compacted %d segments → %d rows",
+            len(names),
+            sum(len(r) for r in rows),
+        )
+
+    # ── read path ───────────────────────────────────────────────
+    def _matches(self, owner: str, hosts) -> list[tuple[_Segment, np.ndarray]]:
+        manifest = self._load_manifest()
+        owner_h = np.uint64(key_hash(owner))
+        host_h = np.array([key_hash(h) for h in hosts], dtype=np.uint64)
+        out = []
+        for name in manifest["segments"]:
+            try:
+                seg = self._segment(name)
+            except FileNotFoundError:
+                # Compacted away since we read the manifest; next call reloads it
+                self._manifest_mtime = None
+                continue
+            mask = (seg.rows["owner"] == owner_h) & np.isin(seg.rows["host"], host_h)
+            idx = np.flatnonzero(mask)
+            if idx.size:
+                out.append((seg, idx))
+        return out
+
+    def contains(self, owner: str, hosts) -> bool:
+        return bool(self._matches(owner, hosts))
+
+    def search(
+        self, query_vec: np.ndarray, owner: str, hosts, k: int = 3, min_score: float = 0.0
+    ) -> list[tuple[str, float]]:
+        """
+        Best ``k`` page URLs on ``hosts`` indexed for ``owner``, scored by
+        their best chunk against ``query_vec``.
+        """
+        query_vec = np.asarray(query_vec, dtype=np.float32)
+        best: dict[str, tuple[int, float]] = {}  # url → (generation, score)
+        for seg, idx in self._matches(owner, hosts):
+            scores = seg.scores(idx, query_vec)
+            rows = seg.rows[idx]
+            for url_slot, gen, score in zip(rows["url"], rows["gen"], scores):
+                url, gen, score = seg.urls[url_slot], int(gen), float(score)
+                prev = best.get(url)
+                if prev is None or gen > prev[0] or (gen == prev[0] and score > prev[1]):
+                    best[url] = (gen, score)
+
+        ranked = sorted(
+            ((url, score) for url, (_, score) in best.items() if score >= min_score),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        return ranked[:k]
+
+    def stats(self) -> dict:
+        manifest = self._load_manifest()
+        rows = sum(len(self._segment(n).rows) for n in manifest["segments"])
+        return {"segments": len(manifest["segments"]), "rows": rows, "dtype": self.dtype}
+
+
+# ── per-process singleton ───────────────────────────────────────
+_index: VectorIndex | None = None
+
+
+def get_vector_index() -> VectorIndex | None:
+    """The configured index, or None when VECTOR_INDEX_DIR is unset."""
+    global _index
+    root = getattr(settings, "VECTOR_INDEX_DIR", None)
+    if root is None:
+        return None
+    if _index is None:
+        _index = VectorIndex(
+            root,
+            dtype=getattr(settings, "VECTOR_INDEX_DTYPE", "int8"),
+            compact_after=getattr(settings, "VECTOR_INDEX_COMPACT_AFTER", 32),
+        )
+    return _index
@@ -0,0 +1,244 @@
+# scraper/discovery/helpers/verify.py
+
+"""
+Candidate listings-page verification (production version of
+``verifyOrFollowSearch`` in testscripts/test_crawl4ai.py).
+
+• Candidates are fetched concurrently on the pooled async client, through
+  the crawler's politeness scheduler.
+• Each page is first scored by a structural heuristic — repeated job-card
+  DOM patterns, job links, title- and location-like texts. Clear
+  listings pages are accepted and clear non-listings rejected without
+  touching the model.
+• Only ambiguous pages reach the LLM (helpers/llm.py), in batched calls
+  that stop at the first positive chunk. Chunks are cut from the DOM
+  (helpers/dom_chunker.py): no nav/footer text, job cards kept whole.
+• A page that isn't a listings page but has a job search form gets one
+  more try on the form's empty-query results URL.
+"""
+
+import asyncio
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from itertools import islice
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import httpx
+from django.conf import settings
+from lxml import etree, html as lxml_html
+
+from discovery.helpers.crawler import JOB_LINK_RE, count_job_links, extract_links
+from discovery.helpers.dom_chunker import iter_dom_chunks
+from discovery.helpers.http_client import get_async_client
+from discovery.helpers.llm import LLMError, OllamaClassifier
+from discovery.helpers.politeness import PolitenessScheduler, get_politeness_scheduler
+
+logger = logging.getLogger("scraper")
+
+JOB_TITLE_RE = re.compile(
+    r"\b(engineer|developer|manager|analyst|designer|specialist|scientist|"
+    r"architect|consultant|coordinator|associate|director|administrator|"
+    r"representative|technician|intern(ship)?|lead|officer|assistant|"
+    r"accountant|recruiter|nurse|sales)\b",
+    re.IGNORECASE,
+)
+LOCATION_RE = re.compile(
+    r"\b(remote|hybrid|on-?site)\b|\b[A-Z][a-z]+(?: [A-Z][a-z]+)?, (?:[A-Z]{2}\b|[A-Z][a-z]+)"
+)
+CARD_TAGS = {"li", "article", "tr", "div", "section"}
+
+
+@dataclass
+class Signals:
+    repeated_cards: int = 0
+    job_links: int = 0
+    titles: int = 0
+    locations: int = 0
+
+    @property
+    def score(self) -> float:
+        """0..1, weighted towards repeated card structure."""
+        return (
+            0.4 * min(self.repeated_cards / 8, 1.0)
+            + 0.3 * min(self.job_links / 8, 1.0)
+            + 0.2 * min(self.titles / 5, 1.0)
+            + 0.1 * min(self.locations / 5, 1.0)
+        )
+
+
+@dataclass
+class Verdict:
+    url: str
+    listings_url: str | None = None
+    method: str = ""  # "heuristic" | "llm" | "search-form" | "error"
+    score: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.listings_url is not None
+
+
+# ── cheap structural pre-filter ─────────────────────────────────
+def _card_for(anchor) -> etree._Element | None:
+    node = anchor
+    for _ in range(4):
+        node = node.getparent()
+        if node is None:
+            return None
+        if node.tag in CARD_TAGS:
+            return node
+    return None
+
+
+def structural_signals(base_url: str, body: str) -> Signals:
+    """
+    Count what a listings page looks like structurally: sibling "cards"
+    sharing tag + class that each wrap a job-ish link, job-posting URLs,
+    title-like link texts and location-like strings inside the cards.
+    """
+    try:
+        tree = lxml_html.fromstring(body)
+    except (ValueError, etree.ParserError):
+        return Signals()
+
+    cards: Counter = Counter()
+    card_nodes = []
+    titles = 0
+    for a in tree.iter("a"):
+        text = " ".join(a.itertext()).strip()
+        is_title = bool(text) and len(text) < 120 and bool(JOB_TITLE_RE.search(text))
+        titles += is_title
+        if not (is_title or JOB_LINK_RE.search(a.get("href", ""))):
+            continue
+        card = _card_for(a)
+        if card is not None:
+            cards[(card.getparent(), card.tag, card.get("class", ""))] += 1
+            card_nodes.append(card)
+
+    repeated = max(cards.values(), default=0)
+    locations = sum(
+        1 for card in card_nodes[:200] if LOCATION_RE.search(" ".join(card.itertext()))
+    )
+    return Signals(
+        repeated_cards=repeated if repeated >= 3 else 0,
+        job_links=count_job_links(extract_links(base_url, body)),
+        titles=titles,
+        locations=locations,
+    )
+
+
+def find_search_url(base_url: str, body: str) -> str | None:
+    """
+    Empty-query results URL of the page's job search form, if any. The
+    query param is merged into the action's own query (an empty action is
+    the page URL itself); POST forms have no results URL and are skipped.
+    """
+    try:
+        tree = lxml_html.fromstring(body)
+    except (ValueError, etree.ParserError):
+        return None
+    for form in tree.iter("form"):
+        if (form.get("method") or "get").strip().lower() != "get":
+            continue
+        for inp in form.iter("input"):
+            attrs = "".join(inp.get(a, "") for a in ("type", "name", "placeholder")).lower()
+            if "search" in attrs:
+                name = inp.get("name") or "q"
+                action = urlsplit(urljoin(base_url, form.get("action", "")))
+                query = [(k, v) for k, v in parse_qsl(action.query, keep_blank_values=True) if k != name]
+                return urlunsplit(action._replace(query=urlencode(query + [(name, "")]), fragment=""))
+    return None
+
+
+# ── verifier ────────────────────────────────────────────────────
+class ListingsVerifier:
+    def __init__(
+        self,
+        accept_score: float = 0.7,
+        reject_score: float = 0.15,
+        max_llm_chunks: int = 8,
+        classifier: OllamaClassifier | None = None,
+        client: httpx.AsyncClient | None = None,
+        scheduler: PolitenessScheduler | None = None,
+        max_host_wait: float = 30.0,
+    ):
+        self.accept_score = accept_score
+        self.reject_score = reject_score
+        self.max_llm_chunks = max_llm_chunks
+        self.classifier = classifier or OllamaClassifier.from_settings()
+        self._client = client
+        self.scheduler = scheduler or get_politeness_scheduler()
+        self.max_host_wait = max_host_wait
+
+    @classmethod
+    def from_settings(cls, **kwargs) -> "ListingsVerifier":
+        options = {
+            "accept_score": getattr(settings, "VERIFY_ACCEPT_SCORE", 0.7),
+            "reject_score": getattr(settings, "VERIFY_REJECT_SCORE", 0.15),
+            "max_llm_chunks": getattr(settings, "VERIFY_MAX_LLM_CHUNKS", 8),
+            "max_host_wait": getattr(settings, "CRAWLER_MAX_HOST_WAIT_SECONDS", 30.0),
+        }
+        options.update(kwargs)
+        return cls(**options)
+
+    async def _fetch(self, url: str) -> httpx.Response | None:
+        if not await self.scheduler.allowed(url):
+            return None
+        if not await self.scheduler.acquire(url, max_wait=self.max_host_wait):
+            return None
+        try:
+            resp = await (self._client or get_async_client()).get(url)
+        except httpx.HTTPError as exc:
+            logger.debug("[verify] %s fetch failed: %s", url, exc)
+            return None
+        self.scheduler.record_response(url, resp.status_code, resp.headers.get("retry-after"))
+        if resp.status_code >= 400 or "html" not in resp.headers.get("content-type", ""):
+            return None
+        return resp
+
+    async def _judge(self, url: str, body: str) -> tuple[bool, str, float]:
+        score = structural_signals(url, body).score
+        if score >= self.accept_score:
+            return True, "heuristic", score
+        if score <= self.reject_score:
+            return False, "heuristic", score
+
+        chunks = list(islice(iter_dom_chunks(body), self.max_llm_chunks))
+        try:
+            return await self.classifier.any_positive(chunks), "llm", score
+        except LLMError as exc:
+            # Model unavailable: fall back to the heuristic's lean
+            logger.warning("[verify] LLM unavailable for %s: %s", url, exc)
+            return score >= (self.accept_score + self.reject_score) / 2, "heuristic", score
+
+    async def verify(self, url: str) -> Verdict:
+        resp = await self._fetch(url)
+        if resp is None:
+            return Verdict(url=url, method="error")
+        final_url, body = str(resp.url), resp.text
+        ok, method, score = await self._judge(final_url, body)
+        if ok:
+            return Verdict(url=url, listings_url=final_url, method=method, score=score)
+
+        search_url = find_search_url(final_url, body)
+        if search_url:
+            resp = await self._fetch(search_url)
+            if resp is not None:
+                ok, _, search_score = await self._judge(str(resp.url), resp.text)
+                if ok:
+                    return Verdict(url=url, listings_url=search_url, method="search-form", score=search_score)
+        return Verdict(url=url, method=method, score=score)
+
+    async def verify_many(self, urls: list[str]) -> dict[str, Verdict]:
+        """Verify all ``urls`` concurrently; url → Verdict."""
+        unique = list(dict.fromkeys(urls))
+        verdicts = await asyncio.gather(*(self.verify(u) for u in unique))
+        logger.info(
+            "[verify] %d candidate(s): %d verified, %d LLM call(s)",
+            len(unique),
+            sum(v.ok for v in verdicts),
+            self.classifier.calls,
+        )
+        return dict(zip(unique, verdicts))
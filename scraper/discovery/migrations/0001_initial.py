@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CareerSite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=1000, unique=True)),
+                ('platform', models.CharField(default='general', max_length=50)),
+                ('board_token', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_crawled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Company',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('country', models.CharField(max_length=100)),
+                ('name_key', models.CharField(editable=False, max_length=255)),
+                ('country_key', models.CharField(editable=False, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'companies',
+            },
+        ),
+        migrations.CreateModel(
+            name='JobPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canonical_url', models.URLField(max_length=1000, unique=True)),
+                ('platform', models.CharField(blank=True, max_length=50)),
+                ('external_id', models.CharField(blank=True, max_length=255)),
+                ('title', models.CharField(max_length=500)),
+                ('location', models.CharField(blank=True, max_length=500)),
+                ('department', models.CharField(blank=True, max_length=255)),
+                ('employment_type', models.CharField(blank=True, max_length=100)),
+                ('remote', models.BooleanField(null=True)),
+                ('description', models.TextField(blank=True)),
+                ('posted_at', models.DateTimeField(blank=True, null=True)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('first_seen_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('career_site', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='postings', to='discovery.careersite')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='discovery.company')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['name', 'country'], name='company_name_country_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='company',
+            constraint=models.UniqueConstraint(fields=('name_key', 'country_key'), name='uniq_company_country'),
+        ),
+        migrations.AddField(
+            model_name='careersite',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='career_sites', to='discovery.company'),
+        ),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['company', 'posted_at'], name='posting_company_posted_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discovery', '0002_incremental_refresh'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposting',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='discovery.jobposting'),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='minhash',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PostingBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True)),
+                ('posting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='discovery.jobposting')),
+            ],
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:05
+
+from django.db import migrations, models
+
+# Full-text index for helpers/posting_search.py. SQLite gets an external-
+# content FTS5 table kept in sync by triggers; Postgres a generated tsvector
+# column with a partial GIN index. Other backends get neither and can't
+# serve search. Both index only searchable postings (not removed, not a
+# near-duplicate), so the default search needs no join or post-filter.
+_SEARCHABLE = "{row}.removed_at IS NULL AND {row}.duplicate_of_id IS NULL"
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE discovery_jobposting_fts USING fts5(
+        title, description,
+        content='discovery_jobposting', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER discovery_jobposting_fts_ai AFTER INSERT ON discovery_jobposting
+    WHEN {new} BEGIN
+        INSERT INTO discovery_jobposting_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """.format(new=_SEARCHABLE.format(row="new")),
+    """
+    CREATE TRIGGER discovery_jobposting_fts_ad AFTER DELETE ON discovery_jobposting
+    WHEN {old} BEGIN
+        INSERT INTO discovery_jobposting_fts(discovery_jobposting_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """.format(old=_SEARCHABLE.format(row="old")),
+    # One trigger, so the old entry is always gone before the new one goes in
+    """
+    CREATE TRIGGER discovery_jobposting_fts_au
+    AFTER UPDATE OF title, description, removed_at, duplicate_of_id ON discovery_jobposting BEGIN
+        INSERT INTO discovery_jobposting_fts(discovery_jobposting_fts, rowid, title, description)
+        SELECT 'delete', old.id, old.title, old.description WHERE {old};
+        INSERT INTO discovery_jobposting_fts(rowid, title, description)
+        SELECT new.id, new.title, new.description WHERE {new};
+    END
+    """.format(old=_SEARCHABLE.format(row="old"), new=_SEARCHABLE.format(row="new")),
+    """
+    INSERT INTO discovery_jobposting_fts(rowid, title, description)
+    SELECT id, title, description FROM discovery_jobposting p WHERE {p}
+    """.format(p=_SEARCHABLE.format(row="p")),
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS discovery_jobposting_fts_ai",
+    "DROP TRIGGER IF EXISTS discovery_jobposting_fts_ad",
+    "DROP TRIGGER IF EXISTS discovery_jobposting_fts_au",
+    "DROP TABLE IF EXISTS discovery_jobposting_fts",
+]
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE discovery_jobposting ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX posting_search_vector_idx ON discovery_jobposting USING GIN (search_vector) "
+    "WHERE " + _SEARCHABLE.format(row="discovery_jobposting"),
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS posting_search_vector_idx",
+    "ALTER TABLE discovery_jobposting DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discovery', '0003_near_duplicates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['first_seen_at', 'id'], name='posting_first_seen_idx'),
+        ),
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            _run({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
@@ -1,3 +1,430 @@
+import hashlib
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+from discovery.helpers.batches import normalize_company_key
+from discovery.helpers.job_feeds import FeedSpec
+from discovery.helpers.near_dupes import (
+    DEFAULT_THRESHOLD,
+    NearDuplicateIndex,
+    band_keys,
+    from_bytes,
+    minhash,
+    to_bytes,
+)
+from discovery.helpers.urls import canonical_job_url
+
+# Fields that define a posting's content; a change in any of them changes
+# `content_hash` and makes the upsert rewrite the row.
+POSTING_CONTENT_FIELDS = (
+    "title",
+    "location",
+    "department",
+    "employment_type",
+    "remote",
+    "description",
+    "posted_at",
+)
+# SQLite caps bound parameters per statement; keep IN (...) lists under it
+LOOKUP_CHUNK = 900
+
+# Adaptive re-crawl interval bounds (seconds) for CareerSite refreshes
+MIN_CHECK_INTERVAL = 3 * 3600
+MAX_CHECK_INTERVAL = 14 * 24 * 3600
+DEFAULT_CHECK_INTERVAL = 24 * 3600
+
+
+def posting_minhash(values: dict) -> bytes | None:
+    """Near-duplicate signature of what a posting says, packed for the DB column."""
+    signature = minhash(" ".join(values.get(name) or "" for name in ("title", "location", "description")))
+    return None if signature is None else to_bytes(signature)
+
+
+def posting_content_hash(values: dict) -> str:
+    h = hashlib.sha256()
+    for name in POSTING_CONTENT_FIELDS:
+        value = values.get(name)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        h.update(f"{name}\x1f{'' if value is None else value}\x1e".encode("utf-8"))
+    return h.hexdigest()
+
+
+class Company(models.Model):
+    name = models.CharField(max_length=255)
+    country = models.CharField(max_length=100)
+    # Case/whitespace-folded identity, same rule the bulk endpoint dedupes on
+    name_key = models.CharField(max_length=255, editable=False)
+    country_key = models.CharField(max_length=100, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name_key", "country_key"], name="uniq_company_country"
+            ),
+        ]
+        indexes = [models.Index(fields=["name", "country"], name="company_name_country_idx")]
+        verbose_name_plural = "companies"
+
+    def save(self, *args, **kwargs):
+        self.name_key, self.country_key = normalize_company_key(self.name, self.country)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def for_name(cls, name: str, country: str) -> "Company":
+        name_key, country_key = normalize_company_key(name, country)
+        company, _ = cls.objects.get_or_create(
+            name_key=name_key,
+            country_key=country_key,
+            defaults={"name": " ".join(name.split()), "country": " ".join(country.split())},
+        )
+        return company
+
+    def __str__(self):
+        return f"{self.name} ({self.country})"
+
+
+class CareerSite(models.Model):
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="career_sites")
+    url = models.URLField(max_length=1000, unique=True)
+    platform = models.CharField(max_length=50, default="general")
+    board_token = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_crawled_at = models.DateTimeField(null=True, blank=True)
+
+    # Incremental refresh schedule: the interval halves when the site
+    # changed and grows 1.5x when it didn't, within MIN/MAX_CHECK_INTERVAL.
+    check_interval = models.PositiveIntegerField(default=DEFAULT_CHECK_INTERVAL)
+    next_check_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_changed_at = models.DateTimeField(null=True, blank=True)
+
+    def schedule_next_check(self, changed: bool) -> None:
+        if changed:
+            self.check_interval = max(MIN_CHECK_INTERVAL, self.check_interval // 2)
+            self.last_changed_at = timezone.now()
+        else:
+            self.check_interval = min(MAX_CHECK_INTERVAL, int(self.check_interval * 1.5))
+        self.last_crawled_at = timezone.now()
+        self.next_check_at = self.last_crawled_at + timedelta(seconds=self.check_interval)
+
+    def __str__(self):
+        return self.url
+
+
+class PageFingerprint(models.Model):
+    """
+    What we last saw at a URL: HTTP validators for conditional requests and
+    a normalized-content hash for servers that don't send any. Doubles as
+    the DB-backed ValidatorStore for ATS connectors.
+    """
+
+    url = models.URLField(max_length=1000, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    checked_at = models.DateTimeField(auto_now=True)
+    changed_at = models.DateTimeField(null=True, blank=True)
+
+    # ValidatorStore interface (discovery.connectors.base)
+    @classmethod
+    def get_validators(cls, url: str) -> tuple[str | None, str | None]:
+        row = cls.objects.filter(url=url).values_list("etag", "last_modified").first()
+        return (row[0] or None, row[1] or None) if row else (None, None)
+
+    @classmethod
+    def set_validators(cls, url: str, etag: str | None, last_modified: str | None) -> None:
+        cls.objects.update_or_create(
+            url=url, defaults={"etag": etag or "", "last_modified": last_modified or ""}
+        )
+
+    @classmethod
+    def record_content(cls, url: str, content_hash: str) -> bool:
+        """
+        Store ``content_hash`` for ``url``; True if it differs from before.
+        The first hash seen is a baseline, not a change.
+        """
+        fp, _ = cls.objects.get_or_create(url=url)
+        changed = bool(fp.content_hash) and fp.content_hash != content_hash
+        if changed:
+            fp.changed_at = timezone.now()
+        fp.content_hash = content_hash
+        fp.save()
+        return changed
+
+    def __str__(self):
+        return self.url
+
+
+class DbValidatorStore:
+    """ValidatorStore persisted in PageFingerprint (survives restarts)."""
+
+    blocking = True
+
+    def get(self, url: str):
+        return PageFingerprint.get_validators(url)
+
+    def set(self, url: str, etag: str | None, last_modified: str | None) -> None:
+        if etag or last_modified:
+            PageFingerprint.set_validators(url, etag, last_modified)
+
+
+class JobFeed(models.Model):
+    """
+    The JSON job feed captured for a host's careers page
+    (helpers/job_feeds.py), replayed over HTTP by the ``feed`` connector
+    on later runs instead of rendering the page again.
+    """
+
+    host = models.CharField(max_length=255, unique=True)
+    endpoint = models.URLField(max_length=2000)
+    spec = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.host} → {self.endpoint}"
+
+
+class DbFeedStore:
+    """FeedStore persisted in JobFeed (connectors/feed.py)."""
+
+    blocking = True
+
+    def get(self, host: str) -> FeedSpec | None:
+        spec = JobFeed.objects.filter(host=host).values_list("spec", flat=True).first()
+        return FeedSpec.from_dict(spec) if spec else None
+
+    def set(self, spec: FeedSpec) -> None:
+        JobFeed.objects.update_or_create(
+            host=spec.host, defaults={"endpoint": spec.url[:2000], "spec": spec.to_dict()}
+        )
+
+    def forget(self, host: str) -> None:
+        JobFeed.objects.filter(host=host).delete()
+
+
+@dataclass
+class UpsertResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    created_urls: list[str] = field(default_factory=list)
+    updated_urls: list[str] = field(default_factory=list)
+    removed_urls: list[str] = field(default_factory=list)
+    # Filled by link_near_duplicates: written postings that repeat another of the company's
+    duplicate_urls: list[str] = field(default_factory=list)
+
+    @property
+    def written(self) -> int:
+        return self.created + self.updated
+
+    def delta(self) -> dict:
+        """New / changed / removed posting URLs since the previous crawl."""
+        return {
+            "new": self.created_urls,
+            "changed": self.updated_urls,
+            "removed": self.removed_urls,
+        }
+
+
+class JobPostingManager(models.Manager):
+    def bulk_upsert(self, records, company: Company, career_site: CareerSite | None = None,
+                    batch_size: int = 1000) -> UpsertResult:
+        """
+        Insert new postings and rewrite changed ones in bulk.
+
+        `records` are JobRecords (discovery.connectors) or dicts with the
+        same fields. Existing hashes are read with one query per
+        LOOKUP_CHUNK URLs; rows whose hash didn't change are skipped, the
+        rest go through one `INSERT … ON CONFLICT(canonical_url) DO UPDATE`
+        per `batch_size` rows.
+        """
+        by_url: dict[str, JobPosting] = {}
+        for record in records:
+            data = record.as_dict() if hasattr(record, "as_dict") else dict(record)
+            values = {name: data.get(name) for name in POSTING_CONTENT_FIELDS}
+            for name in ("title", "location", "department", "employment_type", "description"):
+                values[name] = (values[name] or "").strip()
+            url = canonical_job_url(data["url"])
+            by_url[url] = JobPosting(
+                company=company,
+                career_site=career_site,
+                canonical_url=url,
+                platform=data.get("platform") or (career_site.platform if career_site else ""),
+                external_id=str(data.get("external_id") or ""),
+                content_hash=posting_content_hash(values),
+                minhash=posting_minhash(values),
+                **values,
+            )
+
+        urls = list(by_url)
+        existing: dict[str, str] = {}
+        for i in range(0, len(urls), LOOKUP_CHUNK):
+            for url, content_hash, removed_at in self.filter(
+                canonical_url__in=urls[i:i + LOOKUP_CHUNK]
+            ).values_list("canonical_url", "content_hash", "removed_at"):
+                # A posting that comes back after removal must be rewritten
+                existing[url] = content_hash if removed_at is None else ""
+
+        changed = [p for url, p in by_url.items() if existing.get(url) != p.content_hash]
+        result = UpsertResult(unchanged=len(by_url) - len(changed))
+        for p in changed:
+            if p.canonical_url in existing:
+                result.updated_urls.append(p.canonical_url)
+            else:
+                result.created_urls.append(p.canonical_url)
+        result.created = len(result.created_urls)
+        result.updated = len(result.updated_urls)
+        if changed:
+            self.bulk_create(
+                changed,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=["canonical_url"],
+                update_fields=[
+                    "company",
+                    "career_site",
+                    "platform",
+                    "external_id",
+                    "content_hash",
+                    "minhash",
+                    "updated_at",
+                    "removed_at",
+                    *POSTING_CONTENT_FIELDS,
+                ],
+            )
+        return result
+
+    def link_near_duplicates(self, company: Company, urls: list[str], threshold: float | None = None) -> list[str]:
+        """
+        Point each of ``urls`` at the company's earlier posting it
+        near-duplicates (``duplicate_of``), or index it in PostingBand as a
+        canonical posting. Candidates come from a band-key lookup, so the
+        cost per posting doesn't grow with the number of stored postings.
+        Returns the URLs marked as duplicates.
+        """
+        if threshold is None:
+            threshold = getattr(settings, "NEAR_DUPLICATE_THRESHOLD", DEFAULT_THRESHOLD)
+        rows = []
+        for i in range(0, len(urls), LOOKUP_CHUNK):
+            rows += [
+                (pk, url, None if raw is None else from_bytes(raw))
+                for pk, url, raw in self.filter(canonical_url__in=urls[i:i + LOOKUP_CHUNK]).values_list(
+                    "pk", "canonical_url", "minhash"
+                )
+            ]
+        rows.sort()  # oldest first: the first of a cluster stays canonical
+        pks = [pk for pk, _, _ in rows]
+        for i in range(0, len(pks), LOOKUP_CHUNK):
+            PostingBand.objects.filter(posting_id__in=pks[i:i + LOOKUP_CHUNK]).delete()
+
+        # Seed the index with the company's active canonical postings that share a band
+        index = NearDuplicateIndex(threshold)
+        keys = sorted({key for _, _, sig in rows if sig is not None for key in band_keys(sig)})
+        found = set()
+        for i in range(0, len(keys), LOOKUP_CHUNK):
+            found.update(
+                PostingBand.objects.filter(
+                    key__in=keys[i:i + LOOKUP_CHUNK],
+                    posting__company=company,
+                    posting__removed_at__isnull=True,
+                ).values_list("posting_id", "posting__minhash")
+            )
+        for pk, raw in sorted(found):
+            index.add(pk, from_bytes(raw))
+
+        canonical, duplicates, bands = [], {}, []
+        for pk, url, sig in rows:
+            match = index.add_unique(pk, sig) if sig is not None else None
+            if match is None:
+                canonical.append(pk)
+                if sig is not None:
+                    bands += [PostingBand(posting_id=pk, key=key) for key in band_keys(sig)]
+            else:
+                duplicates.setdefault(match, []).append((pk, url))
+
+        PostingBand.objects.bulk_create(bands, batch_size=LOOKUP_CHUNK)
+        for i in range(0, len(canonical), LOOKUP_CHUNK):
+            self.filter(pk__in=canonical[i:i + LOOKUP_CHUNK]).update(duplicate_of=None)
+        for target, dupes in duplicates.items():
+            self.filter(pk__in=[pk for pk, _ in dupes]).update(duplicate_of_id=target)
+        return [url for dupes in duplicates.values() for _, url in dupes]
+
+    def mark_removed(self, career_site: CareerSite, seen_urls) -> list[str]:
+        """
+        Flag the site's active postings that weren't in the latest full
+        listing as removed. Returns their canonical URLs.
+        """
+        seen = {canonical_job_url(u) for u in seen_urls}
+        gone = [
+            (pk, url)
+            for pk, url in self.filter(career_site=career_site, removed_at__isnull=True)
+            .values_list("pk", "canonical_url")
+            .iterator()
+            if url not in seen
+        ]
+        now = timezone.now()
+        for i in range(0, len(gone), LOOKUP_CHUNK):
+            self.filter(pk__in=[pk for pk, _ in gone[i:i + LOOKUP_CHUNK]]).update(
+                removed_at=now
+            )
+        return [url for _, url in gone]
+
+
+class JobPosting(models.Model):
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="postings")
+    career_site = models.ForeignKey(
+        CareerSite, on_delete=models.SET_NULL, null=True, blank=True, related_name="postings"
+    )
+    canonical_url = models.URLField(max_length=1000, unique=True)
+    platform = models.CharField(max_length=50, blank=True)
+    external_id = models.CharField(max_length=255, blank=True)
+
+    title = models.CharField(max_length=500)
+    location = models.CharField(max_length=500, blank=True)
+    department = models.CharField(max_length=255, blank=True)
+    employment_type = models.CharField(max_length=100, blank=True)
+    remote = models.BooleanField(null=True)
+    description = models.TextField(blank=True)
+    posted_at = models.DateTimeField(null=True, blank=True)
+
+    content_hash = models.CharField(max_length=64)
+    # MinHash signature of title/location/description (helpers/near_dupes.py)
+    minhash = models.BinaryField(null=True, blank=True)
+    # The earlier posting this one near-duplicates (another URL for the same job)
+    duplicate_of = models.ForeignKey(
+        "self", on_delete=models.SET_NULL, null=True, blank=True, related_name="duplicates"
+    )
+    first_seen_at = models.DateTimeField(default=timezone.now, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    removed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobPostingManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["company", "posted_at"], name="posting_company_posted_idx"),
+            # Keyset order of search results without a query (helpers/posting_search.py)
+            models.Index(fields=["first_seen_at", "id"], name="posting_first_seen_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} @ {self.company.name}"
+
+
+class PostingBand(models.Model):
+    """
+    LSH band index over canonical postings' MinHash signatures, one row
+    per band.
+    A new posting's near-duplicate candidates are the postings sharing
+    any of its band keys (helpers/near_dupes.band_keys).
+    """
 
-# Create your models here.
+    posting = models.ForeignKey(JobPosting, on_delete=models.CASCADE, related_name="bands")
+    key = models.BigIntegerField(db_index=True)
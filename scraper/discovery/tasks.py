@@ -1,32 +1,169 @@
 # discovery/tasks.py
 
-from celery import shared_task
-from playwright.sync_api import sync_playwright
-from urllib.parse import urlparse, urlunparse
-from bs4 import BeautifulSoup
+from celery import group, shared_task
+from celery.signals import worker_process_init, worker_process_shutdown
+import asyncio
 import logging
-from logging_config import setup_logging
-from urllib.parse import quote_plus
+from itertools import islice
+from dataclasses import dataclass, field
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from datetime import timedelta
+from django.utils import timezone
+from logging_config import bind_log_context, log_context
+from urllib.parse import parse_qs, quote_plus, urljoin, urlparse
+from lxml import etree, html as lxml_html
+from discovery.helpers.browser_pool import start_browser_pool, stop_browser_pool
+from discovery.helpers.batches import get_batch, normalize_company_key, record_chunk_done, record_company
+from discovery.helpers.serp_cache import get_serp_cache
+from discovery.helpers.snapshots import get_snapshot_store
+from discovery.helpers.urls import normalize_url, url_host
+from discovery.helpers.crawler import CareerCrawler
+from discovery.helpers.fetcher import BROWSER, get_fetcher
+from discovery.helpers.ats import detect_from_url
+from discovery.helpers.llm_cache import get_llm_cache
+from discovery.helpers.metrics import JOB_FEEDS, NEAR_DUPLICATES, SERP_QUERIES, stage as timed_stage
+from discovery.helpers.job_feeds import spec_from_captures
+from discovery.helpers.near_dupes import NearDuplicateIndex, minhash
+from discovery.helpers.progress import publish as publish_progress
+from discovery.helpers.verify import ListingsVerifier
+from discovery.connectors import CONNECTORS, BaseConnector, ConnectorError, FeedConnector, NotModified, get_connector
+from discovery.models import (
+    CareerSite,
+    Company,
+    DbFeedStore,
+    DbValidatorStore,
+    JobFeed,
+    JobPosting,
+    PageFingerprint,
+    UpsertResult,
+)
+from discovery.helpers.http_client import get_async_client, run_async
+from discovery.helpers.dom_chunker import TemplateMemory, iter_dom_chunks
+from discovery.helpers.fingerprints import content_fingerprint, visible_text
+
+logger = logging.getLogger("scraper")
+
+# One Chromium per worker process, shared by every task it runs.
+worker_process_init.connect(start_browser_pool)
+worker_process_shutdown.connect(stop_browser_pool)
+
+
+def _preload_embeddings(**kwargs) -> None:
+    try:
+        from discovery.helpers.embeddings import preload_embedding_service
+    except ImportError as exc:
+        logger.warning("[embeddings] Not preloading: %s", exc)
+        return
+    preload_embedding_service(**kwargs)
+
+
+worker_process_init.connect(_preload_embeddings)
+
+# Stage-2 fallback ranking (see _rank_candidates)
+RANK_QUERY = "job listings page"
+RANK_TOP_CHUNKS = 10
+RANK_TOP_PAGES = 3
+
+# ── SERP helpers ────────────────────────────────────────────────
+SERP_LINKS_PER_QUERY = 5
+SERP_RESULT_SELECTOR = "a.result__a"
+
+
+def _serp_url(q: str) -> str:
+    # Server-rendered SERP: usually served over plain HTTP (helpers/fetcher.py)
+    return f"https://html.duckduckgo.com/html/?q={quote_plus(q)}"
+
+
+def _result_href(href: str) -> str | None:
+    """Unwrap DuckDuckGo's ``/l/?uddg=…`` redirect; None for ads/internal links."""
+    absolute = urljoin("https://duckduckgo.com/", href)
+    if url_host(absolute) == "duckduckgo.com":
+        absolute = parse_qs(urlparse(absolute).query).get("uddg", [""])[0]
+    if not absolute.startswith(("http://", "https://")) or url_host(absolute).endswith("duckduckgo.com"):
+        return None
+    return absolute
+
+
+def _parse_serp_links(body: str) -> list[str]:
+    """Top organic result links of an HTML SERP (ads skipped)."""
+    try:
+        tree = lxml_html.fromstring(body)
+    except (ValueError, etree.ParserError):
+        return []
+    urls: list[str] = []
+    for a in tree.xpath('//a[contains(concat(" ", @class, " "), " result__a ")]'):
+        if a.xpath('ancestor::*[contains(@class, "result--ad")]'):
+            continue
+        href = _result_href(a.get("href", ""))
+        if href and href not in urls:
+            logger.debug("[search_normalize_task] href=%s", href)
+            urls.append(href)
+        if len(urls) == SERP_LINKS_PER_QUERY:
+            break
+    return urls
+
+
+def _serp_links(queries: list[str]) -> dict[str, list | None]:
+    """
+    Fetch every query's SERP through the tiered fetcher: plain HTTP first,
+    the pooled browser only if DuckDuckGo didn't serve results that way.
+    None marks a failed query.
+    """
+    by_url = {_serp_url(q): q for q in queries}
+    with timed_stage("serp_fetch"):
+        fetched = get_fetcher().fetch_many(
+            by_url,
+            accept=lambda res: bool(_parse_serp_links(res.html)),
+            wait_for=SERP_RESULT_SELECTOR,
+            concurrent=getattr(settings, "SERP_FETCH_MODE", "concurrent") == "concurrent",
+        )
+    snapshots = get_snapshot_store()
+    results: dict[str, list | None] = {}
+    for url, q in by_url.items():
+        res = fetched[url]
+        with timed_stage("parse"):
+            links = _parse_serp_links(res.html) if res.ok else []
+        # Sampled, compressed debug snapshot (written off-thread); failures sampled separately
+        if snapshots is not None and res.html:
+            snapshots.capture("serp", url, res.html, label=q, failed=not links)
+        if not links:
+            logger.warning(
+                "[search_normalize_task] Error while querying '%s': %s", q, res.error or "no results"
+            )
+            SERP_QUERIES.inc(result="failed")
+            results[q] = None
+            continue
+        SERP_QUERIES.inc(result="fetched")
+        results[q] = links
+    return results
 
-logger = setup_logging()
 
 @shared_task
-def search_normalize_task(company: str, country: str) -> list:
+def search_normalize_task(company: str, country: str, job_id: str | None = None) -> list:
     """
-    DuckDuckGo ► playwright ► top-5 URLs / query ► normalize ► dedupe.
+    DuckDuckGo ► tiered fetch ► top-5 URLs / query ► normalize ► dedupe.
 
     • Keeps the same signature & return type as before.
-    • Only the scraping block changed:
-        – Uses the proper SERP URL (`?t=h_&q=…&ia=web`, url-encoded).
-        – Pulls links via the stable selector 
-          `article[data-testid="result"] h2 a` (matches the HTML you pasted).
-        – Collects up to 5 links per query, skipping ads/redirects.
+    • SERPs come from DuckDuckGo's HTML endpoint, fetched over plain HTTP
+      when it serves results and in the pooled browser otherwise
+      (helpers/fetcher.py remembers which worked).
+    • Collects up to 5 links per query, skipping ads/redirects.
+    • ``SERP_FETCH_MODE = "concurrent"`` loads browser-tier queries in
+      parallel tabs (same per-query timeouts, same deduped result).
+    • Per-query results are cached (helpers/serp_cache.py); when every
+      query hits, the browser is never touched.
+    • With ``job_id``, stage progress is published for the SSE stream
+      (helpers/progress.py).
     """
+    bind_log_context(company=company, country=country)
     logger.info(
         "[search_normalize_task] Starting task for company=%s, country=%s",
         company,
         country,
     )
+    publish_progress(job_id, "stage", stage="serp", status="started")
 
     queries = [
         f"{company} careers {country}",
@@ -34,76 +171,750 @@ def search_normalize_task(company: str, country: str) -> list:
         f"{company} hiring page {country}",
     ]
 
+    # ── SERP cache: only queries that miss go to the browser ────
+    cache = get_serp_cache()
     raw_urls: list[str] = []
+    missing: list[str] = []
+    for q in queries:
+        cached = cache.get(company, country, q)
+        if cached is None:
+            missing.append(q)
+        else:
+            raw_urls.extend(cached)
+    if len(missing) < len(queries):
+        SERP_QUERIES.inc(len(queries) - len(missing), result="cache_hit")
+
+    # ── fetch: HTTP first, pooled browser only when needed ──────
+    if missing:
+        fetched = _serp_links(missing)
+        for q, urls in fetched.items():
+            if urls is None:  # failed query: don't cache the failure
+                continue
+            cache.set(company, country, q, urls)
+            raw_urls.extend(urls)
+    else:
+        logger.info(
+            "[search_normalize_task] SERP cache hit for all queries; nothing fetched"
+        )
+
+    # ── dedupe / normalize ──────────────────────────────────────
+    with timed_stage("dedupe"):
+        normalized = list({normalize_url(u) for u in raw_urls})
+    logger.info(
+        "[search_normalize_task] %d unique URLs for %s (%s)",
+        len(normalized),
+        company,
+        country,
+    )
+    logger.debug("[search_normalize_task] URLs=%s", normalized)
+    publish_progress(
+        job_id, "stage", stage="serp", status="done", urls=len(normalized), cached=len(queries) - len(missing)
+    )
+    return normalized
+
+
+async def _crawl_for_listings(start_urls: list) -> tuple[list, list]:
+    """
+    Consume the crawler stream, keeping only listings pages: ATS
+    Detections for embedded/linked boards, URLs for anything else.
+
+    Until a page is confirmed, every fetched page is also kept as a ranking
+    candidate (url, job_links, text chunks) for `_rank_candidates`; the
+    candidates are returned only when nothing was confirmed. Pages whose
+    text near-duplicates an earlier candidate (mirrors, tracking-param
+    variants) are dropped so they aren't embedded and verified twice.
+    Chunks come from the page DOM (helpers/dom_chunker.py), with the site's
+    repeated template text remembered across the crawl and left out.
+    """
+    crawler = CareerCrawler(
+        max_depth=getattr(settings, "CRAWLER_MAX_DEPTH", 3),
+        max_pages=getattr(settings, "CRAWLER_MAX_PAGES", 50),
+        max_concurrency=getattr(settings, "CRAWLER_MAX_CONCURRENCY", 8),
+        per_host_concurrency=getattr(settings, "CRAWLER_PER_HOST_CONCURRENCY", 2),
+    )
+    chunks_per_page = getattr(settings, "EMBEDDING_CHUNKS_PER_PAGE", 8)
+    listings: list = []
+    candidates: list[tuple[str, int, list[str]]] = []
+    seen = NearDuplicateIndex(getattr(settings, "NEAR_DUPLICATE_THRESHOLD", 0.8))
+    templates = TemplateMemory()
+    pages = 0
+    async for page in crawler.crawl(start_urls):
+        pages += 1
+        if page.ats and page.ats.confident:
+            listings.append(page.ats)
+        elif page.is_listings:
+            listings.append(page.url)
+        elif page.html and not listings:
+            with timed_stage("dedupe"):
+                signature = minhash(visible_text(page.html))
+                original = seen.add_unique(page.url, signature) if signature is not None else None
+            if original is not None:
+                logger.debug("[crawl_career_pages_task] %s near-duplicates %s; skipped", page.url, original)
+                NEAR_DUPLICATES.inc(kind="page")
+                continue
+            # Checked after dedupe so mirrors don't count toward the site's template text
+            chunks = list(islice(iter_dom_chunks(page.html, url=page.url, templates=templates), chunks_per_page))
+            if not (chunks or page.job_links):
+                continue
+            candidates.append((page.url, page.job_links, chunks))
+
+    logger.info(
+        "[crawl_career_pages_task] Crawled %d pages, %d listings page(s)",
+        pages,
+        len(listings),
+    )
+    if templates.skipped:
+        logger.debug("[crawl_career_pages_task] Skipped %d template unit(s)", templates.skipped)
+    return listings, ([] if listings else candidates)
+
+
+def _rank_by_job_links(candidates: list) -> list[str]:
+    best = sorted((c for c in candidates if c[1]), key=lambda c: c[1], reverse=True)
+    return [url for url, _, _ in best[:RANK_TOP_PAGES]]
+
 
-    # ── helper: canonicalize host/path ───────────────────────────
-    def normalize_url(u: str) -> str:
+def _company_scope(company: str, country: str) -> str:
+    """Owner key for vector-index rows: same identity rule as Company."""
+    return "|".join(normalize_company_key(company, country))
+
+
+@timed_stage("rank")
+def _rank_candidates(batches: list[list], scopes: list[str] | None = None) -> list[list[str]]:
+    """
+    Pick the likeliest listings pages for each unresolved crawl.
+
+    All batches (one per company) are ranked from one batched encode
+    (helpers/embeddings.py). Top chunks map back to their page; pages under
+    EMBEDDING_MIN_SCORE are dropped. With ``scopes`` the chunk vectors are
+    also written to the persistent vector index (helpers/vector_index.py),
+    so the next ranking for that domain needs no crawl. Without the
+    embedding stack, or when nothing clears the bar, pages are ordered by
+    job-link count as before.
+    """
+    ranked: list[list[str] | None] = [None] * len(batches)
+    todo = [i for i, batch in enumerate(batches) if any(c[2] for c in batch)]
+    if todo:
         try:
-            p = urlparse(u)
-            host = p.netloc.replace("www.", "")
-            path = p.path.rstrip("/")
-            return urlunparse((p.scheme, host, path, "", "", ""))
+            from discovery.helpers.embeddings import RankJob, get_embedding_service
+            from discovery.helpers.vector_index import get_vector_index
+
+            service = get_embedding_service()
+            min_score = getattr(settings, "EMBEDDING_MIN_SCORE", 0.3)
+            jobs, owners = [], []
+            for i in todo:
+                urls = [url for url, _, chunks in batches[i] for _ in chunks]
+                texts = [chunk for _, _, chunks in batches[i] for chunk in chunks]
+                jobs.append(RankJob(RANK_QUERY, texts, k=RANK_TOP_CHUNKS))
+                owners.append(urls)
+
+            index = get_vector_index() if scopes else None
+            for i, urls, job, (query_vec, rows) in zip(todo, owners, jobs, service.encode_jobs(jobs)):
+                idx, scores = service.top_k(query_vec, rows, job.k)
+                best = [urls[j] for j, score in zip(idx, scores) if score >= min_score]
+                ranked[i] = list(dict.fromkeys(best))[:RANK_TOP_PAGES]
+                if index is not None:
+                    try:
+                        index.add(scopes[i], urls, rows)
+                    except (OSError, ValueError) as exc:
+                        logger.warning("[vector_index] Could not index %s: %s", scopes[i], exc)
         except Exception as exc:  # noqa: BLE001
-            logger.warning("[normalize_url] Failed (%s): %s", exc, u)
-            return u
+            logger.warning("[crawl_career_pages_task] Semantic ranking unavailable: %s", exc)
 
-    # ── Playwright scrape loop ──────────────────────────────────
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+    return [r or _rank_by_job_links(batch) for r, batch in zip(ranked, batches)]
 
-        for q in queries:
-            encoded = quote_plus(q)
-            ddg_url = f"https://duckduckgo.com/?t=h_&q={encoded}&ia=web"
 
-            try:
-                logger.debug("[search_normalize_task] GET %s", ddg_url)
-                page.goto(ddg_url, wait_until="domcontentloaded", timeout=30_000)
+def _ranked_from_index(scope: str, start_urls: list) -> list[str]:
+    """
+    Rank pages already in the vector index for these hosts (same company
+    only: shared hosts like job boards are indexed per owner). [] on a miss.
+    """
+    try:
+        from discovery.helpers.embeddings import get_embedding_service
+        from discovery.helpers.vector_index import get_vector_index
+    except ImportError:
+        return []
+    index = get_vector_index()
+    if index is None:
+        return []
+    hosts = {url_host(u) for u in start_urls}
+    try:
+        if not index.contains(scope, hosts):
+            return []
+        query_vec = get_embedding_service().encode([RANK_QUERY])[0]
+        found = index.search(
+            query_vec,
+            scope,
+            hosts,
+            k=RANK_TOP_PAGES,
+            min_score=getattr(settings, "EMBEDDING_MIN_SCORE", 0.3),
+        )
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("[vector_index] Lookup failed for %s: %s", scope, exc)
+        return []
+    return [url for url, _ in found]
 
-                # Wait until at least one organic result shows up
-                page.wait_for_selector('article[data-testid="result"]', timeout=10_000)
 
-                # Grab the first 5 result anchors
-                anchors = page.locator('article[data-testid="result"] h2 a').all()[:5]
+async def _collect_board(
+    platform: str, token: str, site: CareerSite | None = None, conditional: bool = False
+) -> tuple[list, BaseConnector]:
+    """
+    All jobs on one board via its connector (DB-backed validators and
+    feeds), plus the connector: call its ``save_validators()`` once the
+    jobs are written. Validators are kept per ``site``; ``conditional``
+    only when the site already has postings, so a 304 never skips a site
+    that has nothing stored.
+    """
+    extra = {"feeds": DbFeedStore()} if platform == FeedConnector.platform else {}
+    connector = get_connector(
+        platform,
+        validators=DbValidatorStore(),
+        validator_key=site.url if site is not None else None,
+        conditional=conditional,
+        **extra,
+    )
+    return [job async for job in connector.jobs(token)], connector
 
-                for a in anchors:
-                    href = a.get_attribute("href")
-                    if href and href.startswith(("http://", "https://")):
-                        logger.debug("[search_normalize_task] href=%s", href)
-                        raw_urls.append(href)
 
-                # Optional HTML snapshot for debugging
-                page_content = page.content()
-                fname = f"debug_{encoded[:50]}.html"
-                with open(fname, "w", encoding="utf-8") as fh:
-                    fh.write(page_content)
+def _sites_with_postings(sites: list[CareerSite]) -> set[int]:
+    return set(
+        JobPosting.objects.filter(career_site__in=sites, removed_at__isnull=True)
+        .values_list("career_site_id", flat=True)
+        .distinct()
+    )
 
-            except Exception as exc:  # noqa: BLE001
-                logger.warning(
-                    "[search_normalize_task] Error while querying '%s': %s", q, exc
-                )
 
-        browser.close()
+async def _fetch_board_jobs(sites: list[CareerSite], stored: set[int]) -> dict:
+    """
+    Pull every connector-backed board site through its JSON connector,
+    concurrently. Maps site pk → (JobRecords, connector), or None when the
+    board was unchanged (304) or the connector failed. ``stored``: pks of
+    sites that already have postings (conditional requests).
+    """
 
-    # ── dedupe / normalize ──────────────────────────────────────
-    normalized = list({normalize_url(u) for u in raw_urls})
+    async def one(site):
+        try:
+            return site.pk, await _collect_board(site.platform, site.board_token, site, site.pk in stored)
+        except NotModified:
+            logger.info("[crawl_career_pages_task] %s unchanged (304)", site.url)
+        except (ConnectorError, httpx.HTTPError) as exc:
+            logger.warning("[crawl_career_pages_task] %s connector failed: %s", site.url, exc)
+        return site.pk, None
+
+    return dict(await asyncio.gather(*(one(s) for s in sites if s.platform in CONNECTORS)))
+
+
+# ── captured job feeds ──────────────────────────────────────────
+def _capture_feeds(urls: list[str]) -> dict[str, str]:
+    """
+    Load ``urls`` recording their JSON responses and remember each one's
+    job feed (helpers/job_feeds.py); url → feed host. Pages the HTTP tier
+    serves are server-rendered and capture nothing. The fetcher opens at
+    most ``BROWSER_MAX_TABS`` tabs at once.
+    """
+    store = DbFeedStore()
+    found = {}
+    for url, res in get_fetcher().fetch_many(urls, capture_feeds=True).items():
+        spec = spec_from_captures(res.final_url or url, res.feeds) if res.feeds else None
+        if spec is None:
+            if res.tier == BROWSER:
+                JOB_FEEDS.inc(outcome="missed")
+            continue
+        store.set(spec)
+        found[url] = spec.host
+        JOB_FEEDS.inc(outcome="captured")
+        logger.info(
+            "[crawl_career_pages_task] %s: job feed %s %s (paging: %s)",
+            url,
+            spec.method,
+            spec.url,
+            spec.page_key or "none",
+        )
+    return found
+
+
+async def _replay_feeds(hosts: list[str]) -> dict:
+    """host → JobRecords from its remembered feed, or None when unchanged or broken."""
+
+    async def one(host):
+        try:
+            records, _ = await _collect_board(FeedConnector.platform, host)
+        except NotModified:
+            logger.info("[crawl_career_pages_task] %s feed unchanged (304)", host)
+            return host, None
+        except (ConnectorError, httpx.HTTPError) as exc:
+            # Recaptured in the browser next time round
+            logger.warning("[crawl_career_pages_task] %s feed replay failed, forgetting it: %s", host, exc)
+            await sync_to_async(DbFeedStore().forget)(host)
+            JOB_FEEDS.inc(outcome="stale")
+            return host, None
+        JOB_FEEDS.inc(outcome="replayed")
+        return host, records
+
+    return dict(await asyncio.gather(*(one(h) for h in hosts)))
+
+
+def _feed_jobs(urls: list[str]) -> dict[str, tuple[str, list | None]]:
+    """
+    Listings pages served by a JSON job feed: url → (feed host, JobRecords
+    or None). Hosts with a remembered feed are replayed straight away;
+    the rest are loaded once through the tiered fetcher with feed capture
+    (``FEED_CAPTURE_ENABLED``), HTTP first. One page per host carries the
+    feed.
+    """
+    by_host: dict[str, str] = {}
+    for url in urls:
+        by_host.setdefault(url_host(url), url)
+    if not by_host:
+        return {}
+    known = set(JobFeed.objects.filter(host__in=by_host).values_list("host", flat=True))
+    feeds = {url: host for host, url in by_host.items() if host in known}
+    unknown = [url for host, url in by_host.items() if host not in known]
+    if unknown and getattr(settings, "FEED_CAPTURE_ENABLED", True):
+        feeds.update(_capture_feeds(unknown))
+    if not feeds:
+        return {}
+    with timed_stage("feed_replay"):
+        jobs = run_async(_replay_feeds(list(dict.fromkeys(feeds.values()))))
+    # Feeds that failed to replay were forgotten; their pages stay plain listings pages
+    alive = set(JobFeed.objects.filter(host__in=jobs).values_list("host", flat=True))
+    return {url: (host, jobs.get(host)) for url, host in feeds.items() if host in alive}
+
+
+def _apply_board_jobs(site: CareerSite, records: list) -> UpsertResult:
+    """
+    Upsert a board's full job list, link written postings to the
+    company's near-duplicates and flag postings that disappeared.
+    """
+    result = JobPosting.objects.bulk_upsert(records, company=site.company, career_site=site)
+    with timed_stage("dedupe"):
+        result.duplicate_urls = JobPosting.objects.link_near_duplicates(
+            site.company, result.created_urls + result.updated_urls
+        )
+    result.removed_urls = JobPosting.objects.mark_removed(site, [r.url for r in records])
     logger.info(
-        "[search_normalize_task] %d unique URLs for %s (%s)",
-        len(normalized),
+        "[discovery] %s: %d new, %d changed, %d removed, %d unchanged, %d near-duplicate",
+        site.url,
+        result.created,
+        result.updated,
+        len(result.removed_urls),
+        result.unchanged,
+        len(result.duplicate_urls),
+    )
+    if result.duplicate_urls:
+        NEAR_DUPLICATES.inc(len(result.duplicate_urls), kind="posting")
+    return result
+
+
+def _save_site(owner: Company, url: str, **fields) -> CareerSite:
+    site, created = CareerSite.objects.update_or_create(
+        url=url, defaults={"company": owner, "last_crawled_at": timezone.now(), **fields}
+    )
+    if site.next_check_at is None:
+        site.next_check_at = timezone.now() + timedelta(seconds=site.check_interval)
+        site.save(update_fields=["next_check_at"])
+    return site
+
+
+def _save_career_sites(company: str, country: str, hits: list, listings: list[str]) -> None:
+    """
+    Record the discovered sites and upsert postings from ATS connectors,
+    or from a captured job feed for boards without one (Workday, iCIMS)
+    and plain listings pages. Confident boards without a connector still
+    go through the tiered fetcher: a server-rendered board is served over
+    HTTP and saved as a plain board site, and only a JS-rendered one (no
+    feed in its HTML) escalates to the browser to capture its feed.
+    """
+    owner = Company.for_name(company, country)
+    feeds = _feed_jobs([h.board_url for h in hits if h.platform not in CONNECTORS] + listings)
+
+    # Sites first: validators are kept per site, and a 304 only counts for one with postings
+    boards = [
+        _save_site(owner, hit.board_url, platform=hit.platform, board_token=hit.token)
+        for hit in hits
+        if hit.board_url not in feeds
+    ]
+    jobs = run_async(_fetch_board_jobs(boards, _sites_with_postings(boards))) if boards else {}
+    for site in boards:
+        collected = jobs.get(site.pk)
+        if collected is not None:
+            records, connector = collected
+            _apply_board_jobs(site, records)
+            connector.save_validators()
+
+    for url in listings:
+        if url not in feeds:
+            _save_site(owner, url)
+
+    # Saved as "feed" boards, so refresh_career_site_task replays them like any connector
+    for url, (host, records) in feeds.items():
+        site = _save_site(owner, url, platform=FeedConnector.platform, board_token=host)
+        if records is not None:
+            _apply_board_jobs(site, records)
+
+
+@dataclass
+class _Stage2:
+    """Where stage 2 got to for one company."""
+
+    hits: list = field(default_factory=list)  # confident ATS Detections
+    pages: list[str] = field(default_factory=list)  # confirmed listings pages
+    candidates: list = field(default_factory=list)  # (url, job_links, chunks) to rank
+    shortlist: list[str] = field(default_factory=list)  # ranked, awaiting verification
+
+    @property
+    def resolved(self) -> bool:
+        return bool(self.hits or self.pages)
+
+
+def _resolve_listings(normalized_urls: list, scope: str, reindex: bool = False) -> _Stage2:
+    """
+    Stage 2 up to (not including) ranking and verification. Unless
+    ``reindex``, hosts this company already has in the vector index are
+    shortlisted from it without crawling.
+    """
+    # ── fast path: known ATS boards skip crawling/rendering ─────
+    hits: list = []
+    to_crawl: list[str] = []
+    for url in normalized_urls:
+        hit = detect_from_url(url)
+        if hit is not None and hit.confident:
+            logger.info(
+                "[crawl_career_pages_task] %s board '%s' detected from URL",
+                hit.platform,
+                hit.token,
+            )
+            hits.append(hit)
+        else:
+            to_crawl.append(url)
+
+    if not hits and not reindex:
+        known = _ranked_from_index(scope, to_crawl)
+        if known:
+            logger.info(
+                "[crawl_career_pages_task] %d page(s) ranked from the vector index; crawl skipped",
+                len(known),
+            )
+            return _Stage2(shortlist=known)
+
+    # A confirmed board is the listings page; no need to crawl the rest
+    if hits:
+        found, candidates = [], []
+    else:
+        with timed_stage("crawl"):
+            found, candidates = run_async(_crawl_for_listings(to_crawl))
+    hits += [f for f in found if not isinstance(f, str)]
+    return _Stage2(
+        hits=list({h.board_url: h for h in hits}.values()),
+        pages=list(dict.fromkeys(f for f in found if isinstance(f, str))),
+        candidates=candidates,
+    )
+
+
+async def _verify_urls(urls: list[str]) -> dict:
+    return await ListingsVerifier.from_settings().verify_many(urls)
+
+
+@timed_stage("verify")
+def _verify_shortlists(shortlists: list[list[str]]) -> list[list[str]]:
+    """
+    Keep only shortlisted pages that verify as listings pages (possibly
+    via their search form). All companies' candidates are checked in one
+    concurrent pass (helpers/verify.py).
+    """
+    urls = [u for shortlist in shortlists for u in shortlist]
+    if not urls or not getattr(settings, "VERIFY_CANDIDATES", True):
+        return shortlists
+    verdicts = run_async(_verify_urls(urls))
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        llm_cache.flush_stats()
+    return [
+        list(dict.fromkeys(verdicts[u].listings_url for u in shortlist if verdicts[u].ok))
+        for shortlist in shortlists
+    ]
+
+
+def _finish_listings(company: str, country: str, hits: list, pages: list[str]) -> list:
+    _save_career_sites(company, country, hits, pages)
+    listings = [h.board_url for h in hits] + pages
+    logger.debug("[crawl_career_pages_task] Listings=%s", listings)
+    return listings
+
+
+@shared_task
+def crawl_career_pages_task(
+    normalized_urls: list, company: str, country: str, reindex: bool = False, job_id: str | None = None
+):
+    """
+    Stage 2: BFS-crawl from the stage-1 URLs (helpers/crawler.py) and return
+    the career listings page(s) found, best first.
+
+    • URLs that tier-1 ATS detection (helpers/ats.py) pins to a known board
+      are routed straight to their platform board; no fetch or browser.
+    • Boards with a JSON connector (discovery/connectors) are pulled through
+      it and their postings bulk-upserted; every listings page found is
+      saved as a CareerSite.
+    • Boards without a connector and JS-rendered listings pages get a
+      browser pass that captures the JSON feed behind the page; the feed
+      is paged through over HTTP and remembered per host
+      (helpers/job_feeds.py, the ``feed`` connector).
+    • Streams pages; stops scheduling as soon as a listings page is confirmed.
+    • Otherwise the crawled pages are ranked semantically against
+      "job listings page" (helpers/embeddings.py) and their chunks kept in
+      the vector index; a later call for the same domain ranks from the
+      index instead of crawling (``reindex=True`` forces a fresh crawl).
+    • Ranked pages are verified (structural heuristic, then the LLM for
+      ambiguous ones) before they are saved.
+    • Returns [] when nothing job-like was reached.
+    • With ``job_id``, publishes per-stage progress and a final "done"
+      event carrying the listings URLs.
+    """
+    bind_log_context(company=company, country=country)
+    logger.info(
+        "[crawl_career_pages_task] Starting task for company=%s, country=%s",
         company,
         country,
     )
-    logger.debug("[search_normalize_task] URLs=%s", normalized)
-    return normalized
+    logger.debug("[crawl_career_pages_task] URLs=%s", normalized_urls)
+    if not normalized_urls:
+        publish_progress(job_id, "done", company=company, country=country, urls=[])
+        return []
+
+    scope = _company_scope(company, country)
+    publish_progress(job_id, "stage", stage="crawl", status="started", start_urls=len(normalized_urls))
+    stage = _resolve_listings(normalized_urls, scope, reindex)
+    publish_progress(
+        job_id, "stage", stage="crawl", status="done", boards=len(stage.hits), pages=len(stage.pages)
+    )
+    if not stage.resolved:
+        if stage.candidates:
+            publish_progress(job_id, "stage", stage="rank", status="started", candidates=len(stage.candidates))
+            stage.shortlist = _rank_candidates([stage.candidates], [scope])[0]
+        publish_progress(job_id, "stage", stage="verify", status="started", shortlist=len(stage.shortlist))
+        stage.pages = _verify_shortlists([stage.shortlist])[0]
+    listings = _finish_listings(company, country, stage.hits, stage.pages)
+    publish_progress(job_id, "done", company=company, country=country, urls=listings)
+    return listings
+
+
+@shared_task(bind=True)
+def discover_companies_batch_task(self, companies: list, batch_id: str):
+    """
+    Bulk fan-out unit: runs Stage 1 → Stage 2 for a chunk of companies
+    inside one worker, so the whole chunk reuses that worker's browser.
+
+    `companies` is a list of [company, country] pairs. Progress is
+    aggregated per batch in Redis (see helpers/batches.py).
+    """
+    bind_log_context(batch_id=batch_id)
+    logger.info(
+        "[discover_companies_batch_task] batch=%s chunk of %d companies",
+        batch_id,
+        len(companies),
+    )
+    results = []
+    incremental = getattr(settings, "DISCOVERY_INCREMENTAL", True)
+    unresolved = []  # (company, country, _Stage2) awaiting shared ranking/verification
+
+    def failed(company, country, exc):
+        logger.warning(
+            "[discover_companies_batch_task] %s (%s) failed: %s",
+            company,
+            country,
+            exc,
+        )
+        record_company(batch_id, ok=False)
+        results.append({"company": company, "country": country, "error": str(exc)})
+        publish_progress(batch_id, "company", company=company, country=country, error=str(exc))
+
+    def done(company, country, urls):
+        record_company(batch_id, ok=True, urls_found=len(urls))
+        results.append({"company": company, "country": country, "urls": urls})
+        publish_progress(batch_id, "company", company=company, country=country, urls=urls)
+
+    for company, country in companies:
+        with log_context(company=company, country=country):
+            try:
+                site_ids = known_career_site_ids(company, country) if incremental else []
+                if site_ids:
+                    # Known company: refresh its sites instead of rediscovering
+                    for site_id in site_ids:
+                        refresh_career_site_task(site_id)
+                    urls = list(
+                        CareerSite.objects.filter(pk__in=site_ids).values_list("url", flat=True)
+                    )
+                else:
+                    urls = search_normalize_task(company, country)
+                    stage = _resolve_listings(urls, _company_scope(company, country)) if urls else _Stage2()
+                    if not stage.resolved and (stage.candidates or stage.shortlist):
+                        unresolved.append((company, country, stage))
+                        continue
+                    urls = _finish_listings(company, country, stage.hits, stage.pages)
+            except Exception as exc:  # noqa: BLE001
+                failed(company, country, exc)
+                continue
+            done(company, country, urls)
+
+    # One batched encode, then one concurrent verification pass, for every
+    # company the crawl couldn't settle
+    if unresolved:
+        to_rank = [(c, k, stage) for c, k, stage in unresolved if stage.candidates]
+        if to_rank:
+            ranked = _rank_candidates(
+                [stage.candidates for _, _, stage in to_rank],
+                [_company_scope(company, country) for company, country, _ in to_rank],
+            )
+            for (_, _, stage), shortlist in zip(to_rank, ranked):
+                stage.shortlist = shortlist
+        verified = _verify_shortlists([stage.shortlist for _, _, stage in unresolved])
+        for (company, country, _), pages in zip(unresolved, verified):
+            try:
+                urls = _finish_listings(company, country, [], pages)
+            except Exception as exc:  # noqa: BLE001
+                failed(company, country, exc)
+                continue
+            done(company, country, urls)
+
+    # The last chunk to finish closes the batch's progress stream
+    if record_chunk_done(batch_id):
+        publish_progress(batch_id, "done", **(get_batch(batch_id) or {}))
+    return results
+
+
+# ── incremental refresh ─────────────────────────────────────────
+async def _conditional_get(url: str, etag: str | None, last_modified: str | None):
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return await get_async_client().get(url, headers=headers)
+
+
+def known_career_site_ids(company: str, country: str) -> list[int]:
+    """CareerSites already discovered for this company (incremental mode)."""
+    name_key, country_key = normalize_company_key(company, country)
+    return list(
+        CareerSite.objects.filter(
+            company__name_key=name_key, company__country_key=country_key
+        ).values_list("pk", flat=True)
+    )
+
+
+def _refresh_finished(job_id: str | None, site: CareerSite | None, ok: bool) -> None:
+    """Count one site of a refresh job; the last one closes its stream."""
+    if not job_id:
+        return
+    record_company(job_id, ok=ok)
+    if not record_chunk_done(job_id):
+        return
+    if site is None:
+        publish_progress(job_id, "done", urls=[])
+        return
+    urls = list(CareerSite.objects.filter(company=site.company).values_list("url", flat=True))
+    publish_progress(job_id, "done", company=site.company.name, country=site.company.country, urls=urls)
+
+
+@shared_task
+def refresh_career_site_task(site_id: int, job_id: str | None = None) -> dict | None:
+    """
+    Incremental re-crawl of one known CareerSite.
+
+    • ATS boards: conditional request through the connector (ETag /
+      Last-Modified kept in PageFingerprint). 304 → nothing to do; otherwise
+      hash-gated upsert + removal sweep.
+    • Other pages: conditional GET, then a normalized-content hash; only a
+      real change queues a Stage-2 re-crawl of that site. No postings are
+      stored for such a page, so there is no delta to compute here: the
+      re-crawl saves whatever board or feed it finds on its own.
+
+    Returns the delta {"new": [...], "changed": [...], "removed": [...]},
+    or None when a re-crawl was queued and the delta isn't known, and
+    reschedules the site on its adaptive interval. With ``job_id`` (a
+    known company re-queued from the API) each site publishes its result
+    and the last one to finish publishes "done".
+    """
+    site = CareerSite.objects.select_related("company").filter(pk=site_id).first()
+    if site is None:
+        _refresh_finished(job_id, None, ok=False)
+        return {}
+    bind_log_context(site_id=site_id, company=site.company.name)
+    publish_progress(job_id, "stage", stage="refresh", status="started", site=site.url)
+
+    delta: dict | None = {"new": [], "changed": [], "removed": []}
+    changed = False
+    error = None
+    try:
+        if site.platform in CONNECTORS and site.board_token:
+            stored = bool(_sites_with_postings([site]))
+            try:
+                records, connector = run_async(_collect_board(site.platform, site.board_token, site, stored))
+            except NotModified:
+                records = None
+            if records is not None:
+                delta = _apply_board_jobs(site, records).delta()
+                connector.save_validators()
+                changed = any(delta.values())
+        else:
+            etag, last_modified = PageFingerprint.get_validators(site.url)
+            resp = run_async(_conditional_get(site.url, etag, last_modified))
+            if resp.status_code != 304 and resp.status_code < 400:
+                PageFingerprint.set_validators(
+                    site.url, resp.headers.get("etag"), resp.headers.get("last-modified")
+                )
+                changed = PageFingerprint.record_content(
+                    site.url, content_fingerprint(resp.text)
+                )
+            if changed:
+                crawl_career_pages_task.delay(
+                    [site.url], site.company.name, site.company.country, reindex=True
+                )
+                delta = None
+    except (ConnectorError, httpx.HTTPError) as exc:
+        logger.warning("[refresh_career_site_task] %s failed: %s", site.url, exc)
+        error = str(exc) or type(exc).__name__
+
+    site.schedule_next_check(changed)
+    site.save(update_fields=["check_interval", "next_check_at", "last_crawled_at", "last_changed_at"])
+    logger.info(
+        "[refresh_career_site_task] %s changed=%s next check in %ds",
+        site.url,
+        changed,
+        site.check_interval,
+    )
+    publish_progress(
+        job_id,
+        "site",
+        site=site.url,
+        changed=changed,
+        error=error,
+        recrawl=delta is None,
+        # Unknown until the queued re-crawl has been through the page
+        new=None if delta is None else len(delta["new"]),
+        updated=None if delta is None else len(delta["changed"]),
+        removed=None if delta is None else len(delta["removed"]),
+    )
+    _refresh_finished(job_id, site, ok=error is None)
+    return delta
 
 
 @shared_task
-def crawl_career_pages_task(normalized_urls: list, company: str, country: str):
+def refresh_due_sites_task(limit: int = 500) -> int:
     """
-    Placeholder for Stage 2.
-    Right now it just logs and echoes the normalized URLs.
-    Later you’ll replace this with your BFS crawler.
+    Celery beat entry point: queue a refresh for every CareerSite whose
+    adaptive interval has elapsed. Sites are leased (next_check_at pushed
+    forward) before dispatch so overlapping beats don't double-queue them.
     """
-    logger.info(f"[crawl_career_pages_task] Starting task for company: {company}, country: {country}")
-    logger.debug(f"[crawl_career_pages_task] URLs: {normalized_urls}")
-    return normalized_urls
+    now = timezone.now()
+    due = list(
+        CareerSite.objects.filter(next_check_at__lte=now)
+        .order_by("next_check_at")
+        .values_list("pk", flat=True)[:limit]
+    )
+    if not due:
+        return 0
+
+    CareerSite.objects.filter(pk__in=due).update(next_check_at=now + timedelta(hours=1))
+    group(refresh_career_site_task.s(pk) for pk in due).apply_async()
+    logger.info("[refresh_due_sites_task] Queued %d site refreshes", len(due))
+    return len(due)
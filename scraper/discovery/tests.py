@@ -1,3 +1,1845 @@
-from django.test import TestCase
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
 
-# Create your tests here.
+import httpx
+import redis
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+
+from discovery.connectors import ConnectorError, FeedStore, JobRecord, NotModified, ValidatorStore, get_connector
+from discovery.helpers.ats import HTML_SCAN_BYTES, detect, detect_from_html, detect_from_url
+from discovery.helpers.browser_pool import BrowserPool, get_browser_pool
+from discovery.helpers.crawler import CareerCrawler, count_job_links
+from discovery.helpers.dom_chunker import TemplateMemory, iter_dom_chunks
+from discovery.helpers.fetcher import (
+    HOST_BUSY,
+    FetchResult,
+    TieredFetcher,
+    TierMemory,
+    _page_result,
+    _track_status,
+    browser_fetch_many,
+    looks_rendered,
+)
+from discovery.helpers.job_feeds import CapturedResponse, FeedSpec, find_job_list, spec_from_captures
+from discovery.helpers.fingerprints import chunk_text, content_fingerprint, visible_text
+from discovery.helpers.llm import OllamaClassifier, parse_answers
+from discovery.helpers.llm_cache import VerdictCache, verdict_key
+from discovery.helpers import browser_pool, metrics, progress
+from discovery.helpers.metrics import Counter as MetricCounter, Gauge, Histogram, Registry
+from discovery.helpers.near_dupes import NearDuplicateIndex, minhash, similarity
+from discovery.helpers.pagescraper import extract_structured
+from discovery.helpers.politeness import PolitenessScheduler, TokenBucket, _retry_after_seconds
+from discovery.helpers.posting_search import SearchError, SearchQuery, search_postings
+from discovery.helpers.progress import sse_frame
+from discovery.helpers.render_profiles import apply_profile, get_profile, profile_for_url, render_stats
+from discovery.helpers.serp_cache import SerpCache, cache_key
+from discovery.helpers.snapshots import SnapshotStore
+from discovery.helpers.urls import canonical_job_url
+from discovery.helpers.verify import ListingsVerifier, find_search_url, structural_signals
+from discovery import tasks
+from discovery.tasks import _parse_serp_links, refresh_career_site_task
+from discovery.models import CareerSite, Company, DbFeedStore, JobPosting, PageFingerprint
+from discovery import views
+import logging_config
+from logging_config import log_context
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "connectors"
+
+
+def _fixture(name: str):
+    return json.loads((FIXTURES / name).read_text(encoding="utf-8"))
+
+
+def _collect(connector, token: str) -> list:
+    async def run():
+        return [job async for job in connector.jobs(token)]
+
+    return asyncio.run(run())
+
+
+class _FakeRedis:
+    """Just enough of redis.Redis (strings, hashes, pipelines) for the Redis-backed helpers."""
+
+    def __init__(self):
+        self.data: dict = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def hincrbyfloat(self, key, field, amount):
+        table = self.data.setdefault(key, {})
+        table[field] = str(float(table.get(field, 0)) + amount)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        fake = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *a, **kw: self.calls.append((name, a, kw))
+
+            def execute(self):
+                return [getattr(fake, name)(*a, **kw) for name, a, kw in self.calls]
+
+        return Pipeline()
+
+
+class ATSDetectionTests(SimpleTestCase):
+    def test_tier_one_reads_platform_and_board_from_the_url(self):
+        cases = {
+            "https://boards.greenhouse.io/acme/jobs/123": (
+                "greenhouse", "acme", "https://boards.greenhouse.io/acme"
+            ),
+            "https://jobs.eu.lever.co/acme?team=eng": ("lever", "acme", "https://jobs.lever.co/acme"),
+            "https://acme.wd5.myworkdayjobs.com/en-US/External/job/1": (
+                "workday", "External", "https://acme.wd5.myworkdayjobs.com/External"
+            ),
+            "https://acme.bamboohr.com/careers/42": ("bamboohr", "acme", "https://acme.bamboohr.com/careers"),
+            "https://boards.greenhouse.io/embed/job_board?for=acme": (
+                "greenhouse", "acme", "https://boards.greenhouse.io/acme"
+            ),
+        }
+        for url, (platform, token, board_url) in cases.items():
+            with self.subTest(url=url):
+                found = detect_from_url(url)
+                self.assertEqual(
+                    (found.platform, found.token, found.board_url, found.tier), (platform, token, board_url, 1)
+                )
+                self.assertTrue(found.confident)
+
+    def test_platform_without_board_is_not_confident(self):
+        found = detect_from_url("https://www.greenhouse.io/customers")
+        self.assertEqual(found.platform, "greenhouse")
+        self.assertFalse(found.confident)
+        self.assertIsNone(detect_from_url("https://acme.com/careers"))
+        self.assertIsNone(detect_from_url("https://notlever.co.example.com/acme"))
+
+    def test_tier_two_scans_the_head_of_the_html(self):
+        embedded = "<script src='https://boards.greenhouse.io/embed/job_board/js?for=acme'></script>"
+        found = detect("https://acme.com/careers", "<html>" + embedded)
+        self.assertEqual((found.platform, found.token, found.tier, found.url), (
+            "greenhouse", "acme", 2, "https://acme.com/careers"
+        ))
+        self.assertTrue(found.confident)
+
+        marker = detect("https://acme.com/careers", "<div id='lever-jobs-container'></div>")
+        self.assertEqual((marker.platform, marker.confident), ("lever", False))
+
+        late = "x" * HTML_SCAN_BYTES + embedded
+        self.assertIsNone(detect_from_html(late))
+
+    def test_confident_url_skips_the_html(self):
+        other = "<script src='https://boards.greenhouse.io/embed/job_board?for=x'></script>"
+        found = detect("https://jobs.lever.co/acme", other)
+        self.assertEqual((found.platform, found.tier), ("lever", 1))
+
+
+class SerpCacheTests(SimpleTestCase):
+    def test_key_ignores_case_and_whitespace(self):
+        self.assertEqual(
+            cache_key("Acme  Corp", "canada", "careers"), cache_key(" acme corp", "Canada", "Careers ")
+        )
+        self.assertNotEqual(cache_key("Acme", "Canada", "careers"), cache_key("Acme", "Canada", "jobs"))
+
+    def test_local_entries_expire_and_least_recent_is_evicted(self):
+        cache = SerpCache(ttl=60, max_entries=2, backend="local")
+        with mock.patch("discovery.helpers.serp_cache.time.monotonic", return_value=1000.0) as clock:
+            cache.set("Acme", "Canada", "q1", ["https://a.test"])
+            cache.set("Acme", "Canada", "q2", ["https://b.test"])
+            self.assertEqual(cache.get("Acme", "Canada", "q1"), ["https://a.test"])  # q1 now most recent
+            cache.set("Acme", "Canada", "q3", ["https://c.test"])
+            self.assertIsNone(cache.get("Acme", "Canada", "q2"))
+            self.assertEqual(cache.get("Acme", "Canada", "q3"), ["https://c.test"])
+
+            clock.return_value = 1061.0
+            self.assertIsNone(cache.get("Acme", "Canada", "q1"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (2, 2, 1))
+
+    def test_falls_back_to_local_while_redis_is_down(self):
+        cache = SerpCache(ttl=60, max_entries=10, backend="redis")
+        down = mock.Mock(side_effect=redis.ConnectionError("refused"))
+        with mock.patch("discovery.helpers.serp_cache.get_redis", down):
+            cache.set("Acme", "Canada", "careers", ["https://acme.com/careers"])
+            self.assertEqual(cache.get("Acme", "Canada", "careers"), ["https://acme.com/careers"])
+        self.assertEqual(down.call_count, 1)  # not retried on every lookup
+
+    def test_off_backend_never_stores(self):
+        cache = SerpCache(ttl=60, max_entries=10, backend="off")
+        cache.set("Acme", "Canada", "careers", ["https://acme.com/careers"])
+        self.assertIsNone(cache.get("Acme", "Canada", "careers"))
+
+
+class LeverConnectorTests(SimpleTestCase):
+    def setUp(self):
+        self.postings = _fixture("lever_postings.json")
+        self.requests = []
+
+    def _client(self, handler):
+        def record(request):
+            self.requests.append(request)
+            return handler(request)
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(record))
+
+    def test_normalizes_recorded_postings(self):
+        client = self._client(lambda r: httpx.Response(200, json=self.postings))
+        jobs = _collect(get_connector("lever", client=client, validators=ValidatorStore()), "acme")
+
+        self.assertEqual(len(jobs), 3)
+        first = jobs[0]
+        self.assertEqual(first.platform, "lever")
+        self.assertEqual(first.board, "acme")
+        self.assertEqual(first.external_id, "5f1c9b2e-7a44-4d3e-9c0b-2b8f6a1d4e01")
+        self.assertEqual(first.title, "Senior Backend Engineer")
+        self.assertEqual(first.location, "Toronto, ON")
+        self.assertEqual(first.department, "Engineering")
+        self.assertEqual(first.employment_type, "Full-time")
+        self.assertFalse(first.remote)
+        self.assertEqual(first.posted_at, datetime(2024, 5, 1, 16, 0, tzinfo=timezone.utc))
+        # Empty department falls back to the team
+        self.assertEqual(jobs[1].department, "Design")
+        self.assertTrue(jobs[1].remote)
+
+        url = self.requests[0].url
+        self.assertEqual(url.path, "/v0/postings/acme")
+        self.assertEqual(url.params["mode"], "json")
+
+    def test_paginates_with_skip_and_limit(self):
+        def handler(request):
+            skip = int(request.url.params["skip"])
+            limit = int(request.url.params["limit"])
+            return httpx.Response(200, json=self.postings[skip:skip + limit])
+
+        connector = get_connector("lever", client=self._client(handler), validators=ValidatorStore())
+        connector.page_size = 2
+        jobs = _collect(connector, "acme")
+
+        self.assertEqual([j.title for j in jobs][-1], "Customer Support Specialist")
+        self.assertEqual([r.url.params["skip"] for r in self.requests], ["0", "2"])
+
+    def test_conditional_request_raises_not_modified(self):
+        def handler(request):
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json=self.postings, headers={"ETag": '"v1"'})
+
+        connector = get_connector("lever", client=self._client(handler), validators=ValidatorStore())
+        self.assertEqual(len(_collect(connector, "acme")), 3)
+        # Held until the caller has written the jobs
+        self.assertEqual(len(_collect(connector, "acme")), 3)
+        self.assertNotIn("if-none-match", self.requests[-1].headers)
+        connector.save_validators()
+        with self.assertRaises(NotModified):
+            _collect(connector, "acme")
+        self.assertEqual(self.requests[-1].headers["if-none-match"], '"v1"')
+
+    def test_multi_page_boards_keep_no_validators(self):
+        def handler(request):
+            skip = int(request.url.params["skip"])
+            return httpx.Response(200, json=self.postings[skip:skip + 2], headers={"ETag": '"v1"'})
+
+        connector = get_connector("lever", client=self._client(handler), validators=ValidatorStore())
+        connector.page_size = 2
+        _collect(connector, "acme")
+        self.assertIsNone(connector.fresh_validators)
+
+
+class GreenhouseConnectorTests(SimpleTestCase):
+    def test_normalizes_recorded_jobs(self):
+        payload = _fixture("greenhouse_jobs.json")
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(
+                200, json=payload, headers={"Last-Modified": "Wed, 12 Jun 2024 08:30:00 GMT"}
+            )
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        connector = get_connector("greenhouse", client=client, validators=ValidatorStore())
+        jobs = _collect(connector, "acme")
+
+        self.assertEqual(len(jobs), 2)
+        data_eng, manager = jobs
+        self.assertEqual(data_eng.external_id, "4012345007")
+        self.assertEqual(data_eng.url, "https://boards.greenhouse.io/acme/jobs/4012345007")
+        self.assertEqual(data_eng.department, "Data")
+        self.assertEqual(data_eng.description, "About the role Build data pipelines & tooling.")
+        self.assertEqual(data_eng.extra["requisition_id"], "REQ-118")
+        self.assertEqual(data_eng.posted_at.isoformat(), "2024-05-02T09:15:00-04:00")
+        # No first_published → falls back to updated_at
+        self.assertEqual(manager.posted_at, datetime(2024, 6, 12, 8, 30, tzinfo=timezone.utc))
+        self.assertTrue(manager.remote)
+        self.assertEqual(manager.department, "")
+
+        self.assertEqual(seen[0].url.path, "/v1/boards/acme/jobs")
+        self.assertEqual(seen[0].url.params["content"], "true")
+
+        connector.save_validators()
+        _collect(connector, "acme")
+        self.assertEqual(seen[1].headers["if-modified-since"], "Wed, 12 Jun 2024 08:30:00 GMT")
+
+
+def _workday_jobs(offset: int, limit: int, total: int = 45) -> dict:
+    return {
+        "total": total,
+        "facets": [{"facetParameter": "locations", "values": [{"descriptor": "Toronto", "id": "t1"}] * 3}],
+        "jobPostings": [
+            {
+                "title": f"Engineer {n}",
+                "externalPath": f"/job/Toronto/Engineer_R{n}",
+                "locationsText": "Toronto, ON",
+                "bulletFields": [f"R{n}"],
+            }
+            for n in range(offset, min(offset + limit, total))
+        ],
+    }
+
+
+class JobFeedTests(TestCase):
+    PAGE = "https://acme.wd5.myworkdayjobs.com/en-US/External"
+    API = "https://acme.wd5.myworkdayjobs.com/wday/cxs/acme/External/jobs"
+
+    def _capture(self, offset: int) -> CapturedResponse:
+        return CapturedResponse(
+            url=self.API,
+            method="POST",
+            post_data=json.dumps({"appliedFacets": {}, "limit": 20, "offset": offset, "searchText": ""}),
+            headers={"content-type": "application/json", "cookie": "session=1"},
+            payload=_workday_jobs(offset, 20),
+        )
+
+    def test_finds_the_job_list_and_the_paging_parameter(self):
+        path, items = find_job_list(_workday_jobs(0, 20))
+        self.assertEqual((path, len(items)), (["jobPostings"], 20))
+        self.assertIsNone(find_job_list({"menu": [{"name": "Home", "id": 1}, {"name": "About", "id": 2}]}))
+
+        config = CapturedResponse(url="https://acme.wd5.myworkdayjobs.com/config", payload={"theme": "dark"})
+        spec = spec_from_captures(self.PAGE, [config, self._capture(20), self._capture(0)])
+        self.assertEqual((spec.url, spec.method, spec.items_path), (self.API, "POST", ["jobPostings"]))
+        self.assertEqual((spec.page_in, spec.page_key, spec.page_kind, spec.page_start), ("body", "offset", "offset", 0))
+        self.assertEqual(spec.headers, {"content-type": "application/json"})  # no cookies
+        self.assertEqual(spec.host, "acme.wd5.myworkdayjobs.com")
+
+        # One capture: falls back to the well-known name
+        single = spec_from_captures(self.PAGE, [self._capture(0)])
+        self.assertEqual((single.page_key, single.page_kind), ("offset", "offset"))
+
+    def test_replays_the_feed_over_http(self):
+        requests = []
+
+        def handler(request):
+            body = json.loads(request.content)
+            requests.append(body["offset"])
+            return httpx.Response(200, json=_workday_jobs(body["offset"], body["limit"]))
+
+        feeds = FeedStore()
+        feeds.set(spec_from_captures(self.PAGE, [self._capture(0), self._capture(20)]))
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        jobs = _collect(get_connector("feed", client=client, validators=ValidatorStore(), feeds=feeds),
+                        "acme.wd5.myworkdayjobs.com")
+
+        self.assertEqual(requests, [0, 20, 40])  # stops at the stated total
+        self.assertEqual(len(jobs), 45)
+        self.assertEqual(jobs[0].url, "https://acme.wd5.myworkdayjobs.com/job/Toronto/Engineer_R0")
+        self.assertEqual((jobs[44].external_id, jobs[44].location, jobs[44].platform), ("R44", "Toronto, ON", "feed"))
+
+    def test_replay_stops_when_the_endpoint_ignores_paging(self):
+        items = [{"title": f"Role {n}", "url": f"/careers/{n}"} for n in range(5)]
+        pages = []
+
+        def handler(request):
+            pages.append(request.url.params["page"])
+            return httpx.Response(200, json={"results": items})
+
+        feeds = FeedStore()
+        feeds.set(FeedSpec(page_url="https://spa.io/careers", url="https://spa.io/api/jobs?page=1",
+                           items_path=["results"], page_key="page", page_kind="page", page_start=1))
+        connector = get_connector("feed", client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+                                  validators=ValidatorStore(), feeds=feeds)
+        self.assertEqual(len(_collect(connector, "spa.io")), 5)
+        self.assertEqual(pages, ["1", "2"])
+        with self.assertRaises(ConnectorError):
+            _collect(connector, "unknown.io")
+
+    def test_boards_without_a_connector_try_http_before_the_browser(self):
+        icims = detect_from_url("https://careers-acme.icims.com/jobs/search")
+        workday = detect_from_url(self.PAGE)
+        pages = {"careers-acme.icims.com": LISTINGS_HTML, "acme.wd5.myworkdayjobs.com": JS_SHELL_HTML}
+        http_gets, browser_calls = [], []
+
+        def handler(request):
+            http_gets.append(request.url.host)
+            return httpx.Response(200, text=pages[request.url.host], headers={"content-type": "text/html"})
+
+        def browser_fetch(urls, **kwargs):
+            browser_calls.append((list(urls), kwargs["capture_feeds"]))
+            feeds = [self._capture(0), self._capture(20)]
+            return {u: FetchResult(url=u, final_url=u, status=200, html=LISTINGS_HTML, tier="browser", feeds=feeds)
+                    for u in urls}
+
+        async def replay(hosts):
+            return dict.fromkeys(hosts)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        fetcher = TieredFetcher(
+            memory=TierMemory(ttl=60, backend="local"),
+            client=client,
+            scheduler=PolitenessScheduler(rate=1000, burst=1000, client=client),
+            browser_fetch=browser_fetch,
+        )
+        with mock.patch.object(tasks, "get_fetcher", return_value=fetcher), \
+                mock.patch.object(tasks, "_replay_feeds", side_effect=replay):
+            tasks._save_career_sites("Acme", "Canada", [icims, workday], [])
+
+        self.assertEqual(sorted(http_gets), ["acme.wd5.myworkdayjobs.com", "careers-acme.icims.com"])
+        self.assertEqual(browser_calls, [([workday.board_url], True)])  # only the JS-rendered board
+        sites = dict(CareerSite.objects.values_list("url", "platform"))
+        self.assertEqual(sites, {icims.board_url: "icims", workday.board_url: "feed"})
+
+    def test_feeds_are_remembered_per_host(self):
+        store = DbFeedStore()
+        spec = spec_from_captures(self.PAGE, [self._capture(0)])
+        store.set(spec)
+        self.assertEqual(store.get("acme.wd5.myworkdayjobs.com"), spec)
+        store.forget("acme.wd5.myworkdayjobs.com")
+        self.assertIsNone(store.get("acme.wd5.myworkdayjobs.com"))
+
+
+class JobPostingUpsertTests(TestCase):
+    def setUp(self):
+        self.company = Company.for_name("  Acme   Corp ", "Canada")
+        self.site = CareerSite.objects.create(
+            company=self.company, url="https://jobs.lever.co/acme", platform="lever"
+        )
+
+    def _record(self, n: int, title: str = "Engineer") -> JobRecord:
+        return JobRecord(
+            platform="lever",
+            board="acme",
+            external_id=str(n),
+            title=f"{title} {n}",
+            url=f"https://jobs.lever.co/acme/{n}?lever-source=LinkedIn",
+        )
+
+    def test_company_identity_is_case_and_whitespace_insensitive(self):
+        self.assertEqual(Company.for_name("acme corp", "canada"), self.company)
+        self.assertEqual(Company.objects.count(), 1)
+
+    def test_only_new_and_changed_rows_are_written(self):
+        records = [self._record(n) for n in range(5)]
+        first = JobPosting.objects.bulk_upsert(records, company=self.company, career_site=self.site)
+        self.assertEqual((first.created, first.updated, first.unchanged), (5, 0, 0))
+
+        posting = JobPosting.objects.get(canonical_url="https://jobs.lever.co/acme/3")
+        first_seen = posting.first_seen_at
+
+        records[3] = self._record(3, title="Staff Engineer")
+        records.append(self._record(5))
+        # Tracking-param variant of an existing posting is the same row
+        records.append(self._record(0))
+        with self.assertNumQueries(2):  # one hash lookup, one upsert
+            second = JobPosting.objects.bulk_upsert(records, company=self.company, career_site=self.site)
+
+        self.assertEqual((second.created, second.updated, second.unchanged), (1, 1, 4))
+        self.assertEqual(JobPosting.objects.count(), 6)
+        posting.refresh_from_db()
+        self.assertEqual(posting.title, "Staff Engineer 3")
+        self.assertEqual(posting.first_seen_at, first_seen)
+
+    def test_removed_postings_are_flagged_and_come_back(self):
+        JobPosting.objects.bulk_upsert(
+            [self._record(n) for n in range(3)], company=self.company, career_site=self.site
+        )
+        removed = JobPosting.objects.mark_removed(
+            self.site, [self._record(n).url for n in (0, 2)]
+        )
+        self.assertEqual(removed, ["https://jobs.lever.co/acme/1"])
+        self.assertIsNotNone(JobPosting.objects.get(canonical_url=removed[0]).removed_at)
+
+        again = JobPosting.objects.bulk_upsert(
+            [self._record(1)], company=self.company, career_site=self.site
+        )
+        self.assertEqual(again.delta(), {"new": [], "changed": [removed[0]], "removed": []})
+        self.assertIsNone(JobPosting.objects.get(canonical_url=removed[0]).removed_at)
+
+    def test_near_duplicate_postings_link_to_the_first_seen(self):
+        description = (
+            "We are looking for a backend engineer to build and operate the payment APIs "
+            "that power checkout for thousands of merchants. You will own services end to end, "
+            "from design reviews to on-call, and work closely with product and data teams. "
+            "Experience with Python, PostgreSQL and distributed systems is a strong plus."
+        )
+        ats = dict(self._record(1).as_dict(), title="Backend Engineer", location="Toronto",
+                   description=description)
+        mirror = dict(ats, url="https://acme.com/careers/backend-engineer",
+                      description=description + " Apply today!")
+        other = dict(ats, url="https://acme.com/careers/designer", title="Product Designer",
+                     description="Design the merchant dashboard with our research team in Toronto.")
+        JobPosting.objects.bulk_upsert([ats], company=self.company, career_site=self.site)
+        JobPosting.objects.link_near_duplicates(self.company, [canonical_job_url(ats["url"])])
+
+        result = JobPosting.objects.bulk_upsert([mirror, other], company=self.company)
+        dupes = JobPosting.objects.link_near_duplicates(self.company, result.created_urls)
+
+        self.assertEqual(dupes, ["https://acme.com/careers/backend-engineer"])
+        original = JobPosting.objects.get(canonical_url="https://jobs.lever.co/acme/1")
+        self.assertEqual(
+            JobPosting.objects.get(canonical_url=dupes[0]).duplicate_of, original
+        )
+        self.assertIsNone(JobPosting.objects.get(canonical_url="https://acme.com/careers/designer").duplicate_of)
+
+
+class PostingSearchTests(TestCase):
+    def setUp(self):
+        self.acme = Company.for_name("Acme Corp", "Canada")
+        globex = Company.for_name("Globex", "USA")
+        records = [
+            dict(url=f"https://jobs.lever.co/acme/{n}", platform="lever", title=f"Backend Engineer {n}",
+                 description="Build payment APIs in Python.", posted_at=datetime(2026, 1, n + 1, tzinfo=timezone.utc))
+            for n in range(5)
+        ]
+        records.append(dict(url="https://jobs.lever.co/acme/design", platform="lever", title="Product Designer",
+                            description="Work with engineers on the checkout flow."))
+        JobPosting.objects.bulk_upsert(records, company=self.acme)
+        JobPosting.objects.bulk_upsert(
+            [dict(url="https://boards.greenhouse.io/globex/1", platform="greenhouse", title="Engineering Manager")],
+            company=globex,
+        )
+
+    def _all(self, **params) -> list[int]:
+        ids, cursor = [], None
+        while True:
+            page = search_postings(SearchQuery(limit=2, cursor=cursor, **params))
+            ids += page.ids
+            cursor = page.next_cursor
+            if cursor is None:
+                return ids
+
+    def test_full_text_ranks_titles_first_and_stems(self):
+        ids = self._all(q="engineers")
+        titles = list(JobPosting.objects.filter(pk__in=ids).values_list("title", flat=True))
+        self.assertEqual(len(ids), 7)
+        self.assertIn("Product Designer", titles)  # description-only match…
+        self.assertEqual(JobPosting.objects.get(pk=ids[-1]).title, "Product Designer")  # …ranks last
+
+    def test_keyset_pages_cover_every_row_once(self):
+        ids = self._all()
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), set(JobPosting.objects.values_list("pk", flat=True)))
+        self.assertEqual(ids, sorted(ids, reverse=True))  # same first_seen order as inserted
+
+    def test_filters_and_incremental_index(self):
+        self.assertEqual(len(self._all(q="engineer", company="acme corp", country="CANADA")), 6)
+        self.assertEqual(len(self._all(q="engineer", platform="greenhouse")), 1)
+        after = SearchQuery.from_params({"posted_after": "2026-01-04"}).posted_after
+        self.assertEqual(len(self._all(posted_after=after)), 2)
+
+        JobPosting.objects.bulk_upsert(
+            [dict(url="https://jobs.lever.co/acme/design", platform="lever", title="Staff Illustrator")],
+            company=self.acme,
+        )
+        self.assertEqual(len(self._all(q="illustrator")), 1)
+        self.assertEqual(len(self._all(q="designer")), 0)
+        JobPosting.objects.filter(title="Staff Illustrator").update(removed_at=datetime.now(timezone.utc))
+        self.assertEqual(len(self._all(q="illustrator")), 0)
+        first, second = JobPosting.objects.filter(title__startswith="Backend")[:2]
+        JobPosting.objects.filter(pk=second.pk).update(duplicate_of=first)
+        self.assertNotIn(second.pk, self._all(q="backend"))
+        with connection.cursor() as cursor:  # triggers kept the external-content index consistent
+            cursor.execute("INSERT INTO discovery_jobposting_fts(discovery_jobposting_fts) VALUES ('integrity-check')")
+
+    async def test_endpoint_pages_with_next_cursor(self):
+        client = AsyncClient(HTTP_HOST="localhost")
+        first = (await client.get("/api/discover/postings/", {"q": "backend", "limit": 3})).json()
+        self.assertEqual(len(first["results"]), 3)
+        self.assertEqual(first["results"][0]["company"], "Acme Corp")
+        rest = (await client.get("/api/discover/postings/", {"q": "backend", "cursor": first["next_cursor"]})).json()
+        self.assertEqual(len(rest["results"]), 2)
+        self.assertIsNone(rest["next_cursor"])
+        bad = await client.get("/api/discover/postings/", {"cursor": "nope"})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_bad_params(self):
+        with self.assertRaises(SearchError):
+            search_postings(SearchQuery(cursor="not-a-cursor"))
+        with self.assertRaises(SearchError):
+            SearchQuery.from_params({"posted_before": "last week"})
+        with self.assertRaises(SearchError):
+            search_postings(SearchQuery(q="!!"))
+
+
+@override_settings(DISCOVERY_BATCH_CHUNK_SIZE=2)
+class BulkDiscoveryTests(SimpleTestCase):
+    def setUp(self):
+        self.queued = []
+        patcher = mock.patch.object(views, "_queue_batch", side_effect=lambda *args: self.queued.append(args))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = AsyncClient(HTTP_HOST="localhost")
+
+    async def test_dedupes_and_chunks_a_json_array(self):
+        body = [
+            {"company": "Acme  Corp", "country": "Canada"},
+            {"company": "acme corp", "country": " CANADA "},
+            {"company": "Globex", "country": "USA"},
+            {"company": "Initech"},
+            "Umbrella",
+            {"company": "Hooli", "country": "USA"},
+        ]
+        resp = await self.client.post("/api/discover/bulk/", {"companies": body}, content_type="application/json")
+        self.assertEqual(resp.status_code, 202)
+        data = resp.json()
+        self.assertEqual((data["companies"], data["chunks"], data["duplicates"], data["invalid"]), (3, 2, 1, 2))
+
+        batch_id, companies, chunks = self.queued[0]
+        self.assertEqual(batch_id, data["batch_id"])
+        self.assertEqual(chunks, [[["Acme Corp", "Canada"], ["Globex", "USA"]], [["Hooli", "USA"]]])
+        self.assertEqual(data["events"], f"/api/discover/jobs/{batch_id}/events/")
+
+    async def test_ndjson_body(self):
+        lines = "\n".join(json.dumps({"company": f"Co {i}", "country": "Canada"}) for i in range(5))
+        resp = await self.client.post("/api/discover/bulk/", lines, content_type="application/x-ndjson")
+        self.assertEqual(resp.json()["chunks"], 3)
+        self.assertEqual([len(c) for c in self.queued[0][2]], [2, 2, 1])
+
+    async def test_rejects_malformed_or_empty_input(self):
+        bad = await self.client.post("/api/discover/bulk/", "[{", content_type="application/json")
+        self.assertEqual(bad.status_code, 400)
+        empty = await self.client.post("/api/discover/bulk/", [{"company": "Acme"}], content_type="application/json")
+        self.assertEqual((empty.status_code, empty.json()["invalid"]), (400, 1))
+        self.assertEqual(self.queued, [])
+
+
+class IncrementalRefreshTests(TestCase):
+    def test_check_interval_adapts_to_change_rate(self):
+        site = CareerSite(company=Company.for_name("Acme", "Canada"), url="https://acme.test/careers")
+        start = site.check_interval
+        site.schedule_next_check(changed=False)
+        self.assertEqual(site.check_interval, int(start * 1.5))
+        site.schedule_next_check(changed=True)
+        self.assertEqual(site.check_interval, int(start * 1.5) // 2)
+        self.assertIsNotNone(site.last_changed_at)
+
+    def test_content_fingerprint_ignores_scripts_and_whitespace(self):
+        a = "<html><body><h1>Jobs</h1><script>var t=1</script><a href='/j/1'>One</a></body></html>"
+        b = "<html><body>\n  <h1>Jobs</h1><script>var t=2</script>\n<a href='/j/1'>One</a></body></html>"
+        self.assertEqual(content_fingerprint(a), content_fingerprint(b))
+        self.assertFalse(PageFingerprint.record_content("https://acme.test/careers", content_fingerprint(a)))
+        self.assertFalse(PageFingerprint.record_content("https://acme.test/careers", content_fingerprint(b)))
+        c = b.replace("One", "Two")
+        self.assertTrue(PageFingerprint.record_content("https://acme.test/careers", content_fingerprint(c)))
+
+    def test_known_company_refresh_gets_a_job_stream(self):
+        site = CareerSite.objects.create(
+            company=Company.for_name("Acme", "Canada"), url="https://acme.test/careers"
+        )
+        with mock.patch.object(views, "create_batch") as create, mock.patch.object(
+            views.progress, "publish"
+        ) as queued, mock.patch.object(views, "group") as fan_out:
+            body, status = views._queue_company("Acme", "Canada")
+        self.assertEqual((status, body["status"], body["sites"]), (202, "refresh_queued", 1))
+        self.assertEqual(body["events"], f"/api/discover/jobs/{body['job_id']}/events/")
+        create.assert_called_once_with(body["job_id"], total=1, chunks=1)
+        self.assertEqual(queued.call_args.args, (body["job_id"], "queued"))
+        (signature,) = fan_out.call_args.args[0]
+        self.assertEqual((signature.args, signature.kwargs), ((site.pk,), {"job_id": body["job_id"]}))
+
+        async def not_modified(url, etag, last_modified):
+            return httpx.Response(304)
+
+        with mock.patch.object(tasks, "_conditional_get", side_effect=not_modified), mock.patch.object(
+            tasks, "publish_progress"
+        ) as published, mock.patch.object(tasks, "record_company") as record, mock.patch.object(
+            tasks, "record_chunk_done", return_value=True
+        ):
+            refresh_career_site_task(site.pk, job_id="j1")
+        record.assert_called_once_with("j1", ok=True)
+        events = [(c.args[1], c.kwargs) for c in published.call_args_list]
+        self.assertEqual([event for event, _ in events], ["stage", "site", "done"])
+        self.assertEqual(events[1][1]["changed"], False)
+        self.assertEqual(events[2][1], {"company": "Acme", "country": "Canada", "urls": [site.url]})
+
+    def test_unchanged_listings_page_never_queues_a_crawl(self):
+        site = CareerSite.objects.create(
+            company=Company.for_name("Acme", "Canada"), url="https://acme.test/careers"
+        )
+        page = httpx.Response(200, text="<html><body><a href='/j/1'>One</a></body></html>")
+
+        async def conditional_get(url, etag, last_modified):
+            return page
+
+        with mock.patch.object(tasks, "_conditional_get", side_effect=conditional_get), mock.patch.object(
+            tasks.crawl_career_pages_task, "delay"
+        ) as crawl:
+            refresh_career_site_task(site.pk)
+            refresh_career_site_task(site.pk)
+        crawl.assert_not_called()
+
+    def test_changed_listings_page_queues_a_crawl_instead_of_a_delta(self):
+        site = CareerSite.objects.create(
+            company=Company.for_name("Acme", "Canada"), url="https://acme.test/careers"
+        )
+        pages = iter(["<a href='/j/1'>One</a>", "<a href='/j/1'>One</a><a href='/j/2'>Two</a>"])
+
+        async def conditional_get(url, etag, last_modified):
+            return httpx.Response(200, text=f"<html><body>{next(pages)}</body></html>")
+
+        with mock.patch.object(tasks, "_conditional_get", side_effect=conditional_get), mock.patch.object(
+            tasks.crawl_career_pages_task, "delay"
+        ) as crawl, mock.patch.object(tasks, "publish_progress") as published:
+            self.assertEqual(refresh_career_site_task(site.pk), {"new": [], "changed": [], "removed": []})
+            self.assertIsNone(refresh_career_site_task(site.pk))
+        crawl.assert_called_once_with([site.url], "Acme", "Canada", reindex=True)
+        sites = [c.kwargs for c in published.call_args_list if c.args[1] == "site"]
+        self.assertEqual([(e["recrawl"], e["new"]) for e in sites], [(False, 0), (True, None)])
+
+    def _board_site(self, name="Acme"):
+        return CareerSite.objects.create(
+            company=Company.for_name(name, "Canada"),
+            url=f"https://jobs.lever.co/acme?site={name}",
+            platform="lever",
+            board_token="acme",
+        )
+
+    def _refresh(self, site, handler, store):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        def connector(platform, **kwargs):
+            return get_connector(platform, **{**kwargs, "client": client, "validators": store})
+
+        with mock.patch.object(tasks, "get_connector", side_effect=connector):
+            return refresh_career_site_task(site.pk)
+
+    def test_board_validators_are_per_site_and_saved_after_the_upsert(self):
+        postings = _fixture("lever_postings.json")
+        sent = []
+
+        def handler(request):
+            sent.append(request.headers.get("if-none-match"))
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json=postings, headers={"ETag": '"v1"'})
+
+        store = ValidatorStore()
+        first, second = self._board_site("Acme"), self._board_site("Acme Labs")
+        self.assertEqual(len(self._refresh(first, handler, store)["new"]), 3)
+        self.assertEqual(store.get(first.url), ('"v1"', None))
+
+        # Same board, another site: its own (empty) validators, so no 304
+        self._refresh(second, handler, store)
+        self.assertIsNone(sent[1])
+
+        self.assertEqual(self._refresh(first, handler, store), {"new": [], "changed": [], "removed": []})
+        self.assertEqual(sent[2], '"v1"')
+        self.assertEqual(JobPosting.objects.filter(removed_at__isnull=True).count(), 3)
+
+    def test_failed_upsert_keeps_the_old_validators(self):
+        postings = _fixture("lever_postings.json")
+        store = ValidatorStore()
+        site = self._board_site()
+
+        def handler(request):
+            return httpx.Response(200, json=postings, headers={"ETag": '"v2"'})
+
+        with mock.patch.object(tasks, "_apply_board_jobs", side_effect=RuntimeError("db down")):
+            with self.assertRaises(RuntimeError):
+                self._refresh(site, handler, store)
+        self.assertEqual(store.get(site.url), (None, None))
+
+    def test_304_is_ignored_for_a_site_without_postings(self):
+        postings = _fixture("lever_postings.json")
+        store = ValidatorStore()
+        site = self._board_site()
+        store.set(site.url, '"v1"', None)
+
+        def handler(request):
+            if request.headers.get("if-none-match"):
+                return httpx.Response(304)
+            return httpx.Response(200, json=postings, headers={"ETag": '"v1"'})
+
+        self.assertEqual(len(self._refresh(site, handler, store)["new"]), 3)
+
+
+@skipUnless(importlib.util.find_spec("numpy"), "numpy not installed")
+class EmbeddingServiceTests(SimpleTestCase):
+    class FakeModel:
+        """Bag-of-letters vectors; records what it was asked to encode."""
+
+        def __init__(self):
+            self.calls = []
+
+        def encode(self, texts, **kwargs):
+            import numpy as np
+
+            self.calls.append(list(texts))
+            out = np.zeros((len(texts), 26), dtype=np.float32)
+            for row, text in enumerate(texts):
+                for ch in text.lower():
+                    if "a" <= ch <= "z":
+                        out[row, ord(ch) - 97] += 1
+            return out / np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-9)
+
+    def test_cached_and_duplicate_chunks_are_encoded_once(self):
+        from discovery.helpers.embeddings import EmbeddingCache, EmbeddingService, RankJob
+
+        with tempfile.TemporaryDirectory() as tmp:
+            model = self.FakeModel()
+            service = EmbeddingService(cache=EmbeddingCache(Path(tmp) / "emb.sqlite3"), model=model)
+            ranked = service.rank_many([
+                RankJob("jobs", ["about us", "open jobs", "open jobs"], k=2),
+                RankJob("jobs", ["press", "jobs board"], k=1),
+            ])
+            self.assertEqual(ranked[0][0][0], 1)
+            self.assertEqual(ranked[1][0][0], 1)
+            # One batched call; the repeated query/chunk encoded once
+            self.assertEqual(len(model.calls), 1)
+            self.assertEqual(len(model.calls[0]), 5)
+
+            # A fresh process-level service reuses the on-disk vectors
+            again = EmbeddingService(cache=EmbeddingCache(Path(tmp) / "emb.sqlite3"), model=model)
+            again.rank("jobs", ["open jobs", "careers"])
+            self.assertEqual(model.calls[-1], ["careers"])
+            again.cache.close()
+            service.cache.close()
+
+
+@skipUnless(importlib.util.find_spec("numpy"), "numpy not installed")
+class VectorIndexTests(SimpleTestCase):
+    def _vectors(self, *rows):
+        import numpy as np
+
+        m = np.array(rows, dtype=np.float32)
+        return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+    def test_search_supersede_and_compact(self):
+        from discovery.helpers.vector_index import VectorIndex
+
+        query = self._vectors([1, 0, 0])[0]
+        with tempfile.TemporaryDirectory() as tmp:
+            index = VectorIndex(tmp, dtype="int8", compact_after=2)
+            index.add(
+                "acme|canada",
+                ["https://acme.com/careers", "https://acme.com/careers", "https://acme.com/about"],
+                self._vectors([0.9, 0.1, 0], [0, 1, 0], [0.1, 0, 1]),
+            )
+            # Same host, different owner: never returned for acme
+            index.add("other|canada", ["https://acme.com/jobs"], self._vectors([1, 0, 0]))
+
+            found = index.search(query, "acme|canada", {"acme.com"}, k=3)
+            self.assertEqual([u for u, _ in found], ["https://acme.com/careers", "https://acme.com/about"])
+            self.assertAlmostEqual(found[0][1], 0.9939, places=2)  # int8 error stays small
+
+            # Re-crawl: the newest rows for a URL win, even with a lower score
+            index.add("acme|canada", ["https://acme.com/careers"], self._vectors([0, 0, 1]))
+            self.assertEqual(index.stats()["segments"], 1)  # compacted past 2 segments
+            found = dict(index.search(query, "acme|canada", {"acme.com"}))
+            self.assertLess(found.get("https://acme.com/careers", 0), 0.1)
+            self.assertEqual(index.stats()["rows"], 3)  # acme: careers + about, other: jobs
+            self.assertFalse(index.contains("acme|canada", {"linkedin.com"}))
+
+
+LISTINGS_HTML = "<html><body><ul class='jobs'>%s</ul></body></html>" % "".join(
+    f"<li class='job-card'><a href='/jobs/{n}'>Software Engineer {n}</a>"
+    f"<span>Toronto, ON</span></li>"
+    for n in range(10)
+)
+ABOUT_HTML = "<html><body><h1>About us</h1><p>We make widgets.</p><a href='/team'>Team</a></body></html>"
+AMBIGUOUS_HTML = (
+    "<html><body><h2>Open roles</h2><p>%s</p>"
+    "<div><a href='/jobs/1'>Data Analyst</a></div><div><a href='/jobs/2'>Office Manager</a></div>"
+    "</body></html>" % ("Life at Acme. " * 600)
+)
+SEARCH_HTML = (
+    "<html><body><p>Find your next role</p>"
+    "<form action='/search'><input type='text' name='keywords' placeholder='Search jobs'></form>"
+    "</body></html>"
+)
+
+
+class ListingsVerifierTests(SimpleTestCase):
+    class FakeClassifier:
+        batch_size = 2
+
+        def __init__(self, answers):
+            self.answers = answers  # per call
+            self.calls = 0
+            self.batches = []
+
+        async def any_positive(self, chunks):
+            for i in range(0, len(chunks), self.batch_size):
+                self.batches.append(chunks[i:i + self.batch_size])
+                self.calls += 1
+                if self.answers[self.calls - 1]:
+                    return True
+            return False
+
+    def _verifier(self, pages, answers=()):
+        def handler(request):
+            if request.url.path == "/robots.txt":
+                return httpx.Response(404)
+            body = pages.get(request.url.path)
+            if body is None:
+                return httpx.Response(404)
+            return httpx.Response(200, text=body, headers={"content-type": "text/html"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        classifier = self.FakeClassifier(list(answers))
+        verifier = ListingsVerifier(
+            classifier=classifier,
+            max_llm_chunks=8,
+            client=client,
+            scheduler=PolitenessScheduler(rate=1000, burst=1000, client=client),
+        )
+        return verifier, classifier
+
+    def test_structural_heuristic_decides_clear_pages(self):
+        self.assertGreaterEqual(structural_signals("https://acme.com/careers", LISTINGS_HTML).score, 0.7)
+        self.assertLessEqual(structural_signals("https://acme.com/about", ABOUT_HTML).score, 0.15)
+
+        verifier, classifier = self._verifier({"/careers": LISTINGS_HTML, "/about": ABOUT_HTML})
+        verdicts = asyncio.run(
+            verifier.verify_many(["https://acme.com/careers", "https://acme.com/about"])
+        )
+        self.assertEqual(verdicts["https://acme.com/careers"].method, "heuristic")
+        self.assertTrue(verdicts["https://acme.com/careers"].ok)
+        self.assertFalse(verdicts["https://acme.com/about"].ok)
+        self.assertEqual(classifier.calls, 0)
+
+    def test_ambiguous_page_goes_to_llm_and_stops_at_first_yes(self):
+        verifier, classifier = self._verifier({"/roles": AMBIGUOUS_HTML}, answers=[False, True, True])
+        verdict = asyncio.run(verifier.verify("https://acme.com/roles"))
+        self.assertTrue(verdict.ok)
+        self.assertEqual(verdict.method, "llm")
+        self.assertEqual(classifier.calls, 2)
+        self.assertEqual([len(b) for b in classifier.batches], [2, 2])
+
+    def test_search_form_is_followed(self):
+        verifier, _ = self._verifier({"/find": SEARCH_HTML, "/search": LISTINGS_HTML})
+        verdict = asyncio.run(verifier.verify("https://acme.com/find"))
+        self.assertEqual(verdict.listings_url, "https://acme.com/search?keywords=")
+        self.assertEqual(verdict.method, "search-form")
+
+    def test_search_url_merges_into_the_action_query(self):
+        def form(attrs):
+            return f"<form {attrs}><input type='search' name='q'></form>"
+
+        page = "https://acme.com/careers?lang=en"
+        cases = {
+            "action='/jobs?team=eng'": "https://acme.com/jobs?team=eng&q=",
+            "action='/jobs?q=old&team=eng'": "https://acme.com/jobs?team=eng&q=",
+            "action=''": "https://acme.com/careers?lang=en&q=",
+            "": "https://acme.com/careers?lang=en&q=",
+            "method='GET' action='search'": "https://acme.com/search?q=",
+            "method='post' action='/jobs'": None,
+        }
+        for attrs, expected in cases.items():
+            with self.subTest(attrs=attrs):
+                self.assertEqual(find_search_url(page, form(attrs)), expected)
+
+    def test_batched_prompt_answers_map_back_to_chunks(self):
+        self.assertEqual(parse_answers("1: NO\n2: yes\n", 3), [False, True, None])
+        self.assertEqual(parse_answers("YES", 1), [True])
+        self.assertEqual(parse_answers("I cannot tell", 1), [None])
+
+
+class PolitenessSchedulerTests(SimpleTestCase):
+    def test_token_bucket_refills_at_its_rate(self):
+        bucket = TokenBucket(rate=2.0, burst=2.0)
+        now = bucket.updated
+        bucket.take()
+        bucket.take()
+        self.assertAlmostEqual(bucket.ready_in(now), 0.5, delta=0.05)
+        self.assertEqual(bucket.ready_in(now + 0.6), 0.0)
+        bucket.ready_in(now + 60)
+        self.assertEqual(bucket.tokens, 2.0)  # idle time saves at most ``burst``
+
+    def test_retry_after_seconds_and_dates(self):
+        self.assertEqual(_retry_after_seconds("7"), 7.0)
+        self.assertEqual(_retry_after_seconds("-3"), 0.0)
+        self.assertIsNone(_retry_after_seconds("soon"))
+        self.assertIsNone(_retry_after_seconds(None))
+        later = formatdate(time.time() + 120, usegmt=True)
+        self.assertAlmostEqual(_retry_after_seconds(later), 120, delta=2)
+
+    def test_robots_fetched_once_and_crawl_delay_caps_the_rate(self):
+        fetches = []
+
+        async def handler(request):
+            fetches.append(request.url.path)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, text="User-agent: *\nCrawl-delay: 4\nDisallow: /private\n")
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                scheduler = PolitenessScheduler(rate=1.0, burst=2.0, client=client)
+                allowed = await asyncio.gather(
+                    scheduler.allowed("https://acme.com/careers"),
+                    scheduler.allowed("https://acme.com/jobs"),
+                    scheduler.allowed("https://acme.com/private/x"),
+                )
+                scheduler.record_response("https://acme.com/careers", 200)
+                return allowed, scheduler.stats()["acme.com"]
+
+        allowed, stats = asyncio.run(run())
+        self.assertEqual(allowed, [True, True, False])
+        self.assertEqual(fetches, ["/robots.txt"])
+        self.assertEqual(stats["crawl_delay"], 4.0)
+        self.assertEqual(stats["rate"], 0.25)  # recovery never climbs past Crawl-delay
+
+    def test_protected_robots_txt_disallows_and_missing_allows(self):
+        statuses = {"locked.com": 401, "private.com": 403, "gone.com": 404}
+
+        def handler(request):
+            return httpx.Response(statuses[request.url.host])
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                scheduler = PolitenessScheduler(client=client)
+                return [await scheduler.allowed(f"https://{host}/careers") for host in statuses]
+
+        self.assertEqual(asyncio.run(run()), [False, False, True])
+
+    def test_backoff_is_capped_and_acquire_gives_up_past_max_wait(self):
+        scheduler = PolitenessScheduler(max_backoff=60)
+        scheduler.record_response("https://acme.com/jobs", 429, "3600")
+        self.assertAlmostEqual(scheduler.ready_in("acme.com"), 60, delta=1)
+
+        started = time.monotonic()
+        self.assertFalse(asyncio.run(scheduler.acquire("https://acme.com/jobs", max_wait=5)))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(asyncio.run(scheduler.acquire("https://other.com/jobs", max_wait=5)))
+
+
+def _links_page(*hrefs) -> str:
+    return "<html><body>" + "".join(f"<a href='{h}'>{h}</a>" for h in hrefs) + "</body></html>"
+
+
+class CareerCrawlerTests(SimpleTestCase):
+    def _crawl(self, pages, start="https://acme.com/careers", **options):
+        """Crawl ``pages`` (path → html, status int, or exception) on acme.com."""
+        self.fetched = []
+        self.running = self.peak = 0
+
+        async def handler(request):
+            path = request.url.path
+            if path == "/robots.txt":
+                return httpx.Response(404)
+            self.fetched.append(path)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            try:
+                await asyncio.sleep(0.01)
+                page = pages.get(path)
+                if callable(page):
+                    page = page()
+                if isinstance(page, Exception):
+                    raise page
+                if page is None or isinstance(page, int):
+                    return httpx.Response(page or 404, headers={"retry-after": "0"})
+                if page.startswith("->"):
+                    return httpx.Response(302, headers={"location": page[2:]})
+                return httpx.Response(200, text=page, headers={"content-type": "text/html"})
+            finally:
+                self.running -= 1
+
+        async def run():
+            async with httpx.AsyncClient(
+                transport=httpx.MockTransport(handler), follow_redirects=True
+            ) as client:
+                scheduler = PolitenessScheduler(rate=1000, burst=1000, min_backoff=0.01, client=client)
+                crawler = CareerCrawler(client=client, scheduler=scheduler, **options)
+                return [page async for page in crawler.crawl([start])]
+
+        return asyncio.run(run())
+
+    def test_depth_bound_and_page_budget(self):
+        chain = {
+            "/careers": _links_page("/careers/a"),
+            "/careers/a": _links_page("/careers/a/b"),
+            "/careers/a/b": _links_page("/careers/a/b/c"),
+        }
+        pages = self._crawl(chain, max_depth=1)
+        self.assertEqual([(p.url, p.depth) for p in pages], [
+            ("https://acme.com/careers", 0), ("https://acme.com/careers/a", 1)
+        ])
+
+        fan = {"/careers": _links_page(*(f"/careers/team-{i}" for i in range(10)))}
+        fan.update({f"/careers/team-{i}": _links_page() for i in range(10)})
+        self.assertEqual(len(self._crawl(fan, max_pages=3)), 3)
+        self.assertEqual(len(self.fetched), 3)
+
+    def test_url_variants_and_redirect_targets_are_fetched_once(self):
+        pages = {
+            "/careers": _links_page(
+                "/careers/", "https://www.acme.com/careers#top", "/careers?ref=nav", "/jobs-old"
+            ),
+            "/jobs-old": "->/careers/teams",
+            "/careers/teams": _links_page("/careers/teams/"),
+        }
+        self._crawl(pages)
+        self.assertEqual(self.fetched, ["/careers", "/jobs-old", "/careers/teams"])
+
+    def test_listings_page_stops_new_fetches(self):
+        jobs = _links_page(*(f"/jobs/{i}" for i in range(6)))
+        pages = {"/careers": _links_page("/careers/open", "/careers/life"), "/careers/open": jobs}
+        found = self._crawl(pages, max_concurrency=1)
+        self.assertTrue(found[-1].is_listings)
+        self.assertNotIn("/careers/life", self.fetched)
+
+    def test_per_host_limit_and_backoff_retry(self):
+        statuses = iter([429, 503, _links_page()])
+        pages = {
+            "/careers": _links_page(*(f"/careers/{i}" for i in range(6))),
+            "/careers/0": lambda: next(statuses),
+        }
+        found = self._crawl(pages, per_host_concurrency=2, max_retries=2)
+        self.assertEqual(self.peak, 2)
+        self.assertEqual(self.fetched.count("/careers/0"), 3)
+        retried = next(p for p in found if p.url.endswith("/careers/0"))
+        self.assertEqual(retried.status, 200)
+
+    def test_unexpected_errors_become_error_pages(self):
+        pages = {
+            "/careers": _links_page("/careers/boom", "/careers/fine"),
+            "/careers/boom": RuntimeError("decoder blew up"),
+            "/careers/fine": _links_page(),
+        }
+        found = {p.url: p for p in self._crawl(pages, max_concurrency=1)}
+        self.assertEqual(found["https://acme.com/careers/boom"].error, "decoder blew up")
+        self.assertEqual(found["https://acme.com/careers/fine"].status, 200)
+
+    def test_query_string_job_links_count_per_posting(self):
+        links = [f"https://acme.com/careers?gh_jid={i}" for i in range(6)] + [
+            "https://www.acme.com/careers/?gh_jid=0&utm_source=feed",
+            "https://acme.com/careers?jobid=7",
+        ]
+        self.assertEqual(count_job_links(links), 7)
+
+
+class StubOllama(ThreadingHTTPServer):
+    """
+    Stands in for Ollama: YES for chunks mentioning 'openings', after a
+    delay; chunks mentioning 'mumble' get no answer line.
+    """
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.prompts = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.prompts.append(payload["prompt"])
+                time.sleep(server.delay)
+                chunks = re.split(r"--- chunk \d+ ---\n", payload["prompt"])[1:]
+                answer = "\n".join(
+                    f"{i}: {'YES' if 'openings' in c else 'NO'}"
+                    for i, c in enumerate(chunks, 1)
+                    if "mumble" not in c
+                )
+                body = json.dumps({"response": answer}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class LLMVerdictCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.server = StubOllama()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "verdicts.sqlite3"
+
+    def _run(self, cache, *batches):
+        async def run():
+            async with httpx.AsyncClient() as client:
+                classifier = OllamaClassifier(
+                    base_url=self.server.url, model="stub", client=client, cache=cache
+                )
+                return await asyncio.gather(*(classifier.classify(b) for b in batches))
+
+        return asyncio.run(run())
+
+    def test_cache_and_coalescing_avoid_model_calls(self):
+        cache = VerdictCache(self.path)
+        page = ["Current openings: 12 roles", "About our culture"]
+        # Same ATS template for another company: only the digits differ
+        twin = ["Current  openings: 7 roles", "About our culture"]
+
+        first = self._run(cache, page, twin)
+        self.assertEqual(first, [[True, False], [True, False]])
+        self.assertEqual(len(self.server.prompts), 1)  # twin waited on the in-flight call
+
+        self.assertEqual(self._run(cache, twin), [[True, False]])
+        self.assertEqual(len(self.server.prompts), 1)  # memory hit
+
+        # New process, same disk store
+        self.assertEqual(self._run(VerdictCache(self.path), page), [[True, False]])
+        self.assertEqual(len(self.server.prompts), 1)
+
+        stats = cache.stats(shared=False)
+        self.assertEqual(stats["model_calls"], 1)
+        self.assertEqual(stats["coalesced"], 2)
+        self.assertEqual(stats["calls_saved"], 4)
+        self.assertGreater(stats["seconds_saved"], 0.15)
+
+    def test_unanswered_chunks_are_retried_then_left_undecided(self):
+        cache = VerdictCache(self.path)
+        page = ["Current openings: 12 roles", "mumble mumble"]
+
+        first = self._run(cache, page, page)
+        self.assertEqual(first, [[True, None], [True, None]])
+        self.assertEqual(len(self.server.prompts), 2)  # batch, then the skipped chunk alone
+        self.assertIn("mumble", self.server.prompts[1])
+        self.assertNotIn("openings", self.server.prompts[1])
+
+        # Only the answered chunk was cached
+        self.assertEqual(self._run(cache, page), [[True, None]])
+        self.assertEqual(len(self.server.prompts), 4)
+
+    def test_prompt_version_is_part_of_the_key(self):
+        self.assertNotEqual(
+            verdict_key("stub", "v1", "Current openings"), verdict_key("stub", "v2", "Current openings")
+        )
+        self.assertEqual(
+            verdict_key("stub", "v1", "Openings: 3\n"), verdict_key("stub", "v1", " openings: 41 ")
+        )
+
+
+class PageScraperExtractionTests(SimpleTestCase):
+    HTML = """<html><head><title>Careers at Acme</title><script>var x = 1;</script></head>
+    <body>
+      <h1>Join <em>Acme</em></h1>
+      <p>We are <b>hiring</b> <!-- hidden --> now.</p>
+      <div><h2>Open roles</h2><h3> Engineering </h3></div>
+      <ul>%s</ul>
+      <a name="anchor">no href</a>
+      <p>Questions? <a href="mailto:jobs@acme.com">Email us</a><script>track()</script></p>
+      <button> Apply <span>now</span></button><button>Load more</button>
+    </body></html>""" % "".join(
+        f"<li><a href='/jobs/{n}'><span>Engineer</span> {n}</a></li>" for n in range(20)
+    )
+
+    def test_lxml_pass_matches_beautifulsoup_output(self):
+        url = "https://acme.com/careers"
+        self.assertEqual(
+            extract_structured(self.HTML, url, mode="lxml"),
+            extract_structured(self.HTML, url, mode="soup"),
+        )
+        data = extract_structured(self.HTML, url)
+        self.assertEqual(data["headings"], ["JoinAcme", "Open roles", "Engineering"])
+        self.assertEqual(data["paragraphs"][1], "Questions?Email us")
+        self.assertEqual(data["buttons"], ["Applynow", "Load more"])
+
+    def test_per_field_limits(self):
+        data = extract_structured(self.HTML, "https://acme.com/careers", limits={"links": 5, "buttons": 1})
+        self.assertEqual(len(data["links"]), 5)
+        self.assertEqual(data["links"][0], {"text": "Engineer0", "href": "/jobs/0"})
+        self.assertEqual(data["buttons"], ["Applynow"])
+        self.assertEqual(len(data["paragraphs"]), 2)
+
+
+class RenderProfileTests(SimpleTestCase):
+    class FakeRoute:
+        def __init__(self, url, resource_type):
+            self.request = type("Request", (), {"url": url, "resource_type": resource_type})()
+            self.outcome = None
+
+        def abort(self, reason):
+            self.outcome = "abort"
+
+        def continue_(self):
+            self.outcome = "continue"
+
+    class FakeContext:
+        def __init__(self):
+            self.handlers = []
+
+        def route(self, pattern, handler):
+            self.handlers.append(handler)
+
+    def test_text_only_blocks_heavy_types_and_trackers(self):
+        profile = get_profile("text-only")
+        self.assertTrue(profile.blocks("image", "acme.com"))
+        self.assertTrue(profile.blocks("script", "www.google-analytics.com"))
+        self.assertFalse(profile.blocks("script", "acme.com"))
+        self.assertFalse(profile.blocks("document", "notgoogle-analytics.com"))
+        self.assertFalse(get_profile("full").blocks("image", "doubleclick.net"))
+
+    def test_full_profile_hosts(self):
+        with self.settings(RENDER_FULL_PROFILE_HOSTS=["myworkdayjobs.com"]):
+            self.assertEqual(profile_for_url("https://acme.wd5.myworkdayjobs.com/careers"), "full")
+            self.assertEqual(profile_for_url("https://jobs.lever.co/acme"), "text-only")
+
+    def test_routes_abort_and_count(self):
+        ctx = self.FakeContext()
+        before = render_stats.snapshot(shared=False)
+        apply_profile(ctx, "text-only")
+        (handler,) = ctx.handlers
+        routes = [
+            self.FakeRoute("https://acme.com/careers", "document"),
+            self.FakeRoute("https://acme.com/logo.png", "image"),
+            self.FakeRoute("https://www.googletagmanager.com/gtm.js", "script"),
+        ]
+        for route in routes:
+            handler(route)
+        self.assertEqual([r.outcome for r in routes], ["continue", "abort", "abort"])
+
+        after = render_stats.snapshot(shared=False)
+        self.assertEqual(after["requests_blocked"] - before["requests_blocked"], 2)
+        self.assertEqual(after["requests_allowed"] - before["requests_allowed"], 1)
+        self.assertGreater(after["bytes_saved_estimate"], before["bytes_saved_estimate"])
+
+        full_ctx = self.FakeContext()
+        apply_profile(full_ctx, "full")
+        self.assertEqual(full_ctx.handlers, [])
+
+
+JS_SHELL_HTML = (
+    "<html><head><script src='/static/app.js'></script></head><body>"
+    "<noscript>You need to enable JavaScript to run this app.</noscript><div id='root'></div>"
+    "</body></html>"
+)
+
+
+@skipUnless(importlib.util.find_spec("playwright"), "playwright not installed")
+class BrowserPoolTests(SimpleTestCase):
+    class FakeContext:
+        def __init__(self):
+            self.pages = []
+
+        def new_page(self):
+            self.pages.append(object())
+            return self.pages[-1]
+
+        def close(self):
+            pass
+
+    class FakeBrowser:
+        def __init__(self):
+            self.closed = False
+
+        def new_context(self, **kwargs):
+            return BrowserPoolTests.FakeContext()
+
+        def is_connected(self):
+            return not self.closed
+
+        def close(self):
+            self.closed = True
+
+    def setUp(self):
+        self.browsers = []
+
+        def launch(**kwargs):
+            self.browsers.append(self.FakeBrowser())
+            return self.browsers[-1]
+
+        playwright = mock.Mock()
+        playwright.chromium.launch.side_effect = launch
+        for target, value in (
+            ("sync_playwright", mock.Mock(return_value=mock.Mock(start=mock.Mock(return_value=playwright)))),
+            ("apply_profile", mock.Mock()),
+            ("render_stats", mock.Mock()),
+        ):
+            patcher = mock.patch.object(browser_pool, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _use(self, pool, pages=1):
+        for _ in range(pages):
+            with pool.page():
+                pass
+
+    def test_recycles_after_max_pages_once_no_context_is_borrowed(self):
+        pool = BrowserPool(max_pages=2, max_rss_mb=0)
+        self._use(pool)
+        self.assertEqual(len(self.browsers), 1)
+        self._use(pool)
+        self.assertEqual(len(self.browsers), 2)
+        self.assertTrue(self.browsers[0].closed)
+
+        with pool.page():
+            self._use(pool)
+            self.assertEqual(len(self.browsers), 2)  # pending while a context is out
+        self.assertEqual(len(self.browsers), 3)
+        self.assertEqual(pool.stats()["pages_served"], 0)
+
+    def test_rss_is_sampled_every_n_pages(self):
+        pool = BrowserPool(max_pages=0, max_rss_mb=100, rss_check_pages=5, rss_check_seconds=3600)
+        with mock.patch.object(pool._tree, "rss_mb", return_value=50.0) as rss:
+            self._use(pool, 12)
+            self.assertEqual(rss.call_count, 2)
+            rss.return_value = 500.0
+            self._use(pool, 3)
+        self.assertEqual(len(self.browsers), 2)
+
+    def test_process_tree_walk_is_cached(self):
+        tree = browser_pool._ProcessTree(rescan_seconds=60)
+        with mock.patch.object(browser_pool.os, "listdir", wraps=os.listdir) as listdir:
+            first = tree.rss_mb()
+            tree.rss_mb()
+            self.assertEqual(listdir.call_count, 1)
+            tree.invalidate()
+            tree.rss_mb()
+            self.assertEqual(listdir.call_count, 2)
+        if os.path.exists("/proc/self/status"):
+            self.assertGreater(first, 0)
+
+    def test_pool_inherited_across_fork_is_replaced(self):
+        self.addCleanup(setattr, browser_pool, "_pool", None)
+        pool = get_browser_pool()
+        self.assertIs(get_browser_pool(), pool)
+        with mock.patch.object(browser_pool.os, "getpid", return_value=os.getpid() + 1):
+            self.assertIsNot(get_browser_pool(), pool)
+
+
+class TieredFetcherTests(SimpleTestCase):
+    def _fetcher(self, pages):
+        self.http_gets = []
+        self.browser_calls = []
+
+        def handler(request):
+            self.http_gets.append(str(request.url))
+            page = pages[request.url.host]
+            if isinstance(page, Exception):
+                raise page
+            if isinstance(page, int):
+                return httpx.Response(page, text="<html>error</html>", headers={"content-type": "text/html"})
+            return httpx.Response(200, text=page, headers={"content-type": "text/html"})
+
+        def browser_fetch(urls, **kwargs):
+            self.browser_calls.append(list(urls))
+            return {u: FetchResult(url=u, final_url=u, status=200, html=LISTINGS_HTML, tier="browser") for u in urls}
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return TieredFetcher(
+            memory=TierMemory(ttl=60, backend="local"),
+            client=client,
+            scheduler=PolitenessScheduler(rate=1000, burst=1000, client=client),
+            browser_fetch=browser_fetch,
+        )
+
+    def test_content_check(self):
+        self.assertTrue(looks_rendered("https://acme.com/careers", LISTINGS_HTML))
+        self.assertFalse(looks_rendered("https://spa.io/careers", JS_SHELL_HTML))
+        self.assertFalse(looks_rendered("https://acme.com/", "<html><body><a href='/x'></a></body></html>"))
+
+    def test_http_first_and_escalation_is_remembered_per_domain(self):
+        fetcher = self._fetcher({"acme.com": LISTINGS_HTML, "spa.io": JS_SHELL_HTML})
+        results = fetcher.fetch_many(["https://acme.com/careers", "https://spa.io/careers"])
+        self.assertEqual(results["https://acme.com/careers"].tier, "http")
+        self.assertEqual(results["https://spa.io/careers"].tier, "browser")
+        self.assertEqual(self.browser_calls, [["https://spa.io/careers"]])
+
+        # Second round: spa.io goes straight to the browser, acme.com stays on HTTP
+        self.http_gets.clear()
+        fetcher.fetch_many(["https://acme.com/jobs", "https://spa.io/jobs"])
+        self.assertEqual(self.http_gets, ["https://acme.com/jobs"])
+        self.assertEqual(self.browser_calls[-1], ["https://spa.io/jobs"])
+
+    def test_only_shells_and_bot_walls_are_escalated(self):
+        fetcher = self._fetcher({
+            "gone.com": 404,
+            "nxdomain.test": httpx.ConnectError("Name or service not known"),
+            "walled.com": 403,
+            "busy.com": 503,
+            "spa.io": JS_SHELL_HTML,
+        })
+        hosts = ("gone.com", "nxdomain.test", "walled.com", "busy.com", "spa.io")
+        urls = [f"https://{host}/careers" for host in hosts]
+        results = fetcher.fetch_many(urls)
+        self.assertEqual(self.browser_calls, [urls[2:]])
+        gone = results[urls[0]]
+        self.assertEqual((gone.tier, gone.error, gone.status), ("http", "HTTP 404", 404))
+        self.assertEqual(results[urls[1]].tier, "http")
+        self.assertFalse(results[urls[1]].ok)
+
+    def test_browser_result_carries_the_navigation_status(self):
+        class Page:
+            url = "https://acme.com/careers"
+
+            def content(self):
+                return LISTINGS_HTML
+
+        found = _page_result(Page.url, Page(), None, status=404)
+        self.assertEqual((found.status, found.error, found.html), (404, "HTTP 404", ""))
+        rendered = _page_result(Page.url, Page(), None, status=200)
+        self.assertTrue(rendered.ok)
+        self.assertEqual(rendered.status, 200)
+
+        class Request:
+            def __init__(self, frame, navigation=True):
+                self.frame = frame
+                self._navigation = navigation
+
+            def is_navigation_request(self):
+                return self._navigation
+
+        tab = mock.Mock(main_frame="main")
+        seen = _track_status(tab)
+        on_response = tab.on.call_args.args[1]
+        on_response(mock.Mock(request=Request("main"), status=302))
+        on_response(mock.Mock(request=Request("main"), status=200))
+        on_response(mock.Mock(request=Request("iframe"), status=404))
+        on_response(mock.Mock(request=Request("main", navigation=False), status=500))
+        self.assertEqual(seen, {"status": 200})
+
+    @override_settings(BROWSER_MAX_TABS=2)
+    def test_concurrent_browser_fetch_opens_a_bounded_number_of_tabs(self):
+        contexts = []
+
+        def context(**kwargs):
+            contexts.append(mock.MagicMock())
+            return contexts[-1]
+
+        urls = [f"https://co{i}.test/careers" for i in range(5)]
+        with mock.patch("discovery.helpers.fetcher.get_browser_pool", return_value=mock.Mock(context=context)), \
+                mock.patch("discovery.helpers.fetcher._settle"), \
+                mock.patch("discovery.helpers.fetcher._page_result", side_effect=lambda url, *a: FetchResult(url=url)):
+            results = browser_fetch_many(urls)
+        self.assertEqual(sorted(results), urls)
+        tabs = [ctx.__enter__.return_value.new_page.call_count for ctx in contexts]
+        self.assertEqual(tabs, [2, 2, 1])
+        self.assertTrue(all(ctx.__exit__.called for ctx in contexts))
+
+    def test_backed_off_host_is_deferred_not_sent_to_the_browser(self):
+        fetcher = self._fetcher({"acme.com": LISTINGS_HTML})
+        fetcher.max_host_wait = 5
+        fetcher.scheduler.record_response("https://acme.com/careers", 503, "120")
+        result = fetcher.fetch_many(["https://acme.com/careers"])["https://acme.com/careers"]
+        self.assertEqual(result.error, HOST_BUSY)
+        self.assertEqual((self.http_gets, self.browser_calls), ([], []))
+
+    def test_serp_parser_unwraps_redirects_and_skips_ads(self):
+        body = (
+            "<div class='result result--ad'><a class='result__a' "
+            "href='https://duckduckgo.com/y.js?ad_domain=ads.com'>Ad</a></div>"
+            "<div class='result'><a class='result__a' "
+            "href='//duckduckgo.com/l/?uddg=https%3A%2F%2Fcareers.acme.com%2Fjobs&rut=abc'>Acme</a></div>"
+            "<div class='result'><a class='result__a' href='https://jobs.lever.co/acme'>Lever</a></div>"
+        )
+        self.assertEqual(
+            _parse_serp_links(body), ["https://careers.acme.com/jobs", "https://jobs.lever.co/acme"]
+        )
+
+
+@skipUnless(importlib.util.find_spec("zstandard"), "zstandard not installed")
+class SnapshotStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _store(self, **kwargs):
+        store = SnapshotStore(self.tmp.name, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_sampling_dedup_and_round_trip(self):
+        store = self._store(sample_rates={"serp": 1.0}, failure_sample_rate=0.0)
+        body = "<html>" + "result " * 1000 + "</html>"
+        self.assertTrue(store.capture("serp", "https://a.test/?q=1", body, label="q1"))
+        self.assertTrue(store.capture("serp", "https://a.test/?q=2", body, label="q2"))
+        self.assertFalse(store.capture("serp", "https://a.test/?q=3", body, failed=True))
+        self.assertFalse(store.capture("page", "https://a.test/", body))
+        store.flush()
+
+        self.assertEqual((store.counts["written"], store.counts["deduped"]), (1, 1))
+        rows = store.find(kind="serp")
+        self.assertEqual([r["label"] for r in rows], ["q2", "q1"])
+        self.assertEqual(rows[0]["key"], rows[1]["key"])
+        self.assertEqual(store.read(rows[0]["key"]), body)
+        self.assertLess(sum(size for _, size, _ in store._objects()), len(body) // 10)
+
+    def test_size_cap_evicts_oldest(self):
+        store = self._store(sample_rates={"serp": 1.0}, max_bytes=2_000)
+        for n in range(6):
+            store.capture("serp", f"https://a.test/{n}", os.urandom(400).hex())
+            store.flush()
+        kept = {r["url"] for r in store.find(limit=10)}
+        self.assertLessEqual(sum(size for _, size, _ in store._objects()), 2_000)
+        self.assertIn("https://a.test/5", kept)
+        self.assertNotIn("https://a.test/0", kept)
+        self.assertGreater(store.counts["evicted"], 0)
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def test_prometheus_exposition(self):
+        registry = Registry()
+        stages = Histogram(registry, "t_stage_seconds", "Stage time.", buckets=(0.1, 1))
+        tasks = MetricCounter(registry, "t_tasks_total", "Tasks.")
+        inflight = Gauge(registry, "t_in_flight", "Running.")
+        stages.observe(0.05, stage="parse")
+        stages.observe(0.5, stage="parse")
+        stages.observe(3, stage="parse")
+        tasks.inc(task="search", state="success")
+        tasks.inc(task="search", state="success")
+        with inflight.track_inprogress(task="crawl"):
+            inflight.inc(task="crawl")
+
+        text = registry.render(shared=False)
+        self.assertIn("# TYPE t_stage_seconds histogram", text)
+        self.assertIn('t_stage_seconds_bucket{le="0.1",stage="parse"} 1\n', text)
+        self.assertIn('t_stage_seconds_bucket{le="1",stage="parse"} 2\n', text)
+        self.assertIn('t_stage_seconds_bucket{le="+Inf",stage="parse"} 3\n', text)
+        self.assertIn('t_stage_seconds_sum{stage="parse"} 3.55\n', text)
+        self.assertIn('t_stage_seconds_count{stage="parse"} 3\n', text)
+        self.assertIn('t_tasks_total{state="success",task="search"} 2\n', text)
+        self.assertIn('t_in_flight{task="crawl"} 1\n', text)
+        # Buckets come out in ascending le order
+        lines = [line for line in text.splitlines() if line.startswith("t_stage_seconds_bucket")]
+        self.assertEqual([line.split('le="')[1].split('"')[0] for line in lines], ["0.1", "1", "+Inf"])
+
+    def test_recording_stays_local_until_the_flusher_runs(self):
+        fake = _FakeRedis()
+        registry = Registry()
+        self.addCleanup(registry.stop_flusher)
+        inflight = Gauge(registry, "t_in_flight", "Running.")
+        with mock.patch.object(metrics, "get_redis", return_value=fake), \
+                mock.patch.object(metrics, "_FLUSH_INTERVAL_SECONDS", 0.01):
+            inflight.inc(task="crawl")
+            time.sleep(0.05)
+            self.assertEqual(registry.values(), {})  # recording never talks to Redis
+
+            registry.start_flusher()
+            registry.start_flusher()  # once per process
+            self.assertEqual(sum(t.name == "metrics-flusher" for t in threading.enumerate()), 1)
+            inflight.inc(task="crawl")
+            deadline = time.monotonic() + 2
+            while not registry.values() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(registry.values(), {'t_in_flight{task="crawl"}': 2.0})
+
+    def test_in_flight_gauge_is_visible_between_prerun_and_postrun(self):
+        fake = _FakeRedis()
+        task = mock.Mock(request=mock.Mock(jobos_sent_at=None))
+        task.name = "discovery.tasks.crawl"
+        series = 'jobos_tasks_in_flight{task="discovery.tasks.crawl"}'
+        with mock.patch.object(metrics, "get_redis", return_value=fake), \
+                mock.patch.object(metrics.registry, "_redis_down_until", 0.0):
+            metrics.on_task_prerun(task_id="t1", task=task)
+            self.assertIn(f"{series} 1\n", metrics.registry.render())
+            metrics.on_task_postrun(task_id="t1", task=task, state="SUCCESS")
+            self.assertIn(f"{series} 0\n", metrics.registry.render())
+
+
+class LoggingSetupTests(SimpleTestCase):
+    def _record(self, msg, *args, **extra):
+        record = logging.LogRecord("scraper", logging.WARNING, __file__, 1, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_setup_is_idempotent(self):
+        logging_config.setup_logging()
+        handler = logging_config._queue_handler
+        handlers = list(logging.getLogger().handlers)
+        self.assertIs(logging_config.setup_logging(), logging.getLogger("scraper"))
+        self.assertIs(logging_config._queue_handler, handler)
+        self.assertEqual(logging.getLogger().handlers, handlers)
+        self.assertEqual(handlers.count(handler), 1)
+
+    def test_json_lines_carry_bound_context_and_extras(self):
+        record = self._record("fetched %d page(s)", 3, url="https://acme.com")
+        with log_context(company="Acme", batch_id="b1"):
+            logging_config.ContextFilter().filter(record)
+        record = logging_config._RecordQueueHandler(None).prepare(record)
+        self.assertEqual((record.msg, record.args), ("fetched 3 page(s)", None))
+
+        line = json.loads(logging_config.JsonFormatter().format(record))
+        self.assertEqual(line["msg"], "fetched 3 page(s)")
+        self.assertEqual(line["level"], "WARNING")
+        self.assertEqual((line["company"], line["batch_id"], line["url"]), ("Acme", "b1", "https://acme.com"))
+        self.assertRegex(line["ts"], r"^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z$")
+        self.assertNotIn("args", line)
+
+    def test_exceptions_are_formatted_before_queueing(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("scraper", logging.ERROR, __file__, 1, "failed", None, sys.exc_info())
+        record = logging_config._RecordQueueHandler(None).prepare(record)
+        self.assertIsNone(record.exc_info)
+        self.assertIn("ValueError: boom", json.loads(logging_config.JsonFormatter().format(record))["exc"])
+
+    def test_levels_from_env(self):
+        env = {"LOG_LEVEL": "warning", "LOG_LEVELS": "httpx=error, scraper=DEBUG,bad"}
+        with mock.patch.dict(os.environ, env):
+            self.assertEqual(
+                logging_config._levels_from_env("json"), ("WARNING", {"httpx": "ERROR", "scraper": "DEBUG"})
+            )
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(logging_config._levels_from_env("json"), ("INFO", {}))
+            self.assertEqual(logging_config._levels_from_env("console"), ("DEBUG", {}))
+
+
+class ProgressStreamTests(SimpleTestCase):
+    def test_sse_frame(self):
+        frame = sse_frame({"id": 3, "event": "done", "urls": ["https://acme.com/jobs"]})
+        self.assertTrue(frame.startswith("id: 3\nevent: done\ndata: {"))
+        self.assertTrue(frame.endswith("\n\n"))
+        self.assertEqual(json.loads(frame.split("data: ", 1)[1])["urls"], ["https://acme.com/jobs"])
+
+    def test_publish_numbers_logs_and_broadcasts_in_one_script(self):
+        calls = []
+        client = mock.Mock()
+        client.register_script.return_value = lambda keys, args: calls.append((keys, args))
+        with mock.patch.object(progress, "get_redis", return_value=client):
+            progress.publish("j1", "site", new=2)
+            progress.publish(None, "site")
+        ((keys, args),) = calls
+        self.assertEqual(keys, ["discovery:progress:j1:seq", "discovery:progress:j1:log", "discovery:progress:j1"])
+        self.assertEqual(args[1:], [progress.PROGRESS_MAX_EVENTS, progress.PROGRESS_TTL_SECONDS])
+        # The script splices the id in as the first field
+        payload = json.loads('{"id": 7, ' + args[0][1:])
+        self.assertEqual((payload["id"], payload["event"], payload["new"]), (7, "site", 2))
+
+    def test_failed_task_closes_its_job_or_batch_stream(self):
+        with mock.patch.object(progress, "publish") as publish:
+            progress.on_task_failure(exception=RuntimeError("x"), kwargs={"batch_id": "b1"})
+            progress.on_task_failure(exception=RuntimeError("y"), kwargs={"job_id": "j1"})
+            progress.on_task_failure(exception=RuntimeError("z"), kwargs={})
+        self.assertEqual([c.args for c in publish.call_args_list], [("b1", "failed"), ("j1", "failed")])
+
+    def test_liveness_is_async_and_get_only(self):
+        client = AsyncClient(HTTP_HOST="localhost")
+
+        async def run():
+            return await client.get("/healthz"), await client.post("/healthz")
+
+        ok, not_allowed = asyncio.run(run())
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(not_allowed.status_code, 405)
+
+    @override_settings(READINESS_CACHE_SECONDS=60)
+    def test_readiness_caches_dependency_checks(self):
+        views._dependency_cache = (0.0, {})
+        status = {"database": "connected", "broker": "error: down"}
+        with mock.patch.object(views, "_check_dependencies", return_value=status) as check:
+            client = AsyncClient(HTTP_HOST="localhost")
+
+            async def run():
+                return [await client.get("/readyz") for _ in range(3)]
+
+            responses = asyncio.run(run())
+        views._dependency_cache = (0.0, {})
+        self.assertEqual(check.call_count, 1)
+        self.assertEqual([r.status_code for r in responses], [503] * 3)
+        self.assertEqual(responses[0].json()["broker"], "error: down")
+
+
+class NearDuplicateIndexTests(SimpleTestCase):
+    TEXT = " ".join(f"word{n}" for n in range(200))
+
+    def test_minhash_estimates_jaccard(self):
+        self.assertGreaterEqual(similarity(minhash(self.TEXT), minhash(self.TEXT + " apply now")), 0.9)
+        self.assertLess(similarity(minhash(self.TEXT), minhash(self.TEXT[::-1])), 0.2)
+        self.assertTrue((minhash("Senior Engineer") == minhash("senior   ENGINEER")).all())
+        self.assertIsNone(minhash("  -- "))
+
+    def test_index_returns_the_near_duplicate_it_already_holds(self):
+        index = NearDuplicateIndex(threshold=0.8)
+        index.add("ats", minhash(self.TEXT))
+        self.assertEqual(index.add_unique("mirror", minhash(self.TEXT + " apply now")), "ats")
+        self.assertIsNone(index.add_unique("other", minhash(self.TEXT[::-1])))
+        self.assertEqual(len(index), 2)
+
+
+class DomChunkerTests(SimpleTestCase):
+    CARDS = "".join(
+        f"<li class='job-card job-{n}'><h3>Software Engineer {n}</h3><div class='card-header'>Team {n}</div>"
+        f"<p>Toronto, ON</p><button>Apply</button></li>"
+        for n in range(40)
+    )
+    PAGE = (
+        "<html><body><header><nav><a href='/'>Home</a><a href='/about'>About us</a></nav></header>"
+        "<div id='onetrust-banner-sdk'>We use cookies. Accept all cookies?</div>"
+        "<main><h1>{title}</h1><ul>{cards}</ul></main>"
+        "<div class='promo'>Life at Acme: we value curiosity.</div>"
+        "<footer>© 2026 Acme Inc. Privacy</footer></body></html>"
+    )
+
+    def _page(self, title="Open roles"):
+        return self.PAGE.format(title=title, cards=self.CARDS)
+
+    def test_drops_boilerplate_and_keeps_cards_whole(self):
+        chunks = list(iter_dom_chunks(self._page(), max_chars=300))
+        text = "\n".join(chunks)
+        for noise in ("About us", "cookies", "Privacy", "Apply"):
+            self.assertNotIn(noise, text)
+        self.assertIn("Team 7", text)  # card-header inside a card is content
+        cards = [line for chunk in chunks for line in chunk.splitlines() if line.startswith("Software")]
+        self.assertEqual(cards[3], "Software Engineer 3 Team 3 Toronto, ON")
+        self.assertEqual(len(cards), 40)
+        self.assertTrue(all(len(chunk) <= 300 for chunk in chunks))
+        self.assertLess(len(chunks), len(chunk_text(visible_text(self._page()), 300)))
+
+    def test_template_units_skipped_after_repeating_across_pages(self):
+        templates = TemplateMemory(min_pages=2)
+        texts = [
+            "\n".join(iter_dom_chunks(self._page(f"Page {n}"), url="https://acme.com/jobs", templates=templates))
+            for n in range(3)
+        ]
+        self.assertIn("Life at Acme", texts[1])
+        self.assertNotIn("Life at Acme", texts[2])
+        self.assertIn("Page 2", texts[2])
+        # Other hosts have their own memory
+        other = "\n".join(iter_dom_chunks(self._page(), url="https://other.com/", templates=templates))
+        self.assertIn("Life at Acme", other)
+
+    def test_chunks_are_lazy(self):
+        chunks = iter_dom_chunks(self._page(), max_chars=100)
+        self.assertEqual(next(chunks).splitlines()[:2], ["Open roles", "Software Engineer 0 Team 0 Toronto, ON"])
+        self.assertIn("Software Engineer 2", next(chunks))
@@ -1,9 +1,32 @@
 # scraper/discovery/urls.py
 
 from django.urls import path
-from .views import add_company
+from .views import (
+    add_company,
+    add_companies_bulk,
+    batch_status,
+    job_events,
+    llm_cache_stats,
+    render_stats,
+    search_postings_view,
+    serp_cache_stats,
+)
 
 urlpatterns = [
     # POST /api/discover/  → add_company
     path('', add_company, name='add_company'),
+    # POST /api/discover/bulk/  → JSON array or NDJSON of companies
+    path('bulk/', add_companies_bulk, name='add_companies_bulk'),
+    # GET /api/discover/batch/<batch_id>/  → aggregate progress
+    path('batch/<str:batch_id>/', batch_status, name='batch_status'),
+    # GET /api/discover/jobs/<job_id>/events/  → live progress (Server-Sent Events)
+    path('jobs/<str:job_id>/events/', job_events, name='job_events'),
+    # GET /api/discover/postings/?q=…  → full-text posting search, keyset-paginated
+    path('postings/', search_postings_view, name='search_postings'),
+    # GET /api/discover/serp-cache/  → SERP cache hit ratio
+    path('serp-cache/', serp_cache_stats, name='serp_cache_stats'),
+    # GET /api/discover/llm-cache/  → LLM calls / seconds saved by the verdict cache
+    path('llm-cache/', llm_cache_stats, name='llm_cache_stats'),
+    # GET /api/discover/render-stats/  → requests blocked / bytes saved in headless fetches
+    path('render-stats/', render_stats, name='render_stats'),
 ]
@@ -1,55 +1,374 @@
+import functools
 import json
+import logging
 import platform
 import socket
+import threading
+import time
+import uuid
 import django
 
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.views.decorators.http import require_GET
 from django.utils.timezone import now
 from django.db import connection
 from django.middleware.csrf import get_token
-from celery import chain
-from discovery.tasks import search_normalize_task, crawl_career_pages_task
-from logging_config import setup_logging
+from celery import chain, group
+from discovery.tasks import (
+    search_normalize_task,
+    crawl_career_pages_task,
+    discover_companies_batch_task,
+    known_career_site_ids,
+    refresh_career_site_task,
+)
+from discovery.helpers.batches import create_batch, get_batch, normalize_company_key
+from discovery.models import JobPosting
+from discovery.helpers.llm_cache import get_llm_cache
+from discovery.helpers import progress
+from discovery.helpers.metrics import registry as metrics_registry
+from discovery.helpers.posting_search import SearchError, SearchQuery, search_postings
+from discovery.helpers.redis_client import get_redis
+from discovery.helpers.render_profiles import render_stats as render_profile_stats
+from discovery.helpers.serp_cache import get_serp_cache
+from logging_config import log_context
 
-logger = setup_logging()
+logger = logging.getLogger("scraper")
 
-@csrf_exempt
-@require_POST
-def add_company(request):
+def async_endpoint(*methods, csrf_exempt=False):
+    """
+    ``require_http_methods`` (+ ``csrf_exempt``) for ``async def`` views;
+    Django 4.2's own decorators wrap views in sync functions.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                logger.warning("[%s] Method not allowed: %s", view.__name__, request.method)
+                return HttpResponseNotAllowed(methods)
+            return await view(request, *args, **kwargs)
+
+        wrapper.csrf_exempt = csrf_exempt
+        return wrapper
+
+    return decorator
+
+
+def _events_url(job_id: str) -> str:
+    return f"/api/discover/jobs/{job_id}/events/"
+
+
+def _queue_company(company: str, country: str) -> tuple[dict, int]:
+    job_id = uuid.uuid4().hex
+    with log_context(company=company, country=country):
+        if getattr(settings, "DISCOVERY_INCREMENTAL", True):
+            site_ids = known_career_site_ids(company, country)
+            if site_ids:
+                # Known company: conditional re-check of its sites, no rediscovery.
+                # Each site counts as one chunk, so the last to finish sends "done".
+                logger.info("[add_company] %s already known; refreshing %d site(s)", company, len(site_ids))
+                create_batch(job_id, total=len(site_ids), chunks=len(site_ids))
+                progress.publish(job_id, "queued", company=company, country=country, sites=len(site_ids))
+                group(refresh_career_site_task.s(pk, job_id=job_id) for pk in site_ids).apply_async()
+                return {
+                    "status": "refresh_queued",
+                    "job_id": job_id,
+                    "events": _events_url(job_id),
+                    "sites": len(site_ids),
+                }, 202
+
+        logger.info("[add_company] Queuing tasks for company: %s, country: %s (job %s)", company, country, job_id)
+        progress.publish(job_id, "queued", company=company, country=country)
+        # Stage 1 (normalize URLs) → Stage 2 (crawl URLs)
+        chain(
+            search_normalize_task.s(company, country, job_id=job_id),
+            crawl_career_pages_task.s(company, country, job_id=job_id)
+        ).apply_async()
+    return {"status": "queued", "job_id": job_id, "events": _events_url(job_id)}, 202
+
+
+@async_endpoint("POST", csrf_exempt=True)
+async def add_company(request):
+    """
+    POST /api/discover/ → queue discovery for one company.
+
+    Returns a job id; progress and the final URLs stream from
+    /api/discover/jobs/<job_id>/events/ (Server-Sent Events).
+    """
     logger.info("[add_company] Received request to add company")
-    data = json.loads(request.body)
-    logger.debug(f"[add_company] Request data: {data}")
+    try:
+        data = json.loads(request.body)
+    except ValueError as exc:
+        logger.warning("[add_company] Malformed body: %s", exc)
+        return JsonResponse({"error": f"Malformed body: {exc}"}, status=400)
+    logger.debug("[add_company] Request data: %s", data)
 
-    company = data.get("company", "").strip()
-    country = data.get("country", "").strip()
+    company = str(data.get("company", "")).strip() if isinstance(data, dict) else ""
+    country = str(data.get("country", "")).strip() if isinstance(data, dict) else ""
     if not company or not country:
         logger.warning("[add_company] Missing 'company' or 'country' in request")
         return JsonResponse({"error": "Missing 'company' or 'country'"}, status=400)
 
-    logger.info(f"[add_company] Queuing tasks for company: {company}, country: {country}")
-    # Stage 1 (normalize URLs) → Stage 2 (crawl URLs)
-    chain(
-        search_normalize_task.s(company, country),
-        crawl_career_pages_task.s(company, country)
+    body, status = await sync_to_async(_queue_company)(company, country)
+    return JsonResponse(body, status=status)
+
+
+def _iter_bulk_companies(request):
+    """
+    Yield raw company records from a bulk request body.
+
+    • ``application/x-ndjson`` (or ``application/jsonl``): one JSON object
+      per line, read line by line from the request stream.
+    • Anything else: a JSON array, or ``{"companies": [...]}``.
+    """
+    content_type = request.content_type or ""
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        for line in request:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+        return
+
+    data = json.loads(request.body)
+    if isinstance(data, dict):
+        data = data.get("companies", [])
+    if not isinstance(data, list):
+        raise ValueError("expected a JSON array of companies")
+    yield from data
+
+
+def _queue_batch(batch_id: str, companies: list, chunks: list) -> None:
+    create_batch(batch_id, total=len(companies), chunks=len(chunks))
+    progress.publish(batch_id, "queued", total=len(companies), chunks=len(chunks))
+    group(
+        discover_companies_batch_task.s(chunk, batch_id=batch_id) for chunk in chunks
     ).apply_async()
 
-    return JsonResponse({"status": "queued"}, status=202)
 
+@async_endpoint("POST", csrf_exempt=True)
+async def add_companies_bulk(request):
+    """
+    POST /api/discover/bulk/ → dedupe, chunk, fan out as one Celery group.
 
-def healthCheckView(request):
-    logger.info("[healthCheckView] Performing health check")
+    Each chunk runs as a single `discover_companies_batch_task`, so one
+    worker (and its pooled browser) handles many companies. Returns a
+    batch id to poll at /api/discover/batch/<batch_id>/, or to follow
+    per company at /api/discover/jobs/<batch_id>/events/.
+    """
+    logger.info("[add_companies_bulk] Received bulk request")
+
+    seen: set[tuple[str, str]] = set()
+    companies: list[list[str]] = []
+    invalid = duplicates = 0
+    try:
+        for item in _iter_bulk_companies(request):
+            if not isinstance(item, dict):
+                invalid += 1
+                continue
+            company = " ".join(str(item.get("company", "")).split())
+            country = " ".join(str(item.get("country", "")).split())
+            if not company or not country:
+                invalid += 1
+                continue
+            key = normalize_company_key(company, country)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            companies.append([company, country])
+    except ValueError as exc:  # JSONDecodeError is a ValueError
+        logger.warning("[add_companies_bulk] Malformed body: %s", exc)
+        return JsonResponse({"error": f"Malformed body: {exc}"}, status=400)
+
+    if not companies:
+        return JsonResponse(
+            {"error": "No valid 'company'/'country' records", "invalid": invalid},
+            status=400,
+        )
+
+    chunk_size = getattr(settings, "DISCOVERY_BATCH_CHUNK_SIZE", 25)
+    chunks = [companies[i:i + chunk_size] for i in range(0, len(companies), chunk_size)]
+    batch_id = uuid.uuid4().hex
+
+    await sync_to_async(_queue_batch)(batch_id, companies, chunks)
+
+    logger.info(
+        "[add_companies_bulk] batch=%s queued %d companies in %d chunks "
+        "(%d duplicates, %d invalid)",
+        batch_id,
+        len(companies),
+        len(chunks),
+        duplicates,
+        invalid,
+    )
+    return JsonResponse(
+        {
+            "status": "queued",
+            "batch_id": batch_id,
+            "events": _events_url(batch_id),
+            "companies": len(companies),
+            "chunks": len(chunks),
+            "duplicates": duplicates,
+            "invalid": invalid,
+        },
+        status=202,
+    )
+
+
+@async_endpoint("GET")
+async def batch_status(request, batch_id: str):
+    """GET /api/discover/batch/<batch_id>/ → aggregate batch progress."""
+    batch = await sync_to_async(get_batch)(batch_id)
+    if batch is None:
+        return JsonResponse({"error": "Unknown batch id"}, status=404)
+    return JsonResponse(batch)
+
+
+@async_endpoint("GET")
+async def job_events(request, job_id: str):
+    """
+    GET /api/discover/jobs/<job_id>/events/ → Server-Sent Events.
+
+    Replays what the job has published so far, then pushes stage events
+    live until "done" (with the URLs) or "failed". Reconnects resume
+    after the ``Last-Event-ID`` header.
+    """
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", 0))
+    except ValueError:
+        last_event_id = 0
+    response = StreamingHttpResponse(
+        progress.stream(job_id, last_event_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
+
+
+def _posting_json(posting: JobPosting, score: float | None) -> dict:
+    return {
+        "id": posting.pk,
+        "title": posting.title,
+        "company": posting.company.name,
+        "country": posting.company.country,
+        "location": posting.location,
+        "department": posting.department,
+        "employment_type": posting.employment_type,
+        "remote": posting.remote,
+        "platform": posting.platform,
+        "url": posting.canonical_url,
+        "posted_at": posting.posted_at.isoformat() if posting.posted_at else None,
+        "first_seen_at": posting.first_seen_at.isoformat(),
+        "score": score,
+    }
+
+
+def _search_page(query: SearchQuery) -> dict:
+    page = search_postings(query)
+    postings = JobPosting.objects.select_related("company").in_bulk(page.ids)
+    return {
+        "results": [_posting_json(postings[pk], page.scores.get(pk)) for pk in page.ids if pk in postings],
+        "next_cursor": page.next_cursor,
+    }
+
+
+@async_endpoint("GET")
+async def search_postings_view(request):
+    """
+    GET /api/discover/postings/?q=&company=&country=&platform=&posted_after=&posted_before=&limit=&cursor=
+
+    Full-text search over active, non-duplicate postings (best match first,
+    or newest discovered without ``q``). Pass ``next_cursor`` back as
+    ``cursor`` for the next page.
+    """
+    try:
+        query = SearchQuery.from_params(request.GET)
+        body = await sync_to_async(_search_page)(query)
+    except SearchError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse(body)
+
+
+@require_GET
+def serp_cache_stats(request):
+    """GET /api/discover/serp-cache/ → hit ratio and size of the SERP cache."""
+    return JsonResponse(get_serp_cache().stats())
+
+
+@require_GET
+def llm_cache_stats(request):
+    """GET /api/discover/llm-cache/ → model calls and seconds the verdict cache saved."""
+    cache = get_llm_cache()
+    if cache is None:
+        return JsonResponse({"enabled": False})
+    return JsonResponse({"enabled": True, **cache.stats()})
+
+
+@require_GET
+def render_stats(request):
+    """GET /api/discover/render-stats/ → requests blocked by render profiles and bytes saved."""
+    return JsonResponse(render_profile_stats.snapshot())
+
+
+# ── health probes ───────────────────────────────────────────────
+_dependency_lock = threading.Lock()
+_dependency_cache: tuple[float, dict] = (0.0, {})
+
+
+def _check_dependencies() -> dict:
+    status = {}
     try:
         connection.ensure_connection()
-        db_status = "connected"
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-        logger.error(f"[healthCheckView] Database connection error: {e}")
+        status["database"] = "connected"
+    except Exception as e:  # noqa: BLE001
+        status["database"] = f"error: {str(e)}"
+        logger.error("[readiness] Database connection error: %s", e)
+    finally:
+        # Runs on a sync_to_async worker thread; don't leak its connection
+        connection.close_if_unusable_or_obsolete()
+    try:
+        get_redis().ping()
+        status["broker"] = "connected"
+    except Exception as e:  # noqa: BLE001
+        status["broker"] = f"error: {str(e)}"
+        logger.error("[readiness] Broker connection error: %s", e)
+    return status
+
+
+def _dependency_status() -> dict:
+    """DB and broker status, re-checked at most every READINESS_CACHE_SECONDS."""
+    global _dependency_cache
+    ttl = getattr(settings, "READINESS_CACHE_SECONDS", 5)
+    with _dependency_lock:
+        checked_at, status = _dependency_cache
+        if time.monotonic() - checked_at >= ttl:
+            status = _check_dependencies()
+            _dependency_cache = (time.monotonic(), status)
+        return status
+
+
+@async_endpoint("GET", "HEAD")
+async def livenessView(request):
+    """GET /healthz → the process is up and serving; touches nothing else."""
+    return JsonResponse({"status": "ok"})
+
+
+@async_endpoint("GET", "HEAD")
+async def readinessView(request):
+    """GET /readyz → 200 when the database and broker are reachable, else 503."""
+    status = await sync_to_async(_dependency_status)()
+    ready = all(v == "connected" for v in status.values())
+    return JsonResponse({"status": "ready" if ready else "unavailable", **status}, status=200 if ready else 503)
+
+
+def healthCheckView(request):
+    logger.info("[healthCheckView] Performing health check")
+    db_status = _dependency_status()["database"]
 
     csrf_token = get_token(request)
 
-    logger.debug(f"[healthCheckView] CSRF token: {csrf_token}")
+    logger.debug("[healthCheckView] CSRF token: %s", csrf_token)
 
     return JsonResponse({
         "status": "ok",
@@ -61,3 +380,12 @@ def healthCheckView(request):
         "database": db_status,
         "csrf_token": csrf_token
     })
+
+
+@require_GET
+def metricsView(request):
+    """GET /metrics → pipeline histograms, counters and gauges (Prometheus text format)."""
+    metrics_registry.flush(force=True)
+    return HttpResponse(
+        metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,15 +1,105 @@
 # logging_config.py
 
+"""
+Process-wide logging setup, shared by Django and the Celery workers.
+
+• Non-blocking: every logger writes to a ``QueueHandler``; a
+  ``QueueListener`` thread does the formatting and the actual stderr
+  writes, so request and task code never waits on the terminal or the
+  container's log pipe. The listener is restarted in forked children
+  (Celery prefork) and drained at exit.
+• ``LOG_FORMAT=json`` emits one JSON object per line, carrying the context
+  bound with ``log_context`` / ``bind_log_context`` (Celery task id and
+  name, company, batch id, …); the default ``console`` keeps the colored
+  dev output.
+• Levels come from the environment: ``LOG_LEVEL`` for the root logger
+  (DEBUG for console, INFO for json by default) and ``LOG_LEVELS`` for
+  per-logger overrides, e.g. ``LOG_LEVELS="httpx=WARNING,scraper=DEBUG"``.
+• Idempotent: calling ``setup_logging`` again is a no-op, so modules can
+  call it at import time without tearing down handlers.
+
+Log calls should pass arguments (``logger.debug("x=%s", x)``) rather than
+f-strings, so disabled levels cost nothing.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
 from colorlog import ColoredFormatter
 
-def setup_logging():
-    # Remove all existing handlers (avoids duplicate logs)
-    for handler in logging.root.handlers[:]:
-        logging.root.removeHandler(handler)
+_context: contextvars.ContextVar[dict] = contextvars.ContextVar("log_context", default={})
+_lock = threading.Lock()
+_queue_handler: QueueHandler | None = None
+_listener: QueueListener | None = None
+_configured_pid: int | None = None
+
+# LogRecord attributes that aren't user-supplied ``extra`` fields
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+# ── context ─────────────────────────────────────────────────────
+def bind_log_context(**fields) -> contextvars.Token:
+    """Attach ``fields`` to every record logged from this context."""
+    return _context.set({**_context.get(), **fields})
+
+
+def clear_log_context() -> None:
+    _context.set({})
+
+
+@contextmanager
+def log_context(**fields):
+    token = bind_log_context(**fields)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the bound context onto the record in the caller's thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+# ── formatters ──────────────────────────────────────────────────
+class JsonFormatter(logging.Formatter):
+    converter = time.gmtime
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
 
-    # Create console handler with colored output
-    formatter = ColoredFormatter(
+
+def _console_formatter() -> logging.Formatter:
+    return ColoredFormatter(
         "%(log_color)s%(levelname)s: %(message)s",
         log_colors={
             "DEBUG": "cyan",
@@ -20,16 +110,86 @@ def setup_logging():
         },
     )
 
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
 
-    # Configure root logger (affects all libraries, celery, etc.)
-    logging.basicConfig(
-        level=logging.DEBUG,
-        handlers=[console_handler]
-    )
+class _RecordQueueHandler(QueueHandler):
+    """
+    Enqueue the record itself: the message is merged with its args here (in
+    the caller, while the args are still safe to read) but formatting and
+    JSON encoding are left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# ── setup ───────────────────────────────────────────────────────
+def _levels_from_env(fmt: str) -> tuple[str, dict[str, str]]:
+    root = os.environ.get("LOG_LEVEL", "DEBUG" if fmt == "console" else "INFO").upper()
+    overrides = {}
+    for item in os.environ.get("LOG_LEVELS", "").split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            overrides[name.strip()] = level.strip().upper()
+    return root, overrides
+
+
+def _start_listener() -> None:
+    global _listener
+    fmt = os.environ.get("LOG_FORMAT", "console").lower()
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JsonFormatter() if fmt == "json" else _console_formatter())
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_queue_handler.queue, stream, respect_handler_level=False)
+    _listener.start()
+
+
+def _restart_in_child() -> None:
+    # The listener thread doesn't survive fork; records queued in the child
+    # would never be written without a fresh one.
+    global _configured_pid
+    if _queue_handler is not None and _configured_pid != os.getpid():
+        _configured_pid = os.getpid()
+        _start_listener()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener (atexit)."""
+    global _listener
+    if _listener is not None and _configured_pid == os.getpid():
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging() -> logging.Logger:
+    global _queue_handler, _configured_pid
+    with _lock:
+        if _queue_handler is None:
+            fmt = os.environ.get("LOG_FORMAT", "console").lower()
+            root_level, overrides = _levels_from_env(fmt)
+
+            _queue_handler = _RecordQueueHandler(queue.SimpleQueue())
+            _queue_handler.addFilter(ContextFilter())
+            _configured_pid = os.getpid()
+            _start_listener()
+
+            # Replace whatever was there (basicConfig, Celery's defaults)
+            root = logging.getLogger()
+            for handler in root.handlers[:]:
+                root.removeHandler(handler)
+            root.addHandler(_queue_handler)
+            root.setLevel(root_level)
+            for name, level in overrides.items():
+                logging.getLogger(name).setLevel(level)
+
+            os.register_at_fork(after_in_child=_restart_in_child)
+            atexit.register(stop_logging)
 
-    # Also return a named logger if you want to use one
     return logging.getLogger("scraper")
 
 
@@ -38,6 +198,7 @@ if __name__ == "__main__":
     logger = setup_logging()
     logger.debug("This is a debug message")
     logger.info("This is an info message")
-    logger.warning("This is a warning message")
+    with log_context(company="Acme", task_id="demo"):
+        logger.warning("This is a warning message")
     logger.error("This is an error message")
     logger.critical("This is a critical message")
@@ -1,7 +1,75 @@
 import os
 from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    setup_logging as celery_setup_logging,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+)
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "scraperproject.settings")
 app = Celery("scraperproject")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@celery_setup_logging.connect
+def _configure_logging(**kwargs):
+    # Keeps Celery from installing its own root handlers over ours
+    from logging_config import setup_logging
+
+    setup_logging()
+
+
+@before_task_publish.connect
+def _stamp_publish_time(**kwargs):
+    from discovery.helpers.metrics import on_task_publish
+
+    on_task_publish(**kwargs)
+
+
+@task_prerun.connect
+def _bind_task_log_context(task_id=None, task=None, **kwargs):
+    from logging_config import bind_log_context, clear_log_context
+    from discovery.helpers.metrics import on_task_prerun
+
+    clear_log_context()
+    bind_log_context(task_id=task_id, task=task.name if task else None)
+    on_task_prerun(task_id=task_id, task=task)
+
+
+@task_postrun.connect
+def _clear_task_log_context(**kwargs):
+    from logging_config import clear_log_context
+    from discovery.helpers.metrics import on_task_postrun
+
+    on_task_postrun(**kwargs)
+    clear_log_context()
+
+
+@task_failure.connect
+def _close_failed_job_stream(**kwargs):
+    from discovery.helpers.progress import on_task_failure
+
+    on_task_failure(**kwargs)
+
+
+@worker_process_init.connect
+def _start_metrics_flusher(**kwargs):
+    from discovery.helpers.metrics import on_worker_process_init
+
+    on_worker_process_init(**kwargs)
+
+
+@worker_process_shutdown.connect
+def _drain_logs(**kwargs):
+    # Pool children exit without atexit; write out what's still queued (metrics, logs)
+    from logging_config import stop_logging
+    from discovery.helpers.metrics import registry
+
+    registry.stop_flusher()
+    registry.flush(force=True)
+    stop_logging()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -138,3 +139,107 @@ CELERY_BROKER_URL = "redis://localhost:6379/0"
 CELERY_RESULT_BACKEND = "redis://localhost:6379/0"
 
 CELERY_TASK_TRACK_STARTED = True
+
+# Per-worker Playwright pool (discovery/helpers/browser_pool.py)
+BROWSER_POOL_MAX_CONTEXTS = 4     # concurrent contexts per worker process
+BROWSER_POOL_MAX_PAGES = 200      # recycle Chromium after this many pages
+BROWSER_POOL_MAX_RSS_MB = 1500    # ...or when the worker process tree grows past this
+BROWSER_POOL_RSS_CHECK_PAGES = 20    # sample that RSS every N pages...
+BROWSER_POOL_RSS_CHECK_SECONDS = 30  # ...or this often, whichever comes first
+BROWSER_POOL_HEADLESS = True
+
+# Stage-1 SERP fetching: "concurrent" (one tab per query) or "sequential"
+SERP_FETCH_MODE = "concurrent"
+
+# Bulk discovery: companies per Celery group member (one worker, one browser)
+DISCOVERY_BATCH_CHUNK_SIZE = 25
+
+# Stage-1 SERP result cache (discovery/helpers/serp_cache.py)
+SERP_CACHE_BACKEND = "redis"          # "redis" (falls back to in-process), "local" or "off"
+SERP_CACHE_TTL_SECONDS = 24 * 3600
+SERP_CACHE_MAX_ENTRIES = 10_000       # LRU-evicted beyond this
+
+# Stage-2 career-page crawler (discovery/helpers/crawler.py)
+CRAWLER_MAX_DEPTH = 3
+CRAWLER_MAX_PAGES = 50
+CRAWLER_MAX_CONCURRENCY = 8
+CRAWLER_PER_HOST_CONCURRENCY = 2
+
+# Crawler politeness (discovery/helpers/politeness.py)
+CRAWLER_HOST_RATE = 1.0               # requests/second per host (Crawl-delay can lower it)
+CRAWLER_HOST_BURST = 2.0
+CRAWLER_ROBOTS_TTL_SECONDS = 3600
+CRAWLER_MAX_BACKOFF_SECONDS = 300     # cap for 429/503 backoff and Retry-After
+CRAWLER_MAX_HOST_WAIT_SECONDS = 30    # verify/fetch skip a host that isn't ready within this
+
+# Incremental refresh: known companies are re-checked (conditional requests
+# + content hashes) instead of rediscovered; due sites are swept by beat.
+DISCOVERY_INCREMENTAL = True
+CELERY_BEAT_SCHEDULE = {
+    "refresh-due-career-sites": {
+        "task": "discovery.tasks.refresh_due_sites_task",
+        "schedule": 900.0,  # seconds
+    },
+}
+
+# Stage-2 semantic ranking (discovery/helpers/embeddings.py)
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_CACHE_PATH = BASE_DIR / "var" / "embeddings.sqlite3"   # None disables the disk cache
+EMBEDDING_PRELOAD = True              # load the model on worker start, not on first task
+EMBEDDING_CHUNKS_PER_PAGE = 8
+EMBEDDING_MIN_SCORE = 0.3             # cosine; pages below this aren't candidates
+
+# Persistent chunk-vector index (discovery/helpers/vector_index.py)
+VECTOR_INDEX_DIR = BASE_DIR / "var" / "vector_index"   # None disables it
+VECTOR_INDEX_DTYPE = "int8"           # "int8" (1 byte/dim + row scale) or "float16"
+VECTOR_INDEX_COMPACT_AFTER = 32       # merge segments beyond this many
+
+# Candidate verification (discovery/helpers/verify.py, helpers/llm.py)
+VERIFY_CANDIDATES = True
+VERIFY_ACCEPT_SCORE = 0.7             # structural score ≥ this: listings page, no LLM
+VERIFY_REJECT_SCORE = 0.15            # ≤ this: not a listings page, no LLM
+VERIFY_MAX_LLM_CHUNKS = 8             # per page; the LLM stops at the first YES
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "mistral")
+OLLAMA_TIMEOUT_SECONDS = 20
+OLLAMA_BATCH_SIZE = 4                 # chunks per /api/generate call
+OLLAMA_MAX_CONCURRENCY = 2
+
+# LLM verdict cache (discovery/helpers/llm_cache.py)
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = BASE_DIR / "var" / "llm_verdicts.sqlite3"   # None keeps it in memory only
+LLM_CACHE_MAX_ENTRIES = 50_000        # per-process LRU in front of the disk table
+
+# Structured page extraction (discovery/helpers/pagescraper.py)
+PAGESCRAPER_MODE = "evaluate"         # "evaluate" (in-page), "lxml" (one pass) or "soup" (legacy)
+PAGESCRAPER_FIELD_LIMITS = None       # e.g. {"links": 500, "paragraphs": 200}
+
+# Headless render profiles (discovery/helpers/render_profiles.py)
+RENDER_PROFILE_DEFAULT = "text-only"  # "text-only" blocks images/fonts/media/CSS/trackers; "full" blocks nothing
+RENDER_FULL_PROFILE_HOSTS = []        # hosts (and subdomains) that break under blocking, e.g. ["workday.com"]
+
+# Tiered fetching (discovery/helpers/fetcher.py): HTTP first, browser when needed
+FETCH_TIER_BACKEND = "redis"          # where the per-host tier is remembered: "redis" or "local"
+FETCH_TIER_TTL_SECONDS = 7 * 24 * 3600  # after this a browser-only host gets another HTTP try
+FETCH_MIN_ANCHORS = 5                 # non-empty links an HTTP page needs to count as rendered…
+FETCH_MIN_TEXT_CHARS = 400            # …plus this much visible text (or any job link)
+BROWSER_MAX_TABS = 4                  # tabs a concurrent browser fetch keeps open at once
+
+# Debug page snapshots (discovery/helpers/snapshots.py); needs zstandard
+SNAPSHOT_DIR = BASE_DIR / "var" / "snapshots"   # None disables snapshots
+SNAPSHOT_SAMPLE_RATES = {"serp": 0.01}  # share of successful fetches kept, per kind
+SNAPSHOT_FAILURE_SAMPLE_RATE = 1.0      # share of failed fetches (e.g. SERP without results) kept
+SNAPSHOT_MAX_BYTES = 256 * 2**20        # compressed; oldest objects evicted beyond this
+SNAPSHOT_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+# Live progress (discovery/helpers/progress.py) and health probes
+PROGRESS_STREAM_TIMEOUT = 15 * 60     # seconds an SSE stream stays open waiting for "done"
+READINESS_CACHE_SECONDS = 5           # /readyz re-checks the DB and broker at most this often
+
+# Near-duplicate postings / crawl pages (discovery/helpers/near_dupes.py)
+NEAR_DUPLICATE_THRESHOLD = 0.8        # estimated Jaccard similarity (word 3-shingles) that makes a near-duplicate
+
+# Captured JSON job feeds (discovery/helpers/job_feeds.py, connectors/feed.py)
+FEED_CAPTURE_ENABLED = True           # render connector-less boards / listings pages once to find their JSON feed
+FEED_LOAD_MORE_ROUNDS = 2             # scroll + "load more" clicks per captured page, to see the paging parameter
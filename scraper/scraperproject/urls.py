@@ -16,12 +16,15 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include  # ✅ include is required here
-from discovery.views import healthCheckView  # ✅ import your view
+from discovery.views import healthCheckView, livenessView, metricsView, readinessView  # ✅ import your view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/discover/', include('discovery.urls')),  # ✅ connects your view
     path("", healthCheckView),  # 👈 health check root path
+    path("metrics", metricsView),  # Prometheus scrape target
+    path("healthz", livenessView),  # liveness: process is serving
+    path("readyz", readinessView),  # readiness: DB + broker reachable (cached)
 
 ]
 
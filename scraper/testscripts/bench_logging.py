@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-task logging overhead: the old setup (root at DEBUG, colored
+StreamHandler writing synchronously, f-string messages) vs logging_config's
+QueueHandler → QueueListener pipeline with JSON output and lazy %-args.
+
+    python testscripts/bench_logging.py
+    python testscripts/bench_logging.py --tasks 5000 --sink-latency-us 50
+
+Each simulated task logs what a stage-1/2 run typically does: a request
+dump, per-link debug lines, a few info lines and a warning. The sink
+stands in for stdout; ``--sink-latency-us`` makes each write block, like
+a slow terminal or a full container log pipe. Only the time spent in the
+task's own thread is reported — that's what the pipeline moves off the
+hot path.
+"""
+
+import argparse
+import io
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import queue  # noqa: E402
+from logging.handlers import QueueListener  # noqa: E402
+
+from colorlog import ColoredFormatter  # noqa: E402
+
+from logging_config import ContextFilter, JsonFormatter, _RecordQueueHandler, log_context  # noqa: E402
+
+REQUEST = {"company": "Acme Corp", "country": "Canada", "options": {"depth": 3, "pages": 50}}
+LINKS = [f"https://careers.acme.com/jobs/{n}" for n in range(20)]
+
+
+class SlowSink(io.TextIOBase):
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+
+    def write(self, s):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return len(s)
+
+
+def task_fstrings(logger):
+    logger.info(f"[add_company] Queuing tasks for company: {REQUEST['company']}, country: {REQUEST['country']}")
+    logger.debug(f"[add_company] Request data: {REQUEST}")
+    for href in LINKS:
+        logger.debug(f"[search_normalize_task] href={href}")
+    logger.info(f"[search_normalize_task] {len(LINKS)} unique URLs for {REQUEST['company']}")
+    logger.warning(f"[search_normalize_task] Error while querying '{REQUEST['company']} careers': timeout")
+    logger.info(f"[crawl_career_pages_task] Crawled {50} pages, {1} listings page(s)")
+
+
+def task_lazy(logger):
+    logger.info("[add_company] Queuing tasks for company: %s, country: %s", REQUEST["company"], REQUEST["country"])
+    logger.debug("[add_company] Request data: %s", REQUEST)
+    for href in LINKS:
+        logger.debug("[search_normalize_task] href=%s", href)
+    logger.info("[search_normalize_task] %d unique URLs for %s", len(LINKS), REQUEST["company"])
+    logger.warning("[search_normalize_task] Error while querying '%s careers': %s", REQUEST["company"], "timeout")
+    logger.info("[crawl_career_pages_task] Crawled %d pages, %d listings page(s)", 50, 1)
+
+
+def configure(root, handler, level):
+    for h in root.handlers[:]:
+        root.removeHandler(h)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def run(name, tasks, task_fn, logger, listener=None):
+    start = time.perf_counter()
+    for n in range(tasks):
+        with log_context(task_id=f"t-{n}", company=REQUEST["company"]):
+            task_fn(logger)
+    elapsed = time.perf_counter() - start
+    if listener is not None:
+        listener.stop()  # drain outside the measured window
+    print(f"  {name:<34} {elapsed / tasks * 1e6:9.1f} µs/task")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--sink-latency-us", type=float, default=20.0, help="blocking time per write")
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    logger = logging.getLogger("scraper")
+    sink = SlowSink(args.sink_latency_us / 1e6)
+    print(f"{args.tasks} tasks, {len(LINKS) + 5} log calls each, sink latency {args.sink_latency_us:g} µs/write")
+
+    # Before: synchronous colored handler, DEBUG, f-strings
+    old = logging.StreamHandler(sink)
+    old.setFormatter(ColoredFormatter("%(log_color)s%(levelname)s: %(message)s"))
+    configure(root, old, logging.DEBUG)
+    before = run("before (sync, DEBUG, f-strings)", args.tasks, task_fstrings, logger)
+
+    results = {}
+    for level in (logging.INFO, logging.DEBUG):
+        stream = logging.StreamHandler(sink)
+        stream.setFormatter(JsonFormatter())
+        handler = _RecordQueueHandler(queue.SimpleQueue())
+        handler.addFilter(ContextFilter())
+        listener = QueueListener(handler.queue, stream)
+        listener.start()
+        configure(root, handler, level)
+        label = f"after (queue+JSON, {logging.getLevelName(level)})"
+        results[level] = run(label, args.tasks, task_lazy, logger, listener)
+
+    print(f"  speedup at INFO:  {before / results[logging.INFO]:.1f}x")
+    print(f"  speedup at DEBUG: {before / results[logging.DEBUG]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
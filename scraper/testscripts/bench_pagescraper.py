@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark pagescraper extraction: BeautifulSoup (five find_all passes)
+vs the single lxml pass, on a synthetic careers page or a saved HTML file.
+
+    python testscripts/bench_pagescraper.py                  # 5,000 job cards
+    python testscripts/bench_pagescraper.py --jobs 20000
+    python testscripts/bench_pagescraper.py --html page.html --limit-links 500
+    python testscripts/bench_pagescraper.py --url https://jobs.lever.co/acme   # + in-page evaluate
+
+Reports best-of-N wall time and peak Python allocations (tracemalloc) per
+mode, and checks both modes return identical output. libxml2's own tree
+is allocated in C and not seen by tracemalloc, so the lxml peak is a lower
+bound; wall time is the headline number.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "scraperproject.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from discovery.helpers.pagescraper import extract_structured, scrape_page_structured  # noqa: E402
+
+
+def synthetic_page(jobs: int) -> str:
+    cards = "".join(
+        f"<li class='job-card'><a href='/jobs/{n}'><h3>Software Engineer {n}</h3></a>"
+        f"<p>Toronto, ON · <span>Full-time</span></p><button>Apply</button></li>"
+        for n in range(jobs)
+    )
+    return (
+        "<html><head><title>Careers</title><script>window.__STATE__ = {};</script></head>"
+        f"<body><h1>Open roles</h1><p>Join us.</p><ul>{cards}</ul></body></html>"
+    )
+
+
+def measure(fn, repeat: int) -> tuple[float, float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2**20, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=5000, help="job cards in the synthetic page")
+    parser.add_argument("--html", help="benchmark a saved HTML file instead")
+    parser.add_argument("--url", help="also time live scraping of URL in every mode (needs Chromium)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit-links", type=int, help="per-field cap for links")
+    args = parser.parse_args()
+
+    html = Path(args.html).read_text(encoding="utf-8") if args.html else synthetic_page(args.jobs)
+    limits = {"links": args.limit_links} if args.limit_links else None
+    url = "https://example.com/careers"
+    print(f"HTML size: {len(html) / 2**20:.2f} MiB, limits={limits}")
+
+    rows = {}
+    for mode in ("soup", "lxml"):
+        seconds, peak_mb, result = measure(lambda: extract_structured(html, url, limits, mode), args.repeat)
+        rows[mode] = (seconds, peak_mb, result)
+        print(
+            f"  {mode:<5} {seconds * 1000:9.1f} ms   peak {peak_mb:8.1f} MiB   "
+            f"links={len(result['links'])} headings={len(result['headings'])}"
+        )
+
+    soup_s, soup_mb, soup_result = rows["soup"]
+    lxml_s, lxml_mb, lxml_result = rows["lxml"]
+    print(f"  lxml vs soup: {soup_s / lxml_s:.1f}x faster, {soup_mb / max(lxml_mb, 0.01):.1f}x less peak memory")
+    print(f"  identical output: {soup_result == lxml_result}")
+
+    if args.url:
+        print(f"\nLive: {args.url}")
+        for mode in ("soup", "lxml", "evaluate"):
+            start = time.perf_counter()
+            data = scrape_page_structured(args.url, limits=limits, mode=mode)
+            elapsed = time.perf_counter() - start
+            print(f"  {mode:<8} {elapsed * 1000:9.1f} ms   links={len(data.get('links', []))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark the posting search API (helpers/posting_search.py) at scale:
+p50/p95/p99 latency per query shape over a synthetic table of postings.
+
+    python testscripts/bench_search.py                       # 1,000,000 postings
+    python testscripts/bench_search.py --rows 200000 --runs 500
+    python testscripts/bench_search.py --db /tmp/search.sqlite3 --keep   # reuse the table next time
+
+Builds its own SQLite database (migrations included, so the FTS5 table
+and triggers are the real ones), fills it through ``bulk_create`` — the
+insert triggers maintain the index as the pipeline would — then times
+``search_postings`` for full-text queries (common, rare and multi-term,
+with and without filters), filtered browsing, and page 50 reached by
+following cursors. Deep pages are compared with the OFFSET query the
+keyset cursor replaces.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "scraperproject.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+
+ROLES = ["Engineer", "Designer", "Manager", "Analyst", "Scientist", "Recruiter", "Accountant", "Writer"]
+LEVELS = ["Junior", "Senior", "Staff", "Principal", "Lead", ""]
+AREAS = ["Backend", "Frontend", "Data", "Payments", "Platform", "Mobile", "Security", "Growth", "Finance"]
+PLATFORMS = ["lever", "greenhouse", "ashby", "general"]
+CITIES = ["Toronto", "Vancouver", "Montreal", "New York", "Berlin", "London", "Remote"]
+WORDS = (
+    "build operate scale design review ship own improve services systems customers teams product data "
+    "python go rust java kotlin react postgres kafka kubernetes terraform cloud api pipeline reliability "
+    "security compliance billing checkout merchants analytics experiments research hiring onboarding "
+    "roadmap stakeholders mentoring collaboration ownership quality performance latency"
+).split()
+# Descriptions draw from WORDS plus a long tail of rarer terms, Zipf-weighted
+# (the n-th word ~1/n as often as the first), like real postings
+VOCAB = WORDS + [f"skill{n}" for n in range(5000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (n + 1) for n in range(len(VOCAB))))
+QUERIES = {
+    "q common (engineer)": dict(q="engineer"),
+    "q two terms": dict(q="senior payments"),
+    "q mid (kafka terraform)": dict(q="kafka terraform"),
+    "q rare (skill400 skill900)": dict(q="skill400 skill900"),
+    "q + company filter": dict(q="engineer", company="Company 17", country="Canada"),
+    "q + platform + posted_after": dict(
+        q="data", platform="greenhouse", posted_after=datetime(2025, 6, 1, tzinfo=timezone.utc)
+    ),
+    "browse (no q)": dict(),
+    "browse + platform": dict(platform="ashby"),
+    "browse + company": dict(company="Company 42", country="Canada"),
+}
+
+
+def fill(rows: int, companies: int, seed: int = 7) -> None:
+    from discovery.models import Company, JobPosting, posting_content_hash
+
+    rng = random.Random(seed)
+    owners = [Company.for_name(f"Company {n}", "Canada") for n in range(companies)]
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    batch, written, began = [], 0, time.perf_counter()
+    for n in range(rows):
+        title = " ".join(filter(None, [rng.choice(LEVELS), rng.choice(AREAS), rng.choice(ROLES)]))
+        values = dict(
+            title=title,
+            location=rng.choice(CITIES),
+            department=rng.choice(AREAS),
+            employment_type="Full-time",
+            remote=None,
+            description=" ".join(rng.choices(VOCAB, cum_weights=CUM_WEIGHTS, k=rng.randint(40, 120))),
+            posted_at=start + timedelta(minutes=n),
+        )
+        batch.append(
+            JobPosting(
+                company=rng.choice(owners),
+                canonical_url=f"https://jobs.example.com/{n}",
+                platform=rng.choice(PLATFORMS),
+                content_hash=posting_content_hash(values),
+                first_seen_at=start + timedelta(seconds=n),
+                **values,
+            )
+        )
+        if len(batch) == 5000:
+            JobPosting.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+            print(f"\r  inserted {written:,}/{rows:,} ({time.perf_counter() - began:.0f}s)", end="", flush=True)
+    if batch:
+        JobPosting.objects.bulk_create(batch)
+    print(f"\r  inserted {rows:,} postings in {time.perf_counter() - began:.0f}s" + " " * 20)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def percentiles(samples: list[float]) -> tuple[float, float, float]:
+    qs = statistics.quantiles(samples, n=100, method="inclusive")
+    return qs[49] * 1e3, qs[94] * 1e3, qs[98] * 1e3
+
+
+def timed(fn, runs: int) -> list[float]:
+    fn()  # warm the page cache
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--companies", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=200, help="timed runs per query shape")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--db", help="SQLite file to build into / reuse (default: a temp file)")
+    parser.add_argument("--keep", action="store_true", help="don't delete the database afterwards")
+    args = parser.parse_args()
+
+    db = Path(args.db) if args.db else Path(tempfile.mkdtemp()) / "bench_search.sqlite3"
+    reuse = db.exists()
+    connection.settings_dict["NAME"] = str(db)
+    connection.close()
+    call_command("migrate", verbosity=0)
+
+    from discovery.helpers.posting_search import SearchQuery, search_postings
+    from discovery.models import JobPosting
+
+    if not reuse:
+        print(f"Building {db}")
+        fill(args.rows, args.companies)
+    rows = JobPosting.objects.count()
+    print(f"{rows:,} postings, {args.runs} runs per shape, limit {args.limit}\n")
+    print(f"  {'query':<34} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hits/page':>10}")
+
+    for name, params in QUERIES.items():
+        query = SearchQuery(limit=args.limit, **params)
+        hits = len(search_postings(query).ids)
+        p50, p95, p99 = percentiles(timed(lambda: search_postings(query), args.runs))
+        print(f"  {name:<34} {p50:8.2f} {p95:8.2f} {p99:8.2f} {hits:10d}")
+
+    # Deep page: cursor for page 50, then time fetching it vs the OFFSET equivalent
+    for name, params in (("page 50 via cursor (q=engineer)", dict(q="engineer")), ("page 50 via cursor (browse)", {})):
+        cursor = None
+        for _ in range(49):
+            cursor = search_postings(SearchQuery(limit=args.limit, cursor=cursor, **params)).next_cursor
+        query = SearchQuery(limit=args.limit, cursor=cursor, **params)
+        p50, p95, p99 = percentiles(timed(lambda: search_postings(query), args.runs))
+        print(f"  {name:<34} {p50:8.2f} {p95:8.2f} {p99:8.2f}")
+
+    browse = JobPosting.objects.filter(removed_at__isnull=True, duplicate_of__isnull=True).order_by(
+        "-first_seen_at", "-id"
+    )
+    for name, pages in (("page 50 via OFFSET (browse)", 50), ("page 2500 via OFFSET (browse)", 2500)):
+        offset = (pages - 1) * args.limit
+        p50, p95, p99 = percentiles(
+            timed(lambda: list(browse.values_list("id", flat=True)[offset:offset + args.limit]), args.runs)
+        )
+        print(f"  {name:<34} {p50:8.2f} {p95:8.2f} {p99:8.2f}")
+
+    connection.close()
+    if not args.keep and not args.db:
+        db.unlink()
+        db.parent.rmdir()
+    elif args.keep:
+        print(f"\nKept {db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 import sys
 import asyncio
-import textwrap
 import requests
+from pathlib import Path
 from typing import List, Tuple, Optional
 from urllib.parse import urlparse, urljoin, urlencode
 
@@ -17,6 +17,9 @@ from crawl4ai.deep_crawling.filters import FilterChain, DomainFilter, URLPattern
 from crawl4ai.deep_crawling.scorers import KeywordRelevanceScorer
 from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from discovery.helpers.dom_chunker import TemplateMemory, iter_dom_chunks
+
 # ─── CONFIG ─────────────────────────────────────────────────────────────────────
 OLLAMA_URL   = "http://localhost:11434/api/generate"
 OLLAMA_MODEL = "mistral-7b-instruct"
@@ -47,8 +50,10 @@ def getFirstCareerUrl(companyName: str) -> Optional[str]:
     print("❌ DuckDuckGo returned no results")
     return None
 
-def chunkText(text: str, maxChars: int = 2000) -> List[str]:
-    return list(textwrap.wrap(text, maxChars, break_long_words=False))
+def chunkText(pageHtml: str, maxChars: int = 2000, url: Optional[str] = None,
+              templates: Optional[TemplateMemory] = None) -> List[str]:
+    # DOM chunks: boilerplate dropped, job cards whole, site template text skipped
+    return list(iter_dom_chunks(pageHtml, maxChars, url=url, templates=templates))
 
 def isJobListingsPage(chunk: str) -> bool:
     prompt = (
@@ -121,12 +126,13 @@ async def crawlAndCollectTextChunks(startUrl: str) -> List[Tuple[str,str]]:
     )
 
     chunksWithUrls: List[Tuple[str,str]] = []
+    templates = TemplateMemory()
     async with AsyncWebCrawler() as crawler:
         try:
             results = await crawler.arun(startUrl, config=config)
             async for res in results:
-                text = res.cleaned_text or res.markdown or res.raw_html or ""
-                for chunk in chunkText(text):
+                pageHtml = res.html or res.cleaned_html or ""
+                for chunk in chunkText(pageHtml, url=res.url, templates=templates):
                     chunksWithUrls.append((chunk, res.url))
             print(f"🔖 Collected {len(chunksWithUrls)} text chunks")
         except Exception as e: